@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Persistent address metadata cache, and the enrichment stage that fills it.
+
+Blockscout knows for every address whether it is a contract, its contract
+name, its public tags (exchange wallets, bridges ...) and its ENS name. This
+module keeps those fields in SQLite, each with its own fetch time and TTL:
+- is_contract / is_verified - effectively permanent once deployed (30 days)
+- name                      - contract names rarely change (7 days)
+- tags / ens_domain         - curated and user-controlled (1 day)
+
+Override with ADDRESS_METADATA_TTLS="field=seconds,...". Lookups are bulk
+(one indexed query per 500 addresses), and stale() returns only the
+addresses with a missing or expired field, so a run fetches just those.
+
+The Blockscout holder list already embeds this metadata, so the holder
+scraper records it as it pages and holders never need a lookup of their own.
+The enrichment stage (this module's main) covers addresses from the other
+sources - Galxe leaderboard entries and Cookie.fun accounts in the entity
+store, and BaseScan transfer counterparties in the transfer store - with one
+Blockscout /addresses request per stale address.
+
+Set ADDRESS_METADATA_PATH to move the cache.
+
+Usage:
+    with AddressMetadataCache() as cache:
+        cache.put_many([address_metadata(item["address"]) for item in items])
+        cache.get_many(addresses)
+
+    python address_metadata.py [--entity-store cookie_entities.sqlite] [--store cookie_transfers.sqlite]
+                               [--max-fetch 1000] [--output address_metadata.xlsx]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from entity_store import DEFAULT_ENTITY_STORE_PATH, EntityStore
+from scraper_cache import parse_ttls
+from scraper_http import ErrorBudgetExceeded, HttpClient, PermanentRequestError, RequestFailed
+from scraper_ratelimit import RateLimitedSession
+from scraper_stream import add_output_arguments, export_results
+from transfer_store import DEFAULT_STORE_PATH, TransferStore
+
+DEFAULT_METADATA_PATH = os.getenv("ADDRESS_METADATA_PATH", "address_metadata.sqlite")
+
+BLOCKSCOUT_API = "https://base.blockscout.com/api/v2"
+COOKIE_TOKEN_ADDRESS = "0xc0041ef357b183448b235a8ea73ce4e4ec8c265f"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+DAY = 86400
+
+# Field -> TTL in seconds
+DEFAULT_FIELD_TTLS: Dict[str, float] = {
+    "is_contract": 30 * DAY,
+    "is_verified": 30 * DAY,
+    "name": 7 * DAY,
+    "tags": DAY,
+    "ens_domain": DAY,
+}
+FIELDS = list(DEFAULT_FIELD_TTLS)
+
+# Addresses per IN (...) query; well under SQLite's variable limit
+LOOKUP_CHUNK = 500
+
+# Entity store tables whose addresses the enrichment stage covers
+ENRICH_TABLES = ("leaderboard_entries", "accounts", "agents")
+
+EVM_ADDRESS = re.compile(r"^0x[0-9a-f]{40}$")
+
+ENRICH_WORKERS = 4
+
+
+def field_ttls() -> Dict[str, float]:
+    ttls = dict(DEFAULT_FIELD_TTLS)
+    for field, seconds in parse_ttls(os.getenv("ADDRESS_METADATA_TTLS", "")):
+        if field in ttls:
+            ttls[field] = seconds
+    return ttls
+
+
+def address_metadata(info: Dict) -> Dict:
+    """Metadata fields from a Blockscout address object (as embedded in holder items or /addresses/{hash})."""
+    metadata = info.get("metadata") or {}
+    tag_names = [t.get("name", "") for t in metadata.get("tags") or [] if t.get("name")]
+    return {
+        "address": (info.get("hash") or "").lower(),
+        "is_contract": bool(info.get("is_contract", False)),
+        "is_verified": bool(info.get("is_verified", False)),
+        "name": info.get("name") or "",
+        "tags": ", ".join(tag_names),
+        "ens_domain": info.get("ens_domain_name") or "",
+    }
+
+
+def is_evm_address(address) -> bool:
+    return isinstance(address, str) and bool(EVM_ADDRESS.match(address.lower())) and address.lower() != ZERO_ADDRESS
+
+
+class AddressMetadataCache:
+    """Address metadata in SQLite, one fetch time per field."""
+
+    def __init__(self, path: str = DEFAULT_METADATA_PATH, ttls: Optional[Dict[str, float]] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttls = ttls or field_ttls()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{field}, {field}_at REAL" for field in FIELDS)
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS address_metadata (address TEXT PRIMARY KEY, {columns})")
+        self._db.commit()
+
+    def put_many(self, records: Iterable[Dict], fetched_at: Optional[float] = None) -> int:
+        """
+        Upsert metadata records ({"address": ..., field: value, ...}).
+
+        Only the fields a record carries are written and re-timestamped; the
+        others keep their stored value and age. Returns records written.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        columns = ["address"] + [c for field in FIELDS for c in (field, f"{field}_at")]
+        updates = [
+            f"{c} = CASE WHEN excluded.{field}_at IS NULL THEN {c} ELSE excluded.{c} END"
+            for field in FIELDS for c in (field, f"{field}_at")
+        ]
+        sql = (
+            f"INSERT INTO address_metadata ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(address) DO UPDATE SET {', '.join(updates)}"
+        )
+        params = []
+        for record in records:
+            address = (record.get("address") or "").lower()
+            if not address:
+                continue
+            values = [address]
+            for field in FIELDS:
+                if field in record:
+                    value = record[field]
+                    values += [int(value) if isinstance(value, bool) else value, fetched_at]
+                else:
+                    values += [None, None]
+            params.append(values)
+        if params:
+            with self._lock:
+                self._db.executemany(sql, params)
+                self._db.commit()
+        return len(params)
+
+    def _rows(self, addresses: List[str]) -> Iterator[sqlite3.Row]:
+        for i in range(0, len(addresses), LOOKUP_CHUNK):
+            chunk = addresses[i:i + LOOKUP_CHUNK]
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT * FROM address_metadata WHERE address IN ({', '.join('?' for _ in chunk)})", chunk
+                ).fetchall()
+            yield from rows
+
+    def get_many(self, addresses: Iterable[str]) -> Dict[str, Dict]:
+        """Stored metadata per address (fresh or not); addresses never seen are absent."""
+        found = {}
+        for row in self._rows(list({a.lower(): None for a in addresses})):
+            record = {"address": row["address"]}
+            for field in FIELDS:
+                if row[f"{field}_at"] is not None:
+                    value = row[field]
+                    record[field] = bool(value) if field in ("is_contract", "is_verified") else value
+            found[row["address"]] = record
+        return found
+
+    def stale(self, addresses: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Addresses with any field missing or older than its TTL, in input order."""
+        now = time.time() if now is None else now
+        wanted = list({a.lower(): None for a in addresses})
+        fresh = set()
+        for row in self._rows(wanted):
+            if all(row[f"{field}_at"] is not None and now - row[f"{field}_at"] < self.ttls[field]
+                   for field in FIELDS):
+                fresh.add(row["address"])
+        return [address for address in wanted if address not in fresh]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM address_metadata").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AddressEnricher:
+    """Fetches Blockscout metadata for the stale addresses among a set, into the cache."""
+
+    def __init__(self, cache: AddressMetadataCache, workers: int = ENRICH_WORKERS):
+        self.cache = cache
+        self.workers = workers
+        self.session = RateLimitedSession()
+        self.session.headers.update({"Accept": "application/json"})
+        # The metadata cache already decides what is fresh; no HTTP cache on top
+        self.http = HttpClient(self.session, use_cache=False)
+
+    def fetch(self, address: str) -> Optional[Dict]:
+        """
+        Metadata for one address; None if Blockscout doesn't know it (404).
+        Any other failure raises, so it is counted as failed and not cached.
+        """
+        try:
+            info = self.http.get_json(f"{BLOCKSCOUT_API}/addresses/{address}")
+        except PermanentRequestError as e:
+            if e.status == 404:
+                return None
+            raise
+        if not info:
+            return None
+        return address_metadata({"hash": address, **info})
+
+    def enrich(self, addresses: Iterable[str], max_fetch: Optional[int] = None) -> Dict[str, int]:
+        """Fetch the missing or stale addresses (at most max_fetch); returns counts for the summary."""
+        addresses = [a.lower() for a in addresses if is_evm_address(a)]
+        stale = self.cache.stale(addresses)
+        todo = stale[:max_fetch] if max_fetch is not None else stale
+        counts = {"addresses": len(set(addresses)), "fresh": len(set(addresses)) - len(stale),
+                  "fetched": 0, "unknown": 0, "failed": 0, "deferred": len(stale) - len(todo)}
+        if not todo:
+            return counts
+
+        print(f"  Fetching metadata for {len(todo)} addresses...")
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="enrich")
+        batch = []
+        try:
+            futures = {pool.submit(self.fetch, address): address for address in todo}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except ErrorBudgetExceeded as e:
+                    print(f"  ⚠ Stopping early, the rest is left for the next run: {e}")
+                    break
+                except RequestFailed as e:
+                    counts["failed"] += 1
+                    print(f"  ⚠ {futures[future]}: {e}")
+                    continue
+                if record is None:
+                    # Nothing on chain yet: cache the empty metadata so it ages out like the rest
+                    counts["unknown"] += 1
+                    record = address_metadata({"hash": futures[future]})
+                else:
+                    counts["fetched"] += 1
+                batch.append(record)
+                if len(batch) >= LOOKUP_CHUNK:
+                    self.cache.put_many(batch)
+                    batch = []
+            self.cache.put_many(batch)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return counts
+
+
+def entity_addresses(store: EntityStore, tables: Iterable[str] = ENRICH_TABLES) -> Iterator[str]:
+    for table in tables:
+        for rows in store.iter_rows(table):
+            for row in rows:
+                if row.get("address"):
+                    yield row["address"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the address metadata cache for addresses from every source")
+    parser.add_argument("--cache", default=DEFAULT_METADATA_PATH, help="SQLite address metadata cache")
+    parser.add_argument("--entity-store", default=DEFAULT_ENTITY_STORE_PATH,
+                        help="Entity store whose Galxe / Cookie.fun addresses are enriched")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH,
+                        help="Transfer store whose counterparties are enriched")
+    parser.add_argument("--token", default=COOKIE_TOKEN_ADDRESS, help="Token whose transfer counterparties are enriched")
+    parser.add_argument("--max-fetch", type=int, help="Fetch at most this many addresses per run")
+    parser.add_argument("--workers", type=int, default=ENRICH_WORKERS, help="Parallel Blockscout requests")
+    add_output_arguments(parser, "address_metadata.xlsx")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Address Metadata Enrichment (Blockscout)")
+    print("=" * 60)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+
+    addresses: Dict[str, None] = {}
+    if os.path.exists(args.entity_store):
+        with EntityStore(args.entity_store) as store:
+            addresses.update(dict.fromkeys(a for a in entity_addresses(store) if is_evm_address(a)))
+        print(f"📊 {len(addresses)} addresses from {args.entity_store}")
+    if os.path.exists(args.store):
+        store = TransferStore(args.store)
+        before = len(addresses)
+        addresses.update(dict.fromkeys(a for a in store.unique_addresses(args.token) if is_evm_address(a)))
+        store.close()
+        print(f"📊 {len(addresses) - before} more transfer counterparties from {args.store}")
+    if not addresses:
+        print("\n❌ No addresses to enrich. Run the scrapers first.")
+        return
+
+    with AddressMetadataCache(args.cache) as cache:
+        counts = AddressEnricher(cache, args.workers).enrich(addresses, args.max_fetch)
+        print(f"\n✅ {counts['addresses']} addresses: {counts['fresh']} already fresh, {counts['fetched']} fetched")
+        if counts["unknown"] or counts["failed"] or counts["deferred"]:
+            print(f"   Unknown to Blockscout: {counts['unknown']}, failed: {counts['failed']}, "
+                  f"left for the next run: {counts['deferred']}")
+        rows = list(cache.get_many(addresses).values())
+
+    if rows:
+        export_results(rows, args.output, args.format)
+    print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    main()
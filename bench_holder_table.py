@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory of a holder snapshot as dicts, as a DataFrame and as a HolderTable.
+
+Each representation is built in its own process from the same synthetic
+Blockscout-shaped holders, so retained memory (tracemalloc, or pandas' own
+deep memory usage for the DataFrame) and peak RSS are measured in isolation.
+
+Usage:
+    python bench_holder_table.py [--holders 1000000]
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import time
+import tracemalloc
+
+import pandas as pd
+
+from holder_table import HolderTable
+
+PAGE_ROWS = 50  # Blockscout's holder page size
+
+
+def make_pages(n: int):
+    rng = random.Random(42)
+    for start in range(0, n, PAGE_ROWS):
+        page = []
+        for i in range(start, min(start + PAGE_ROWS, n)):
+            raw = rng.getrandbits(80)
+            page.append({
+                "onchain_address": "0x%040x" % rng.getrandbits(160),
+                "balance": raw / 10 ** 18,
+                "balance_raw": str(raw),
+                "is_contract": rng.random() < 0.1,
+                "is_verified": False,
+                "contract_name": "",
+                "tags": "exchange" if i % 50 == 0 else "",
+                "ens_domain": "",
+                "source": "blockscout.com",
+            })
+        yield page
+
+
+def build_dicts(n: int):
+    holders = []
+    for page in make_pages(n):
+        holders.extend(page)
+    return holders
+
+
+def build_frame(n: int):
+    # What the scrapers did before: collect dicts, then hand them to pandas
+    return pd.DataFrame(build_dicts(n))
+
+
+def build_table(n: int):
+    return HolderTable.from_pages(make_pages(n))
+
+
+def snapshot_bytes(snapshot, traced: int) -> int:
+    # pandas' Arrow-backed string columns are allocated outside tracemalloc's view
+    if isinstance(snapshot, pd.DataFrame):
+        return max(traced, int(snapshot.memory_usage(deep=True).sum()))
+    return traced
+
+
+def run(name: str, n: int, results):
+    builder = {"dicts": build_dicts, "dataframe": build_frame, "holder_table": build_table}[name]
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshot = builder(n)
+    elapsed = time.perf_counter() - start
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = snapshot_bytes(snapshot, traced)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results[name] = (elapsed, retained, peak_kb)
+    del snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark holder snapshot memory")
+    parser.add_argument("--holders", type=int, default=1000000)
+    parser.add_argument("--only", choices=["dicts", "dataframe", "holder_table"])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Manager().dict()
+    for name in [args.only] if args.only else ["dicts", "dataframe", "holder_table"]:
+        proc = ctx.Process(target=run, args=(name, args.holders, results))
+        proc.start()
+        proc.join()
+
+    print(f"{'snapshot':<13} {'seconds':>8} {'retained':>10} {'bytes/holder':>13} {'peak RSS':>10}")
+    for name, (elapsed, retained, peak_kb) in results.items():
+        print(f"{name:<13} {elapsed:>8.2f} {retained / 1024 / 1024:>8.0f}MB "
+              f"{retained / args.holders:>13,.0f} {peak_kb / 1024:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,21 +6,23 @@ Scrapes user data from Cookie.fun using Playwright browser automation.
 Extracts: username, user ID, onchain address, score/points.
 
 Usage:
-    python cookie3_playwright_scraper.py
+    python cookie3_playwright_scraper.py [--output users.parquet | --format csv]
 """
 
+import argparse
 import json
 import time
 import re
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
+from entity_store import add_store_arguments, save_to_entity_store
+from excel_export import export_rows, unique_by
+from field_mapping import AGENT_FIELDS, has_identity, normalize_records
+from scraper_stream import add_output_arguments, export_results
+
 
 class CookieFunPlaywrightScraper:
     """Playwright-based scraper for Cookie.fun."""
@@ -174,41 +176,17 @@ class CookieFunPlaywrightScraper:
                 elif isinstance(resp_data, list):
                     items = resp_data
                 
-                for item in items:
-                    if isinstance(item, dict):
-                        entry = self._parse_item(item)
-                        if entry.get("username") or entry.get("onchain_address"):
-                            data.append(entry)
-                            
+                data.extend(self._parse_items(items))
+                
             except Exception as e:
                 print(f"  Error parsing response: {e}")
         
         print(f"  ✓ Extracted {len(data)} items from API responses")
         return data
     
-    def _parse_item(self, item: dict) -> dict:
-        """Parse an individual item from API response."""
-        # Extract contract address from various possible locations
-        address = ""
-        if "contracts" in item and isinstance(item["contracts"], list) and item["contracts"]:
-            address = item["contracts"][0].get("contractAddress", "")
-        if not address:
-            address = item.get("walletAddress", item.get("address", item.get("contractAddress", "")))
-        
-        return {
-            "username": item.get("twitterUsername", item.get("twitter", item.get("username", item.get("name", "")))),
-            "user_id": item.get("agentId", item.get("id", item.get("userId", ""))),
-            "display_name": item.get("name", item.get("displayName", "")),
-            "onchain_address": address,
-            "mindshare_score": item.get("mindshare", item.get("score", 0)),
-            "followers": item.get("followersCount", item.get("followers", 0)),
-            "market_cap": item.get("marketCap", 0),
-            "volume_24h": item.get("volume24Hours", item.get("volume24h", 0)),
-            "price_usd": item.get("priceUsd", item.get("price", 0)),
-            "chain": item.get("chain", ""),
-            "category": item.get("category", "agent"),
-            "source": "cookie.fun"
-        }
+    def _parse_items(self, items: list) -> list:
+        """Map a batch of API items onto agent rows, dropping those without a username, user id or address."""
+        return has_identity(normalize_records(items, AGENT_FIELDS, source="cookie.fun"))
     
     def extract_from_nextjs_data(self):
         """Extract from Next.js embedded data."""
@@ -230,10 +208,7 @@ class CookieFunPlaywrightScraper:
                 
                 for key in ["agents", "data", "items", "initialData"]:
                     if key in props and isinstance(props[key], list):
-                        for item in props[key]:
-                            entry = self._parse_item(item)
-                            if entry.get("username") or entry.get("onchain_address"):
-                                data.append(entry)
+                        data.extend(self._parse_items(props[key]))
                 
                 print(f"  ✓ Extracted {len(data)} items from Next.js data")
         except Exception as e:
@@ -322,47 +297,17 @@ def export_to_excel(data: list, filename: str = "cookie3_users.xlsx"):
         print("No data to export!")
         return
     
-    # Convert to DataFrame and clean up
-    df = pd.DataFrame(data)
-    
     # Remove duplicates
-    if "username" in df.columns:
-        df = df.drop_duplicates(subset=["username"], keep="first")
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cookie3 Users"
-    
-    # Style headers
-    header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    for col_idx, column in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_idx, value=column.replace("_", " ").title())
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Write data
-    for row_idx, row in enumerate(df.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            if isinstance(value, (list, dict)):
-                cell.value = str(value)
-            else:
-                cell.value = value if value else ""
-    
-    # Auto column width
-    for col_idx in range(1, len(df.columns) + 1):
-        ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = 25
-    
-    ws.freeze_panes = "A2"
-    wb.save(filename)
-    print(f"\n✅ Exported {len(df)} unique records to {filename}")
+    count = export_rows(filename, unique_by(data, "username"), "Cookie3 Users", default_width=25)
+    print(f"\n✅ Exported {count} unique records to {filename}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape Cookie.fun data with Playwright")
+    add_output_arguments(parser, "cookie3_users.xlsx")
+    add_store_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Cookie.fun Playwright Scraper")
     print("=" * 60)
@@ -409,7 +354,8 @@ def main():
     print("=" * 60)
     
     if all_data:
-        export_to_excel(all_data, "cookie3_users.xlsx")
+        save_to_entity_store(args, "agents", all_data)
+        export_results(all_data, args.output, args.format, excel=export_to_excel)
         print(f"\n📈 Summary: {len(all_data)} total items collected")
     else:
         print("\n⚠️ No data collected. Check screenshots for page state.")
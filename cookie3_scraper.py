@@ -9,20 +9,24 @@ Scrapes user data from Cookie.fun platform including:
 - Score/Points (Snaps, mindshare)
 
 Usage:
-    python cookie3_scraper.py [--api-key YOUR_API_KEY]
+    python cookie3_scraper.py [--api-key YOUR_API_KEY] [--concurrency 8] [--output users.parquet | --format arrow]
 """
 
 import argparse
-import json
-import time
+import asyncio
 from datetime import datetime
 from typing import Optional
 
-import pandas as pd
-import requests
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
+import aiohttp
+
+from entity_store import add_store_arguments, open_entity_store
+from excel_export import export_rows
+from field_mapping import AGENT_FIELDS, CREATOR_FIELDS, LEADERBOARD_FIELDS, normalize_records
+from identity_resolver import resolve
+from scraper_cache import get_http_cache
+from scraper_http import HttpClient, PermanentRequestError, RequestFailed, request_json_async
+from scraper_ratelimit import RateLimitedSession
+from scraper_stream import add_output_arguments, export_results
 
 
 class Cookie3Scraper:
@@ -31,10 +35,10 @@ class Cookie3Scraper:
     BASE_URL = "https://api.cookie.fun"
     API_VERSION = "v2"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, use_cache: bool = True):
         """Initialize scraper with optional API key."""
         self.api_key = api_key
-        self.session = requests.Session()
+        self.session = RateLimitedSession()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
             "Accept": "application/json",
@@ -42,23 +46,21 @@ class Cookie3Scraper:
         })
         if api_key:
             self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self.http = HttpClient(self.session, use_cache=use_cache)
     
     def _make_request(self, endpoint: str, params: dict = None) -> dict:
-        """Make API request with error handling."""
+        """
+        Make API request with error handling.
+        
+        Permanent errors (e.g. 401 without an API key) return {}; transient
+        errors that outlast the retries raise RequestFailed.
+        """
         url = f"{self.BASE_URL}/{self.API_VERSION}/{endpoint}"
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
+            return self.http.get_json(url, params=params)
+        except PermanentRequestError as e:
             print(f"HTTP Error for {endpoint}: {e}")
             return {}
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed for {endpoint}: {e}")
-            return {}
-        except json.JSONDecodeError:
-            print(f"Invalid JSON response from {endpoint}")
-            return {}
     
     def get_agents(self, page: int = 1, limit: int = 100) -> list:
         """Get AI agents with mindshare scores."""
@@ -73,13 +75,16 @@ class Cookie3Scraper:
         page = 1
         
         while page <= max_pages:
-            agents = self.get_agents(page=page)
+            try:
+                agents = self.get_agents(page=page)
+            except RequestFailed as e:
+                print(f"  ⚠ Stopped at page {page}, results are incomplete: {e}")
+                break
             if not agents:
                 break
             all_agents.extend(agents)
             print(f"  Retrieved {len(agents)} agents (total: {len(all_agents)})")
             page += 1
-            time.sleep(0.5)  # Rate limiting
         
         return all_agents
     
@@ -104,42 +109,173 @@ class Cookie3Scraper:
         return data.get("data", []) if data else []
 
 
+class AsyncCookie3Scraper:
+    """
+    asyncio client for Cookie.fun with a pooled session and bounded concurrency.
+
+    Page-numbered endpoints are fetched in parallel (up to `concurrency`
+    requests in flight), results are returned in page order and pagination
+    stops at the first empty page.
+
+    Usage:
+        async with AsyncCookie3Scraper(api_key) as scraper:
+            data = await scraper.fetch_all(max_pages=50)
+    """
+    
+    BASE_URL = Cookie3Scraper.BASE_URL
+    API_VERSION = Cookie3Scraper.API_VERSION
+    
+    def __init__(self, api_key: Optional[str] = None, concurrency: int = 8, use_cache: bool = True):
+        self.api_key = api_key
+        self.concurrency = max(concurrency, 1)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.cache = get_http_cache() if use_cache else None
+    
+    async def __aenter__(self):
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        # One keep-alive pool shared by every endpoint, sized to the concurrency
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(
+            headers=headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+    
+    async def _make_request(self, endpoint: str, params: dict = None) -> dict:
+        """
+        Make API request with error handling.
+        
+        Permanent errors return {}; transient errors that outlast the
+        retries raise RequestFailed.
+        """
+        url = f"{self.BASE_URL}/{self.API_VERSION}/{endpoint}"
+        try:
+            return await request_json_async(self.session, "GET", url, params=params, cache=self.cache)
+        except PermanentRequestError as e:
+            print(f"HTTP Error for {endpoint}: {e}")
+            return {}
+    
+    async def fetch_paged(self, endpoint: str, page_params, extract, max_pages: int = 50) -> list:
+        """
+        Fetch pages 1..max_pages of a page-numbered endpoint concurrently.
+        
+        page_params(page) returns the query params for a page and extract(data)
+        pulls the item list out of a response. Pages after the first empty one
+        are cancelled or discarded, so the result matches sequential paging.
+        A page that fails after all retries ends the result at that page, with
+        a warning, instead of being mistaken for the end of the data.
+        """
+        pages = {}
+        first_empty = max_pages + 1
+        next_page = 1
+        in_flight = {}
+        
+        async def fetch(page: int):
+            data = await self._make_request(endpoint, page_params(page))
+            return extract(data) if data else []
+        
+        while in_flight or (next_page <= max_pages and next_page < first_empty):
+            while len(in_flight) < self.concurrency and next_page <= max_pages and next_page < first_empty:
+                in_flight[asyncio.create_task(fetch(next_page))] = next_page
+                next_page += 1
+            
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page = in_flight.pop(task)
+                try:
+                    items = task.result()
+                except RequestFailed as e:
+                    print(f"  ⚠ {endpoint} page {page} failed, results are incomplete: {e}")
+                    items = []
+                if items:
+                    pages[page] = items
+                    print(f"  {endpoint} page {page}: {len(items)} items")
+                else:
+                    first_empty = min(first_empty, page)
+            
+            # Pages past the end of the data are not needed
+            for task, page in list(in_flight.items()):
+                if page > first_empty:
+                    task.cancel()
+                    del in_flight[task]
+        
+        return [item for page in sorted(pages) if page < first_empty for item in pages[page]]
+    
+    async def get_all_agents(self, max_pages: int = 50, limit: int = 100) -> list:
+        """Fetch all AI agents with mindshare scores."""
+        return await self.fetch_paged(
+            "agents/agentsPaged",
+            lambda page: {"page": page, "pageSize": limit, "interval": "_7Days"},
+            lambda data: data.get("ok", {}).get("data", []),
+            max_pages,
+        )
+    
+    async def get_all_creators(self, max_pages: int = 50, limit: int = 100) -> list:
+        """Fetch all creators/KOLs with Snaps points."""
+        return await self.fetch_paged(
+            "creators",
+            lambda page: {"page": page, "limit": limit},
+            lambda data: data.get("data", []),
+            max_pages,
+        )
+    
+    async def get_all_influencers(self, max_pages: int = 50, limit: int = 100) -> list:
+        """Fetch all influencers with engagement scores."""
+        return await self.fetch_paged(
+            "influencers",
+            lambda page: {"page": page, "limit": limit},
+            lambda data: data.get("data", []),
+            max_pages,
+        )
+    
+    async def get_leaderboard(self) -> list:
+        """Get leaderboard data."""
+        try:
+            data = await self._make_request("leaderboard")
+        except RequestFailed as e:
+            print(f"  ⚠ leaderboard failed: {e}")
+            return []
+        return data.get("data", []) if data else []
+    
+    async def fetch_all(self, max_pages: int = 50) -> dict:
+        """Fetch agents, creators, influencers and the leaderboard in one run."""
+        agents, creators, influencers, leaderboard = await asyncio.gather(
+            self.get_all_agents(max_pages),
+            self.get_all_creators(max_pages),
+            self.get_all_influencers(max_pages),
+            self.get_leaderboard(),
+        )
+        return {
+            "agents": agents,
+            "creators": creators,
+            "influencers": influencers,
+            "leaderboard": leaderboard,
+        }
+
+
 def normalize_agent_data(agents: list) -> list:
     """Normalize agent data to standard format."""
-    normalized = []
-    for agent in agents:
-        normalized.append({
-            "username": agent.get("twitterUsername", agent.get("name", "")),
-            "user_id": agent.get("agentId", agent.get("id", "")),
-            "display_name": agent.get("name", ""),
-            "onchain_address": agent.get("contracts", [{}])[0].get("contractAddress", "") if agent.get("contracts") else "",
-            "mindshare_score": agent.get("mindshare", 0),
-            "followers": agent.get("followersCount", 0),
-            "market_cap": agent.get("marketCap", 0),
-            "volume_24h": agent.get("volume24Hours", 0),
-            "category": agent.get("category", "agent"),
-            "source": "cookie.fun/agents",
-        })
-    return normalized
+    return normalize_records(agents, AGENT_FIELDS, source="cookie.fun/agents")
 
 
-def normalize_creator_data(creators: list) -> list:
-    """Normalize creator data to standard format."""
-    normalized = []
-    for creator in creators:
-        normalized.append({
-            "username": creator.get("twitterHandle", creator.get("username", "")),
-            "user_id": creator.get("userId", creator.get("id", "")),
-            "display_name": creator.get("displayName", creator.get("name", "")),
-            "onchain_address": creator.get("walletAddress", creator.get("address", "")),
-            "snaps_points": creator.get("snapsPoints", creator.get("points", 0)),
-            "engagement_score": creator.get("engagementScore", 0),
-            "followers": creator.get("followers", 0),
-            "rank": creator.get("rank", 0),
-            "category": "creator",
-            "source": "cookie.fun/creators",
-        })
-    return normalized
+def normalize_creator_data(creators: list, category: str = "creator", source: str = "cookie.fun/creators") -> list:
+    """Normalize creator (or influencer) data to standard format."""
+    return normalize_records(creators, CREATOR_FIELDS, category=category, source=source)
+
+
+def normalize_leaderboard_data(entries: list) -> list:
+    """Normalize leaderboard entries to standard format."""
+    return normalize_records(entries, LEADERBOARD_FIELDS, category="leaderboard", source="cookie.fun/leaderboard")
 
 
 def export_to_excel(data: list, filename: str = "cookie3_users.xlsx"):
@@ -148,9 +284,6 @@ def export_to_excel(data: list, filename: str = "cookie3_users.xlsx"):
         print("No data to export!")
         return
     
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
     # Reorder columns for clarity
     column_order = [
         "username", "display_name", "user_id", "onchain_address",
@@ -158,54 +291,22 @@ def export_to_excel(data: list, filename: str = "cookie3_users.xlsx"):
         "followers", "market_cap", "volume_24h", "rank", "category", "source"
     ]
     # Only include columns that exist
-    ordered_cols = [c for c in column_order if c in df.columns]
-    remaining_cols = [c for c in df.columns if c not in ordered_cols]
-    df = df[ordered_cols + remaining_cols]
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cookie3 Users"
-    
-    # Header styling
-    header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    # Write headers
-    for col_idx, column in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_idx, value=column.replace("_", " ").title())
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Write data
-    for row_idx, row in enumerate(df.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.alignment = Alignment(horizontal="left")
-    
-    # Auto-adjust column widths
-    for col_idx, column in enumerate(df.columns, 1):
-        max_length = max(
-            len(str(column)),
-            max(len(str(val)) for val in df[column].astype(str)) if len(df) > 0 else 0
-        )
-        ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = min(max_length + 2, 50)
-    
-    # Freeze header row
-    ws.freeze_panes = "A2"
+    keys = list(dict.fromkeys(key for record in data for key in record))
+    columns = [c for c in column_order if c in keys] + [c for c in keys if c not in column_order]
     
-    # Save
-    wb.save(filename)
-    print(f"\n✅ Exported {len(data)} records to {filename}")
+    count = export_rows(filename, data, "Cookie3 Users", columns)
+    print(f"\n✅ Exported {count} records to {filename}")
 
 
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Scrape Cookie3/Cookie.fun user data")
     parser.add_argument("--api-key", help="Cookie.fun API key for authenticated access")
-    parser.add_argument("--output", default="cookie3_users.xlsx", help="Output Excel filename")
+    add_output_arguments(parser, "cookie3_users.xlsx")
     parser.add_argument("--max-pages", type=int, default=50, help="Maximum pages to fetch per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent API requests")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP response cache")
+    add_store_arguments(parser)
     args = parser.parse_args()
     
     print("=" * 60)
@@ -215,48 +316,39 @@ def main():
     print(f"API Key: {'Provided' if args.api_key else 'Not provided (using public access)'}")
     print()
     
-    scraper = Cookie3Scraper(api_key=args.api_key)
-    all_data = []
+    print(f"📊 Fetching agents, creators, influencers and leaderboard ({args.concurrency} concurrent requests)...")
     
-    # Fetch agents
-    print("\n📊 Fetching AI Agents...")
-    agents = scraper.get_all_agents(max_pages=args.max_pages)
-    if agents:
-        normalized_agents = normalize_agent_data(agents)
-        all_data.extend(normalized_agents)
-        print(f"  ✓ Found {len(normalized_agents)} agents")
-    else:
-        print("  ⚠ No agents found (API key may be required)")
+    async def fetch():
+        async with AsyncCookie3Scraper(api_key=args.api_key, concurrency=args.concurrency,
+                                       use_cache=not args.no_cache) as scraper:
+            return await scraper.fetch_all(max_pages=args.max_pages)
     
-    # Fetch creators
-    print("\n👥 Fetching Creators/KOLs...")
-    creators = scraper.get_creators()
-    if creators:
-        normalized_creators = normalize_creator_data(creators)
-        all_data.extend(normalized_creators)
-        print(f"  ✓ Found {len(normalized_creators)} creators")
-    else:
-        print("  ⚠ No creators found (API key may be required)")
+    results = asyncio.run(fetch())
+    all_data = []
+    store = open_entity_store(args)
     
-    # Fetch leaderboard
-    print("\n🏆 Fetching Leaderboard...")
-    leaderboard = scraper.get_leaderboard()
-    if leaderboard:
-        # Normalize leaderboard entries
-        for entry in leaderboard:
-            all_data.append({
-                "username": entry.get("username", entry.get("twitterHandle", "")),
-                "user_id": entry.get("userId", entry.get("id", "")),
-                "display_name": entry.get("displayName", ""),
-                "onchain_address": entry.get("walletAddress", ""),
-                "snaps_points": entry.get("points", 0),
-                "rank": entry.get("rank", 0),
-                "category": "leaderboard",
-                "source": "cookie.fun/leaderboard",
-            })
-        print(f"  ✓ Found {len(leaderboard)} leaderboard entries")
-    else:
-        print("  ⚠ No leaderboard data found")
+    # (label, fetch_all key, normalizer, entity store table)
+    sections = [
+        ("AI Agents", "agents", normalize_agent_data, "agents"),
+        ("Creators/KOLs", "creators", normalize_creator_data, "accounts"),
+        ("Influencers", "influencers",
+         lambda items: normalize_creator_data(items, category="influencer", source="cookie.fun/influencers"),
+         "accounts"),
+        ("Leaderboard entries", "leaderboard", normalize_leaderboard_data, "leaderboard_entries"),
+    ]
+    for label, key, normalize, table in sections:
+        items = results[key]
+        if items:
+            normalized = normalize(items)
+            all_data.extend(normalized)
+            print(f"  ✓ Found {len(normalized)} {label}")
+            if store:
+                store.save(table, normalized)
+        else:
+            print(f"  ⚠ No {label} found (API key may be required)")
+    
+    if store:
+        store.close()
     
     # Export results
     print("\n" + "=" * 60)
@@ -264,16 +356,15 @@ def main():
     print("=" * 60)
     
     if all_data:
-        # Remove duplicates based on username
-        df = pd.DataFrame(all_data)
-        df = df.drop_duplicates(subset=["username"], keep="first")
-        unique_data = df.to_dict("records")
+        # Merge records of the same entity (shared address, handle or user id)
+        unique_data = resolve(all_data)
         
-        export_to_excel(unique_data, args.output)
+        output = export_results(unique_data, args.output, args.format, excel=export_to_excel)
         
         print(f"\n📈 Summary:")
+        print(f"   Total records: {len(all_data)}")
         print(f"   Total unique users: {len(unique_data)}")
-        print(f"   Output file: {args.output}")
+        print(f"   Output file: {output}")
     else:
         print("\n❌ No data collected. Please provide an API key or check connectivity.")
         print("\nTo get an API key:")
@@ -6,17 +6,20 @@ Scrapes user data from Cookie.fun using browser automation to bypass Cloudflare
 Extracts: username, user ID, onchain address, score/points.
 
 Usage:
-    python cookie3_selenium_scraper.py
+    python cookie3_selenium_scraper.py [--output users.parquet | --format csv]
 """
 
+import argparse
 import json
 import time
 from datetime import datetime
 from typing import Optional
 
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from entity_store import add_store_arguments, save_to_entity_store
+from excel_export import export_rows
+from field_mapping import AGENT_FIELDS, normalize_records
+from identity_resolver import resolve
+from scraper_stream import add_output_arguments, export_results
 
 try:
     import undetected_chromedriver as uc
@@ -183,28 +186,11 @@ class CookieFunSeleniumScraper:
                 if key in page_props:
                     items = page_props[key]
                     if isinstance(items, list):
-                        for item in items:
-                            agents.append({
-                                'username': item.get('twitterUsername', item.get('name', item.get('username', ''))),
-                                'user_id': item.get('id', item.get('agentId', '')),
-                                'display_name': item.get('name', item.get('displayName', '')),
-                                'onchain_address': self._extract_address(item),
-                                'mindshare_score': item.get('mindshare', item.get('score', 0)),
-                                'followers': item.get('followersCount', item.get('followers', 0)),
-                                'market_cap': item.get('marketCap', 0),
-                                'category': 'agent',
-                                'source': 'cookie.fun/agents'
-                            })
+                        agents.extend(normalize_records(items, AGENT_FIELDS, source='cookie.fun/agents'))
         except Exception as e:
             print(f"  Error parsing Next.js data: {e}")
         return agents
     
-    def _extract_address(self, item: dict) -> str:
-        """Extract wallet/contract address from item."""
-        if 'contracts' in item and item['contracts']:
-            return item['contracts'][0].get('contractAddress', '')
-        return item.get('walletAddress', item.get('address', item.get('contractAddress', '')))
-    
     def scrape_visible_table_data(self):
         """Scrape any visible table data on the page."""
         print("📋 Scraping visible table data...")
@@ -298,38 +284,16 @@ def export_to_excel(data: list, filename: str = "cookie3_users.xlsx"):
         print("No data to export!")
         return
     
-    df = pd.DataFrame(data)
-    
-    # Create workbook with styling
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cookie3 Users"
-    
-    header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    # Write headers
-    for col_idx, column in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_idx, value=column.replace("_", " ").title())
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Write data
-    for row_idx, row in enumerate(df.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            ws.cell(row=row_idx, column=col_idx, value=str(value) if value else "")
-    
-    # Auto-width columns
-    for col_idx, column in enumerate(df.columns, 1):
-        ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = 20
-    
-    ws.freeze_panes = "A2"
-    wb.save(filename)
-    print(f"\n✅ Exported {len(data)} records to {filename}")
+    count = export_rows(filename, data, "Cookie3 Users", default_width=20)
+    print(f"\n✅ Exported {count} records to {filename}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape Cookie.fun data with Selenium")
+    add_output_arguments(parser, "cookie3_users.xlsx")
+    add_store_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Cookie.fun Selenium Scraper (Cloudflare Bypass)")
     print("=" * 60)
@@ -381,13 +345,12 @@ def main():
     print("=" * 60)
     
     if all_data:
-        # Remove duplicates
-        df = pd.DataFrame(all_data)
-        if 'username' in df.columns:
-            df = df.drop_duplicates(subset=['username'], keep='first')
-        unique_data = df.to_dict('records')
+        save_to_entity_store(args, "agents", all_data)
+        
+        # Merge records of the same entity (shared address, handle or user id)
+        unique_data = resolve(all_data)
         
-        export_to_excel(unique_data, "cookie3_users.xlsx")
+        export_results(unique_data, args.output, args.format, excel=export_to_excel)
         
         print(f"\n📈 Summary:")
         print(f"   Total records: {len(unique_data)}")
@@ -6,34 +6,60 @@ Scrapes COOKIE token holder data from Base Blockscout - NO API KEY REQUIRED!
 Token Address: 0xc0041ef357b183448b235a8ea73ce4e4ec8c265f (on Base chain)
 
 Usage:
-    python cookie_blockscout_scraper.py
+    python cookie_blockscout_scraper.py [--no-cache] [--resume] [--output holders.parquet | --format arrow]
+                                        [--snapshot snapshots/cookie_holders.npz [--deltas holder_deltas.jsonl]]
+                                        [--summary cookie_holder_summary.json]
+
+The default output is an Excel report with a summary sheet. Any other format
+(.parquet, .arrow, .csv, .jsonl) is streamed to the file page by page instead
+of being collected in memory first. --snapshot also saves the holders as a
+compact HolderTable (.npz); with --deltas, the holders that are new, removed
+or changed since the snapshot it replaces are written there as well.
+--summary writes the concentration analytics (holder_analytics.py) as JSON.
+None of these three are written when the crawl stops before the last page.
 """
 
+import argparse
 import json
-import time
+import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
+
+from openpyxl.styles import Font
 
-import requests
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from address_metadata import DEFAULT_METADATA_PATH, AddressMetadataCache, address_metadata
+from entity_store import EntityStore, add_store_arguments, open_entity_store
+from excel_export import ExcelColumn, Styled, StreamingExcelWriter
+from holder_analytics import concentration, summary_rows, write_summary
+from holder_table import HolderTable, HolderTableBuilder
+from scraper_checkpoint import CrawlCheckpoint
+from scraper_http import HttpClient, PermanentRequestError, RequestFailed
+from scraper_ratelimit import RateLimitedSession
+from scraper_stream import RowSink, add_output_arguments, open_sink, output_format, output_path, prefetch, write_rows
+from snapshot_diff import diff_holders
 
 
 # COOKIE Token on Base
 COOKIE_TOKEN_ADDRESS = "0xc0041ef357b183448b235a8ea73ce4e4ec8c265f"
 BLOCKSCOUT_API = "https://base.blockscout.com/api/v2"
 
+# Rows per page when replaying a checkpoint into the pipeline
+RESTORE_CHUNK_ROWS = 1000
+
 
 class CookieBlockscoutScraper:
     """Scraper for COOKIE token data via Blockscout API."""
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, use_cache: bool = True, metadata: Optional[AddressMetadataCache] = None):
+        self.metadata = metadata
+        # Set by iter_holder_pages: did the last crawl reach the end of the holder list?
+        self.crawl_complete = False
+        self.session = RateLimitedSession()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
             "Accept": "application/json"
         })
+        self.http = HttpClient(self.session, use_cache=use_cache)
     
     def get_token_info(self) -> Dict:
         """Get token metadata."""
@@ -41,15 +67,18 @@ class CookieBlockscoutScraper:
         url = f"{BLOCKSCOUT_API}/tokens/{COOKIE_TOKEN_ADDRESS}"
         
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
+            return self.http.get_json(url)
+        except RequestFailed as e:
             print(f"  Error: {e}")
             return {}
     
-    def get_holders(self, next_page_params: Optional[str] = None) -> Dict:
-        """Get token holders page."""
+    def get_holders(self, next_page_params: Optional[Dict] = None) -> Dict:
+        """
+        Get token holders page.
+        
+        Returns {} on permanent errors; raises RequestFailed when transient
+        errors outlast the retries, so callers don't mistake it for the end.
+        """
         url = f"{BLOCKSCOUT_API}/tokens/{COOKIE_TOKEN_ADDRESS}/holders"
         params = {}
         
@@ -58,54 +87,156 @@ class CookieBlockscoutScraper:
             params = next_page_params
         
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
+            return self.http.get_json(url, params=params)
+        except PermanentRequestError as e:
             print(f"  Error: {e}")
             return {}
     
-    def get_all_holders(self, max_pages: int = 100) -> List[Dict]:
-        """Fetch all token holders with pagination."""
+    def iter_holder_pages(
+        self,
+        max_pages: int = 100,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield parsed holders one page at a time.
+        
+        With a checkpoint, the cursor and the rows collected so far are saved
+        after every page; resume=True first yields the rows already saved, then
+        continues from the last saved cursor.
+        
+        crawl_complete is True afterwards only if the last page was reached;
+        a crawl cut short by errors or max_pages leaves it False.
+        """
         print("\n📋 Fetching all COOKIE token holders...")
+        self.crawl_complete = False
         
-        all_holders = []
         next_params = None
         page = 1
+        total = 0
+        
+        if checkpoint and resume and checkpoint.exists():
+            next_params, last_page = checkpoint.load()
+            total = checkpoint.rows
+            yield from checkpoint.iter_rows(RESTORE_CHUNK_ROWS)
+            if checkpoint.done:
+                print(f"  Checkpoint is complete: {total} holders, nothing to fetch")
+                self.crawl_complete = True
+                return
+            page = last_page + 1
+            print(f"  Resuming at page {page} with {total} holders from checkpoint")
+        elif checkpoint:
+            checkpoint.reset()
         
         while page <= max_pages:
             print(f"  Fetching page {page}...", end=" ")
             
-            data = self.get_holders(next_params)
+            try:
+                data = self.get_holders(next_params)
+            except RequestFailed as e:
+                print(f"\n  ⚠ Stopped at page {page}, results are incomplete: {e}")
+                if checkpoint:
+                    print("  Run again with --resume to continue from this page")
+                return
             
             if not data or "items" not in data:
                 print("No more data")
-                break
+                if checkpoint:
+                    checkpoint.mark_done()
+                self.crawl_complete = True
+                return
             
             items = data.get("items", [])
             if not items:
                 print("Empty page")
-                break
+                if checkpoint:
+                    checkpoint.mark_done()
+                self.crawl_complete = True
+                return
             
+            page_holders = []
             for item in items:
                 holder = self._parse_holder(item)
                 if holder:
-                    all_holders.append(holder)
+                    page_holders.append(holder)
+            total += len(page_holders)
+            
+            # Holder items embed address metadata; keep it so enrichment never refetches it
+            if self.metadata:
+                self.metadata.put_many(address_metadata(item.get("address") or {}) for item in items)
             
-            print(f"Got {len(items)} holders (total: {len(all_holders)})")
+            print(f"Got {len(items)} holders (total: {total})")
             
             # Check for next page
             next_page = data.get("next_page_params")
+            if checkpoint:
+                checkpoint.append_page(page_holders, next_page, page)
+            yield page_holders
             if not next_page:
                 print("  Reached last page")
-                break
+                if checkpoint:
+                    checkpoint.mark_done()
+                self.crawl_complete = True
+                return
             
             next_params = next_page
             page += 1
-            time.sleep(0.3)  # Rate limiting
         
+        print(f"  ⚠ Stopped at --max-pages {max_pages}, results are incomplete")
+    
+    def get_all_holders(
+        self,
+        max_pages: int = 100,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+    ) -> List[Dict]:
+        """Fetch all token holders with pagination."""
+        all_holders = []
+        for page_holders in prefetch(self.iter_holder_pages(max_pages, checkpoint, resume)):
+            all_holders.extend(page_holders)
         return all_holders
     
+    def stream_holders(
+        self,
+        sink: RowSink,
+        max_pages: int = 100,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+        store: Optional[EntityStore] = None,
+        snapshot: Optional[HolderTableBuilder] = None,
+    ) -> Dict:
+        """
+        Write holders to a sink page by page, fetching the next page while the
+        current one is written. Returns running totals for the summary, with
+        "complete" telling whether the whole holder list was crawled.
+        
+        With a store, each page is also upserted into its holders table; with
+        a snapshot builder, each page is added to it.
+        """
+        summary = {"holders": 0, "contracts": 0, "top": None, "complete": False}
+        for page_holders in prefetch(self.iter_holder_pages(max_pages, checkpoint, resume)):
+            sink.write(page_holders)
+            if store:
+                store.upsert("holders", page_holders, token=COOKIE_TOKEN_ADDRESS)
+            if snapshot:
+                snapshot.add(page_holders)
+            summary["holders"] += len(page_holders)
+            summary["contracts"] += sum(1 for h in page_holders if h["is_contract"])
+            for holder in page_holders:
+                if summary["top"] is None or holder["balance"] > summary["top"]["balance"]:
+                    summary["top"] = holder
+        summary["complete"] = self.crawl_complete
+        return summary
+    
+    def get_holder_table(
+        self,
+        max_pages: int = 100,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+    ) -> HolderTable:
+        """Fetch all token holders into a compact HolderTable instead of a list of dicts."""
+        return HolderTable.from_pages(prefetch(self.iter_holder_pages(max_pages, checkpoint, resume)))
+    
     def _parse_holder(self, item: Dict) -> Optional[Dict]:
         """Parse a holder item from API response."""
         try:
@@ -115,20 +246,18 @@ class CookieBlockscoutScraper:
             # Convert to decimal (18 decimals)
             balance = int(value_raw) / (10 ** 18)
             
-            # Extract metadata/tags
-            metadata = address_info.get("metadata", {}) or {}
-            tags = metadata.get("tags", [])
-            tag_names = [t.get("name", "") for t in tags if t.get("name")]
+            # Contract flags, name, tags and ENS, parsed like the metadata cache does
+            metadata = address_metadata(address_info)
             
             return {
                 "onchain_address": address_info.get("hash", ""),
                 "balance": balance,
                 "balance_raw": value_raw,
-                "is_contract": address_info.get("is_contract", False),
-                "is_verified": address_info.get("is_verified", False),
-                "contract_name": address_info.get("name", ""),
-                "tags": ", ".join(tag_names) if tag_names else "",
-                "ens_domain": address_info.get("ens_domain_name", ""),
+                "is_contract": metadata["is_contract"],
+                "is_verified": metadata["is_verified"],
+                "contract_name": metadata["name"],
+                "tags": metadata["tags"],
+                "ens_domain": metadata["ens_domain"],
                 "source": "blockscout.com"
             }
         except Exception as e:
@@ -140,103 +269,110 @@ class CookieBlockscoutScraper:
         params = next_page_params or {}
         
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
+            return self.http.get_json(url, params=params)
+        except PermanentRequestError as e:
             print(f"  Error: {e}")
             return {}
 
 
-def export_to_excel(data: list, token_info: dict, filename: str = "cookie3_users.xlsx"):
-    """Export to formatted Excel with summary sheet."""
+HOLDER_COLUMNS = [
+    ExcelColumn("onchain_address", "Wallet Address", width=45),
+    ExcelColumn("balance", "COOKIE Balance", width=20, number_format="#,##0.0000",
+                convert=lambda value: round(value, 4) if value else 0),
+    ExcelColumn("is_contract", "Is Contract", width=12, convert=lambda value: "Yes" if value else "No"),
+    ExcelColumn("contract_name", "Contract Name", width=30),
+    ExcelColumn("tags", "Tags", width=25),
+    ExcelColumn("ens_domain", "ENS Domain", width=25),
+]
+
+
+def export_to_excel(data: list, token_info: dict, filename: str = "cookie_holders.xlsx", analytics: Optional[Dict] = None):
+    """Export to formatted Excel with summary sheet (plus concentration figures, given analytics)."""
     if not data:
         print("No data to export!")
         return
     
-    df = pd.DataFrame(data)
-    
     # Sort by balance
-    df = df.sort_values("balance", ascending=False)
-    
-    # Create workbook
-    wb = Workbook()
+    data = sorted(data, key=lambda holder: holder["balance"], reverse=True)
     
-    # Summary sheet
-    ws_summary = wb.active
-    ws_summary.title = "Summary"
+    summary = [
+        [Styled("COOKIE Token Holder Report", Font(size=16, bold=True))],
+        [],
+        ["Token Name:", token_info.get("name", "COOKIE")],
+        ["Symbol:", token_info.get("symbol", "COOKIE")],
+        ["Contract:", COOKIE_TOKEN_ADDRESS],
+        ["Chain:", "Base"],
+        ["Total Holders:", len(data)],
+        ["Report Date:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+        [],
+        [Styled("Top 10 Holders", Font(bold=True))],
+    ]
+    for i, holder in enumerate(data[:10], start=1):
+        row = [f"{i}. {holder['onchain_address'][:20]}...", f"{holder['balance']:,.2f} COOKIE"]
+        if holder.get("tags"):
+            row.append(holder["tags"])
+        summary.append(row)
     
-    ws_summary["A1"] = "COOKIE Token Holder Report"
-    ws_summary["A1"].font = Font(size=16, bold=True)
+    if analytics:
+        summary += [[], [Styled("Concentration", Font(bold=True))]]
+        summary += summary_rows(analytics)
     
-    ws_summary["A3"] = "Token Name:"
-    ws_summary["B3"] = token_info.get("name", "COOKIE")
-    ws_summary["A4"] = "Symbol:"
-    ws_summary["B4"] = token_info.get("symbol", "COOKIE")
-    ws_summary["A5"] = "Contract:"
-    ws_summary["B5"] = COOKIE_TOKEN_ADDRESS
-    ws_summary["A6"] = "Chain:"
-    ws_summary["B6"] = "Base"
-    ws_summary["A7"] = "Total Holders:"
-    ws_summary["B7"] = len(df)
-    ws_summary["A8"] = "Report Date:"
-    ws_summary["B8"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Top 10 holders
-    ws_summary["A10"] = "Top 10 Holders"
-    ws_summary["A10"].font = Font(bold=True)
-    
-    for i, (_, row) in enumerate(df.head(10).iterrows(), start=11):
-        ws_summary[f"A{i}"] = f"{i-10}. {row['onchain_address'][:20]}..."
-        ws_summary[f"B{i}"] = f"{row['balance']:,.2f} COOKIE"
-        if row.get("tags"):
-            ws_summary[f"C{i}"] = row["tags"]
-    
-    # Holders sheet
-    ws_holders = wb.create_sheet("All Holders")
-    
-    header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    # Column order
-    columns = ["onchain_address", "balance", "is_contract", "contract_name", "tags", "ens_domain"]
-    display_names = ["Wallet Address", "COOKIE Balance", "Is Contract", "Contract Name", "Tags", "ENS Domain"]
-    
-    for col_idx, name in enumerate(display_names, 1):
-        cell = ws_holders.cell(row=1, column=col_idx, value=name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Write data
-    for row_idx, (_, row) in enumerate(df.iterrows(), 2):
-        for col_idx, col in enumerate(columns, 1):
-            value = row.get(col, "")
-            cell = ws_holders.cell(row=row_idx, column=col_idx)
-            
-            if col == "balance":
-                cell.value = round(value, 4) if value else 0
-                cell.number_format = "#,##0.0000"
-            elif isinstance(value, bool):
-                cell.value = "Yes" if value else "No"
-            else:
-                cell.value = str(value) if value else ""
-    
-    # Column widths
-    ws_holders.column_dimensions["A"].width = 45
-    ws_holders.column_dimensions["B"].width = 20
-    ws_holders.column_dimensions["C"].width = 12
-    ws_holders.column_dimensions["D"].width = 30
-    ws_holders.column_dimensions["E"].width = 25
-    ws_holders.column_dimensions["F"].width = 25
-    
-    ws_holders.freeze_panes = "A2"
+    with StreamingExcelWriter(filename) as writer:
+        writer.write_cells("Summary", summary)
+        count = writer.write_rows("All Holders", data, HOLDER_COLUMNS)
+    print(f"\n✅ Exported {count} holders to {filename}")
+
+
+def save_snapshot(table: HolderTable, path: str, deltas: Optional[str] = None):
+    """Save table to path; with deltas, first write its changes against the snapshot already there."""
+    if deltas:
+        if os.path.exists(path):
+            count = write_rows(deltas, diff_holders(HolderTable.load(path), table))
+            print(f"  🔀 {count} holder changes since the previous snapshot written to {deltas}")
+        else:
+            print(f"  ⚠ No previous snapshot at {path}; nothing to diff yet")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table.save(path)
+    print(f"  📸 Saved {len(table)} holders ({table.nbytes / 1024 / 1024:.1f} MB in memory) to {path}")
+
+
+def save_summary(analytics: Dict, path: str):
+    write_summary(analytics, path)
+    print(f"  📊 Concentration summary written to {path}")
+
+
+def report_partial_crawl(args: argparse.Namespace):
+    """
+    Explain why the crawl's snapshot, deltas and summary were not written.
     
-    wb.save(filename)
-    print(f"\n✅ Exported {len(df)} holders to {filename}")
+    A partial holder list would replace the previous snapshot, report every
+    holder it is missing as removed and skew the concentration figures. The
+    entity store only gets upserts, so the holders that were fetched are
+    still saved there; no stored holder is dropped.
+    """
+    skipped = [flag for flag, value in (("--snapshot", args.snapshot), ("--deltas", args.deltas),
+                                        ("--summary", args.summary)) if value]
+    print("  ⚠ Holder crawl is incomplete; the output only has the pages fetched so far")
+    if skipped:
+        print(f"  ⚠ Not writing {', '.join(skipped)} from a partial crawl; run again with --resume (or a higher --max-pages)")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape COOKIE token holders from Blockscout")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP response cache")
+    parser.add_argument("--resume", action="store_true", help="Continue the holder crawl from the last checkpoint")
+    parser.add_argument("--max-pages", type=int, default=100, help="Maximum holder pages to fetch")
+    # Not cookie3_users.xlsx: that is the Cookie.fun scrapers' output
+    add_output_arguments(parser, "cookie_holders.xlsx")
+    add_store_arguments(parser)
+    parser.add_argument("--snapshot", help="Also save the holders as a compact .npz snapshot")
+    parser.add_argument("--deltas", help="Write the changes since the previous --snapshot to this file")
+    parser.add_argument("--summary", help="Write holder concentration analytics (JSON) to this file")
+    parser.add_argument("--address-metadata", default=DEFAULT_METADATA_PATH,
+                        help="Address metadata cache that holders' contract / tag / ENS data is recorded in")
+    parser.add_argument("--no-address-metadata", action="store_true", help="Don't record address metadata")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("COOKIE Token Holder Scraper (Blockscout API)")
     print("=" * 60)
@@ -245,7 +381,8 @@ def main():
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    scraper = CookieBlockscoutScraper()
+    metadata = None if args.no_address_metadata else AddressMetadataCache(args.address_metadata)
+    scraper = CookieBlockscoutScraper(use_cache=not args.no_cache, metadata=metadata)
     
     # Get token info
     token_info = scraper.get_token_info()
@@ -254,33 +391,82 @@ def main():
         print(f"  Total Supply: {int(token_info.get('total_supply', 0)) / 10**18:,.0f}")
         print(f"  Holders Count: {token_info.get('holders', 'N/A')}")
     
+    checkpoint = CrawlCheckpoint(f"blockscout_holders_{COOKIE_TOKEN_ADDRESS}")
+    output = output_path(args.output, args.format)
+    store = open_entity_store(args)
+    
+    if output_format(output, args.format) != "xlsx":
+        snapshot = HolderTableBuilder() if args.snapshot or args.summary else None
+        with open_sink(output, args.format) as sink:
+            summary = scraper.stream_holders(sink, args.max_pages, checkpoint, args.resume, store, snapshot)
+        if store:
+            print(f"  💾 holders: {summary['holders']} upserted into {store.path}")
+            store.close()
+        if not summary["complete"]:
+            report_partial_crawl(args)
+        elif snapshot:
+            table = snapshot.build()
+            if args.snapshot:
+                save_snapshot(table, args.snapshot, args.deltas)
+            if args.summary:
+                save_summary(concentration(table), args.summary)
+        
+        partial = "" if summary["complete"] else " (partial)"
+        print(f"\n✅ Streamed {summary['holders']} holders to {output}{partial}")
+        if summary["top"]:
+            print(f"   Wallets: {summary['holders'] - summary['contracts']}")
+            print(f"   Contracts: {summary['contracts']}")
+            print(f"   Top holder: {summary['top']['balance']:,.2f} COOKIE")
+        if metadata:
+            metadata.close()
+        print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return
+    
     # Get all holders
-    holders = scraper.get_all_holders(max_pages=100)
+    holders = scraper.get_all_holders(max_pages=args.max_pages, checkpoint=checkpoint, resume=args.resume)
     
     # Export
     print("\n" + "=" * 60)
     print("EXPORT")
     print("=" * 60)
     
+    if store:
+        if holders:
+            store.save("holders", holders, token=COOKIE_TOKEN_ADDRESS)
+        store.close()
+    
     if holders:
-        export_to_excel(holders, token_info, "cookie3_users.xlsx")
+        table = HolderTable.from_rows(holders)
+        analytics = concentration(table)
+        if not scraper.crawl_complete:
+            report_partial_crawl(args)
+        else:
+            if args.snapshot:
+                save_snapshot(table, args.snapshot, args.deltas)
+            if args.summary:
+                save_summary(analytics, args.summary)
+        
+        export_to_excel(holders, token_info, output, analytics)
         
         # Stats
-        df = pd.DataFrame(holders)
-        contracts = df[df["is_contract"] == True]
-        wallets = df[df["is_contract"] == False]
+        breakdown = analytics["breakdown"]
+        top = analytics["top_holders"][0]
         
         print(f"\n📈 Summary:")
-        print(f"   Total holders: {len(holders)}")
-        print(f"   Wallets: {len(wallets)}")
-        print(f"   Contracts: {len(contracts)}")
-        print(f"   Top holder: {holders[0]['balance']:,.2f} COOKIE")
+        print(f"   Total holders: {analytics['holders']}")
+        print(f"   Wallets: {breakdown['wallet']['holders']}")
+        print(f"   Contracts: {breakdown['contract']['holders']}")
+        print(f"   Exchanges: {breakdown['exchange']['holders']}")
+        print(f"   Gini: {analytics['gini']:.4f}, Nakamoto coefficient: {analytics['nakamoto_coefficient']}")
+        print(f"   Top holder: {top['balance']:,.2f} COOKIE")
         
-        if holders[0].get("tags"):
-            print(f"   Top holder tags: {holders[0]['tags']}")
+        if top["tags"]:
+            print(f"   Top holder tags: {top['tags']}")
     else:
         print("\n❌ No holder data collected.")
     
+    if metadata:
+        metadata.close()
     print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 
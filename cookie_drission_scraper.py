@@ -5,18 +5,20 @@ Cookie.fun Scraper using DrissionPage for Cloudflare bypass
 Extracts: username, user ID, onchain address, score/points
 """
 
+import argparse
 import json
 import time
 import re
 from datetime import datetime
 
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-
 from DrissionPage import ChromiumPage
 from DrissionPage import ChromiumOptions
 
+from entity_store import add_store_arguments, save_to_entity_store
+from excel_export import export_rows, unique_by
+from field_mapping import AGENT_FIELDS, normalize_records
+from scraper_stream import add_output_arguments, export_results
+
 
 def create_browser():
     """Create stealth browser."""
@@ -72,15 +74,9 @@ def extract_agents_data(page):
                     if key in props:
                         items = props[key]
                         if isinstance(items, list):
-                            for item in items:
-                                agent = parse_agent(item)
-                                if agent:
-                                    agents.append(agent)
+                            agents.extend(parse_agents(items))
                         elif isinstance(items, dict) and 'data' in items:
-                            for item in items['data']:
-                                agent = parse_agent(item)
-                                if agent:
-                                    agents.append(agent)
+                            agents.extend(parse_agents(items['data']))
         except Exception as e:
             print(f"  No Next.js data: {e}")
         
@@ -124,6 +120,7 @@ def extract_agents_data(page):
         
         # Try to find agent data in scripts
         scripts = page.eles('tag:script') or []
+        script_items = []
         for script in scripts:
             try:
                 text = script.text or ""
@@ -132,14 +129,12 @@ def extract_agents_data(page):
                     matches = re.findall(r'\{[^{}]*"agentId"[^{}]*\}', text)
                     for match in matches[:100]:
                         try:
-                            item = json.loads(match)
-                            agent = parse_agent(item)
-                            if agent:
-                                agents.append(agent)
+                            script_items.append(json.loads(match))
                         except:
                             continue
             except:
                 continue
+        agents.extend(parse_agents(script_items))
                 
     except Exception as e:
         print(f"  Error: {e}")
@@ -147,28 +142,9 @@ def extract_agents_data(page):
     return agents
 
 
-def parse_agent(item):
-    """Parse agent item from JSON."""
-    if not isinstance(item, dict):
-        return None
-    
-    address = ""
-    if 'contracts' in item and item['contracts']:
-        if isinstance(item['contracts'], list) and item['contracts']:
-            address = item['contracts'][0].get('contractAddress', '')
-    if not address:
-        address = item.get('walletAddress', item.get('address', item.get('contractAddress', '')))
-    
-    return {
-        'username': item.get('twitterUsername', item.get('twitter', item.get('name', ''))),
-        'user_id': item.get('agentId', item.get('id', '')),
-        'display_name': item.get('name', item.get('displayName', '')),
-        'onchain_address': address,
-        'mindshare_score': item.get('mindshare', 0),
-        'followers': item.get('followersCount', 0),
-        'market_cap': item.get('marketCap', 0),
-        'source': 'cookie.fun'
-    }
+def parse_agents(items):
+    """Parse a batch of agent items from JSON."""
+    return normalize_records(items, AGENT_FIELDS, source='cookie.fun')
 
 
 def parse_row_text(text):
@@ -199,38 +175,17 @@ def export_to_excel(data, filename="cookie3_users.xlsx"):
         print("No data to export!")
         return
     
-    df = pd.DataFrame(data)
-    
     # Remove duplicates
-    if 'username' in df.columns:
-        df = df.drop_duplicates(subset=['username'], keep='first')
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cookie.fun Users"
-    
-    header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    for col_idx, column in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_idx, value=column.replace("_", " ").title())
-        cell.fill = header_fill
-        cell.font = header_font
-    
-    for row_idx, row in enumerate(df.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            ws.cell(row=row_idx, column=col_idx, value=str(value) if value else "")
-    
-    for col in ws.columns:
-        ws.column_dimensions[col[0].column_letter].width = 25
-    
-    ws.freeze_panes = "A2"
-    wb.save(filename)
-    print(f"\n✅ Exported {len(df)} users to {filename}")
+    count = export_rows(filename, unique_by(data, "username"), "Cookie.fun Users", default_width=25)
+    print(f"\n✅ Exported {count} users to {filename}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape Cookie.fun users with DrissionPage")
+    add_output_arguments(parser, "cookie3_users.xlsx")
+    add_store_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Cookie.fun User Scraper (DrissionPage)")
     print("=" * 60)
@@ -280,7 +235,8 @@ def main():
     print("=" * 60)
     
     if all_data:
-        export_to_excel(all_data)
+        save_to_entity_store(args, "agents", all_data)
+        export_results(all_data, args.output, args.format, excel=export_to_excel)
         print(f"\n📈 Total users: {len(all_data)}")
     else:
         print("\n⚠️ No data collected")
@@ -6,19 +6,39 @@ Scrapes COOKIE token holder data from BaseScan blockchain explorer.
 Token Address: 0xc0041ef357b183448b235a8ea73ce4e4ec8c265f (on Base chain)
 
 Usage:
-    python cookie_token_holders.py
+    python cookie_token_holders.py [--output holders.parquet | --format csv] [--transfers-output transfers.jsonl]
+    python cookie_token_holders.py --ledger [--spot-checks 5]
+    python cookie_token_holders.py --rpc-url http://127.0.0.1:8545 [--token 0x...]
+
+--output / --format pick the holder output (Excel by default, or Parquet,
+Arrow IPC, CSV, JSONL).
+Transfers are synced incrementally into a local SQLite store (--store), so
+each run only fetches blocks added since the last one. The first sync
+backfills the full history with a pool of --workers; --transfers-output
+exports the stored log.
+--ledger derives every holder's balance by replaying the full transfer log
+instead of calling tokenbalance per address (capped at 200 addresses).
+--rpc-url (or BASE_RPC_URL) reads Transfer logs and balances from an EVM node
+with batched JSON-RPC and Multicall3, bypassing BaseScan entirely.
 """
 
+import argparse
 import json
-import time
+import random
 import re
+import os
 from datetime import datetime
-from typing import List, Dict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Dict, Optional, Tuple
 
-import requests
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from entity_store import add_store_arguments, save_to_entity_store
+from evm_rpc import EvmRpcClient
+from excel_export import ExcelColumn, export_rows
+from scraper_http import HttpClient, PermanentRequestError, RequestFailed, ErrorBudgetExceeded
+from scraper_ratelimit import RateLimitedSession
+from scraper_stream import RowSink, add_output_arguments, export_results, open_sink
+from transfer_store import DEFAULT_STORE_PATH, TransferStore, normalize_transfer
 
 
 # COOKIE Token on Base
@@ -27,6 +47,24 @@ COOKIE_TOKEN_ADDRESS = "0xc0041ef357b183448b235a8ea73ce4e4ec8c265f"
 # BaseScan API (free tier)
 BASESCAN_API_URL = "https://api.basescan.org/api"
 
+# tokentx returns at most 10,000 rows per query (page * offset), so the full
+# log is walked in block windows (see TransferIngester)
+TRANSFERS_PAGE_SIZE = 1000
+TRANSFERS_WINDOW_ROWS = 10000
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Block-range ingestion: first window size, rows per window to aim for, and
+# blocks left unsynced at the head in case of reorgs
+INITIAL_WINDOW_BLOCKS = 100000
+TARGET_WINDOW_ROWS = TRANSFERS_WINDOW_ROWS // 2
+CONFIRMATIONS = 10
+
+# First sync of a token's history: parallel workers, and chunks per worker so
+# a dense chunk doesn't leave the other workers idle
+BACKFILL_WORKERS = 4
+BACKFILL_CHUNKS_PER_WORKER = 8
+
 # Alternative: Direct page scraping endpoints
 BASESCAN_HOLDERS_URL = f"https://basescan.org/token/{COOKIE_TOKEN_ADDRESS}#balances"
 
@@ -36,10 +74,33 @@ class CookieTokenScraper:
     
     def __init__(self, api_key: str = None):
         self.api_key = api_key
-        self.session = requests.Session()
+        self.session = RateLimitedSession()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         })
+        self.http = HttpClient(self.session)
+    
+    @staticmethod
+    def _is_rate_limited(data) -> bool:
+        """BaseScan reports rate limiting as HTTP 200 with status "0"."""
+        return (
+            isinstance(data, dict)
+            and data.get("status") == "0"
+            and "rate limit" in str(data.get("result", "")).lower()
+        )
+    
+    def _api_call(self, params: Dict, timeout: float = 30) -> Dict:
+        """
+        Call the BaseScan API with retries.
+        
+        Raises RequestFailed when transient errors (including BaseScan's
+        in-body rate limit) outlast the retries.
+        """
+        if self.api_key:
+            params["apikey"] = self.api_key
+        return self.http.get_json(
+            BASESCAN_API_URL, params=params, timeout=timeout, retry_on_body=self._is_rate_limited
+        )
     
     def get_token_info(self) -> Dict:
         """Get basic token info from BaseScan API."""
@@ -50,18 +111,15 @@ class CookieTokenScraper:
             "action": "tokeninfo",
             "contractaddress": COOKIE_TOKEN_ADDRESS,
         }
-        if self.api_key:
-            params["apikey"] = self.api_key
         
         try:
-            response = self.session.get(BASESCAN_API_URL, params=params, timeout=30)
-            data = response.json()
+            data = self._api_call(params)
             if data.get("status") == "1":
                 result = data.get("result", [{}])
                 if isinstance(result, list) and result:
                     return result[0]
                 return result
-        except Exception as e:
+        except RequestFailed as e:
             print(f"  Error: {e}")
         
         return {}
@@ -78,79 +136,182 @@ class CookieTokenScraper:
             "page": page,
             "offset": offset,
         }
-        if self.api_key:
-            params["apikey"] = self.api_key
         
         try:
-            response = self.session.get(BASESCAN_API_URL, params=params, timeout=30)
-            data = response.json()
+            data = self._api_call(params)
             
             if data.get("status") == "1":
                 return data.get("result", [])
             else:
                 print(f"  API Error: {data.get('message', 'Unknown error')}")
-        except Exception as e:
+        except RequestFailed as e:
             print(f"  Request Error: {e}")
         
         return []
     
-    def get_token_transfers(self, start_block: int = 0, end_block: int = 99999999, page: int = 1) -> List[Dict]:
-        """Get token transfer events to identify unique holders."""
-        print(f"📤 Fetching token transfers (page {page})...")
+    def get_token_transfers(
+        self,
+        start_block: int = 0,
+        end_block: int = 99999999,
+        page: int = 1,
+        sort: str = "desc",
+        contract: str = COOKIE_TOKEN_ADDRESS,
+    ) -> List[Dict]:
+        """
+        Get token transfer events to identify unique holders.
+        
+        Returns [] only when BaseScan reports no (more) transfers. Any other
+        failure raises - RequestFailed when transient errors outlast the
+        retries, PermanentRequestError for errors and unexpected messages - so
+        the ingester never mistakes a failed window for an empty one and
+        advances its sync cursor past it.
+        """
+        print(f"📤 Fetching token transfers (blocks {start_block}-{end_block}, page {page})...")
         
         params = {
             "module": "account",
             "action": "tokentx",
-            "contractaddress": COOKIE_TOKEN_ADDRESS,
+            "contractaddress": contract,
             "startblock": start_block,
             "endblock": end_block,
             "page": page,
-            "offset": 1000,
-            "sort": "desc",
+            "offset": TRANSFERS_PAGE_SIZE,
+            "sort": sort,
         }
-        if self.api_key:
-            params["apikey"] = self.api_key
         
+        data = self._api_call(params)
+        
+        if data.get("status") == "1":
+            return data.get("result", [])
+        # An empty block range is normal while walking windows
+        if data.get("message") == "No transactions found":
+            return []
+        raise PermanentRequestError(
+            f"tokentx blocks {start_block}-{end_block} page {page}: "
+            f"{data.get('message', 'Unknown')} {data.get('result') or ''}".rstrip()
+        )
+    
+    def get_latest_block(self) -> int:
+        """Current Base block number."""
+        data = self._api_call({"module": "proxy", "action": "eth_blockNumber"})
         try:
-            response = self.session.get(BASESCAN_API_URL, params=params, timeout=30)
-            data = response.json()
-            
-            if data.get("status") == "1":
-                return data.get("result", [])
-            else:
-                print(f"  API message: {data.get('message', 'Unknown')}")
-        except Exception as e:
-            print(f"  Error: {e}")
+            return int(data.get("result"), 16)
+        except (TypeError, ValueError):
+            raise PermanentRequestError(f"eth_blockNumber: {data.get('result') or data.get('message')}")
+    
+    def fetch_transfer_window(
+        self, start_block: int, end_block: int, contract: str = COOKIE_TOKEN_ADDRESS
+    ) -> Optional[List[Dict]]:
+        """
+        All transfers in [start_block, end_block], oldest first.
         
-        return []
+        Returns None when the window holds more transfers than one query can
+        page through, so the caller can split it. Raises RequestFailed if any
+        page fails, so a partial window is never stored as complete.
+        """
+        rows = []
+        for page in range(1, TRANSFERS_WINDOW_ROWS // TRANSFERS_PAGE_SIZE + 1):
+            transfers = self.get_token_transfers(start_block, end_block, page, sort="asc", contract=contract)
+            rows.extend(transfers)
+            if len(transfers) < TRANSFERS_PAGE_SIZE:
+                return rows
+        return None
+    
+    def sync_transfers(
+        self, store: TransferStore, contract: str = COOKIE_TOKEN_ADDRESS, workers: int = BACKFILL_WORKERS
+    ) -> int:
+        """Bring the local transfer store up to date; returns new transfers."""
+        return TransferIngester(self, store, contract, workers=workers).sync()
     
-    def extract_unique_addresses_from_transfers(self, max_pages: int = 10) -> List[str]:
-        """Extract unique addresses from transfer history."""
+    def extract_unique_addresses_from_transfers(
+        self, store: TransferStore, sink: Optional[RowSink] = None, workers: int = BACKFILL_WORKERS
+    ) -> List[str]:
+        """
+        Extract unique addresses from the full transfer history.
+        
+        Syncs the local store first, so only blocks since the last run are
+        fetched; with a sink, the stored transfers are also exported to it.
+        """
         print("\n🔍 Extracting unique addresses from transfers...")
         
-        all_addresses = set()
+        try:
+            self.sync_transfers(store, workers=workers)
+        except RequestFailed as e:
+            print(f"  ⚠ Sync stopped early, using transfers stored so far: {e}")
         
-        for page in range(1, max_pages + 1):
-            transfers = self.get_token_transfers(page=page)
-            
-            if not transfers:
-                break
-            
+        if sink:
+            for transfers in store.iter_transfers(COOKIE_TOKEN_ADDRESS):
+                sink.write(transfers)
+        
+        addresses = set(store.unique_addresses(COOKIE_TOKEN_ADDRESS))
+        addresses.discard(ZERO_ADDRESS)
+        print(f"  {store.count(COOKIE_TOKEN_ADDRESS)} stored transfers, {len(addresses)} unique addresses")
+        
+        return list(addresses)
+    
+    def get_holders_from_transfers(self, store: TransferStore, workers: int = BACKFILL_WORKERS) -> List[Dict]:
+        """
+        Replay the whole transfer log into a balance ledger.
+        
+        One pass over the synced transfer store gives every holder's balance,
+        instead of one tokenbalance call per address. Raises RequestFailed if
+        the store could not be synced, since a partial replay gives wrong
+        balances.
+        """
+        self.sync_transfers(store, workers=workers)
+        
+        print("\n📒 Replaying transfer log into balance ledger...")
+        
+        ledger = BalanceLedger()
+        for transfers in store.iter_transfers(COOKIE_TOKEN_ADDRESS):
             for tx in transfers:
-                all_addresses.add(tx.get("from", "").lower())
-                all_addresses.add(tx.get("to", "").lower())
-            
-            print(f"  Page {page}: Found {len(transfers)} transfers, {len(all_addresses)} unique addresses")
-            time.sleep(0.3)  # Rate limiting
+                ledger.apply(tx["from_addr"], tx["to_addr"], int(tx["value"]), tx["block_number"])
+        print(f"  {ledger.transfers} transfers replayed up to block {ledger.last_block}")
+        
+        if ledger.negative:
+            print(f"  ⚠ {ledger.negative} addresses went negative, the transfer log looks incomplete")
+        
+        holders = [{
+            "onchain_address": address,
+            "balance_raw": balance,
+            "balance": balance / (10 ** 18),  # Assuming 18 decimals
+            "source": "basescan.org (transfer replay)"
+        } for address, balance in ledger.positive_balances()]
+        
+        holders.sort(key=lambda x: x["balance_raw"], reverse=True)
+        return holders
+    
+    def spot_check_balances(self, holders: List[Dict], samples: int = 5) -> int:
+        """Compare a few replayed balances against tokenbalance; returns mismatches."""
+        if not holders or samples <= 0:
+            return 0
         
-        # Remove empty strings and null address
-        all_addresses.discard("")
-        all_addresses.discard("0x0000000000000000000000000000000000000000")
+        # Always check the largest holder, plus a random sample of the rest
+        picked = [holders[0]] + random.sample(holders[1:], min(samples - 1, len(holders) - 1))
+        print(f"\n🔎 Spot-checking {len(picked)} balances against tokenbalance...")
         
-        return list(all_addresses)
+        mismatches = 0
+        for holder in picked:
+            try:
+                actual = self.get_address_balance(holder["onchain_address"])
+            except RequestFailed as e:
+                print(f"  {holder['onchain_address']}: lookup failed ({e})")
+                continue
+            if actual != holder["balance_raw"]:
+                mismatches += 1
+                print(f"  ✗ {holder['onchain_address']}: ledger {holder['balance_raw']}, chain {actual}")
+            else:
+                print(f"  ✓ {holder['onchain_address']}")
+        
+        return mismatches
     
     def get_address_balance(self, address: str) -> int:
-        """Get COOKIE token balance for an address."""
+        """
+        Get COOKIE token balance for an address.
+        
+        Raises RequestFailed if the balance could not be fetched, so a failed
+        lookup is not mistaken for a zero balance.
+        """
         params = {
             "module": "account",
             "action": "tokenbalance",
@@ -158,28 +319,28 @@ class CookieTokenScraper:
             "address": address,
             "tag": "latest",
         }
-        if self.api_key:
-            params["apikey"] = self.api_key
         
-        try:
-            response = self.session.get(BASESCAN_API_URL, params=params, timeout=10)
-            data = response.json()
-            
-            if data.get("status") == "1":
-                return int(data.get("result", 0))
-        except:
-            pass
-        
-        return 0
+        data = self._api_call(params, timeout=10)
+        if data.get("status") == "1":
+            return int(data.get("result", 0))
+        raise PermanentRequestError(f"tokenbalance for {address}: {data.get('message', 'Unknown')}")
     
     def get_holder_data(self, addresses: List[str], max_addresses: int = 500) -> List[Dict]:
         """Get balance data for list of addresses."""
         print(f"\n💰 Fetching balances for {min(len(addresses), max_addresses)} addresses...")
         
         holders = []
+        failed = 0
         
         for i, address in enumerate(addresses[:max_addresses]):
-            balance = self.get_address_balance(address)
+            try:
+                balance = self.get_address_balance(address)
+            except ErrorBudgetExceeded as e:
+                print(f"  ⚠ Stopped after {i} addresses: {e}")
+                break
+            except RequestFailed:
+                failed += 1
+                continue
             
             if balance > 0:
                 holders.append({
@@ -191,8 +352,9 @@ class CookieTokenScraper:
             
             if (i + 1) % 50 == 0:
                 print(f"  Processed {i + 1} addresses, found {len(holders)} holders")
-            
-            time.sleep(0.25)  # Rate limiting for free API
+        
+        if failed:
+            print(f"  ⚠ {failed} balance lookups failed after retries and were skipped")
         
         # Sort by balance
         holders.sort(key=lambda x: x["balance"], reverse=True)
@@ -200,45 +362,255 @@ class CookieTokenScraper:
         return holders
 
 
-def export_to_excel(data: list, filename: str = "cookie_token_holders.xlsx"):
-    """Export to formatted Excel."""
-    if not data:
-        print("No data to export!")
-        return
+class TransferIngester:
+    """
+    Incremental block-range ingestion of a token's transfers into a TransferStore.
     
-    df = pd.DataFrame(data)
+    Walks [last synced block + 1, head - confirmations] in windows. A window
+    that hits the explorer's result cap is halved and retried; after each
+    stored window the size is rescaled towards TARGET_WINDOW_ROWS, so sparse
+    history is covered in a few large windows and busy periods in many small
+    ones. The sync cursor advances with every stored window, so an interrupted
+    sync resumes where it stopped.
     
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "COOKIE Token Holders"
+    The first sync of a token is a backfill of its whole history: the range is
+    split into independent chunks fetched by a worker pool, and finished
+    chunks are merged into the store in block order.
+    """
     
-    header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
+    def __init__(
+        self,
+        scraper: CookieTokenScraper,
+        store: TransferStore,
+        contract: str = COOKIE_TOKEN_ADDRESS,
+        window_blocks: int = INITIAL_WINDOW_BLOCKS,
+        confirmations: int = CONFIRMATIONS,
+        workers: int = BACKFILL_WORKERS,
+    ):
+        self.scraper = scraper
+        self.store = store
+        self.contract = contract.lower()
+        self.window_blocks = window_blocks
+        self.confirmations = confirmations
+        self.workers = workers
     
-    for col_idx, column in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_idx, value=column.replace("_", " ").title())
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
+    def iter_windows(self, start_block: int, end_block: int) -> Iterator[Tuple[int, List[Dict]]]:
+        """Yield (window end block, normalized rows) for [start_block, end_block], oldest first."""
+        window_blocks = self.window_blocks
+        while start_block <= end_block:
+            window_end = min(start_block + window_blocks - 1, end_block)
+            rows = self.scraper.fetch_transfer_window(start_block, window_end, self.contract)
+            
+            if rows is None:
+                if window_blocks == 1:
+                    raise PermanentRequestError(f"block {start_block} has more transfers than one query returns")
+                window_blocks = max(1, window_blocks // 2)
+                print(f"  Window too dense, shrinking to {window_blocks} blocks")
+                continue
+            
+            print(f"  Blocks {start_block}-{window_end}: {len(rows)} transfers")
+            yield window_end, list(with_log_indexes(rows))
+            
+            window_blocks = next_window_size(window_blocks, len(rows))
+            start_block = window_end + 1
     
-    for row_idx, row in enumerate(df.values, 2):
-        for col_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            if isinstance(value, float):
-                cell.value = round(value, 4)
-            else:
-                cell.value = str(value) if value else ""
+    def sync(self, start_block: Optional[int] = None, head: Optional[int] = None) -> int:
+        last = self.store.last_synced_block(self.contract)
+        if start_block is None:
+            start_block = last + 1 if last is not None else 0
+        if head is None:
+            head = self.scraper.get_latest_block() - self.confirmations
+        
+        if start_block > head:
+            print(f"  Transfer store already synced to block {head}")
+            return 0
+        if last is None and self.workers > 1:
+            return self.backfill(start_block, head)
+        print(f"\n🧱 Syncing transfers for blocks {start_block}-{head}...")
+        
+        inserted = 0
+        for window_end, rows in self.iter_windows(start_block, head):
+            inserted += self.store.insert_transfers(self.contract, rows, synced_to=window_end)
+        
+        print(f"  Stored {inserted} new transfers (synced to block {head})")
+        return inserted
     
-    for col_idx in range(1, len(df.columns) + 1):
-        ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = 45
+    def _fetch_chunk(self, start_block: int, end_block: int) -> List[Dict]:
+        rows = []
+        for _, window_rows in self.iter_windows(start_block, end_block):
+            rows.extend(window_rows)
+        rows.sort(key=lambda tx: (tx["block_number"], tx["tx_index"], tx["tx_hash"], tx["log_index"]))
+        return rows
     
-    ws.freeze_panes = "A2"
-    wb.save(filename)
-    print(f"\n✅ Exported {len(data)} holders to {filename}")
+    def backfill(self, start_block: int, head: int) -> int:
+        """
+        Fetch [start_block, head] as concurrent chunks and merge them in block order.
+        
+        The sync cursor only advances over the contiguous prefix of finished
+        chunks, so an interrupted backfill resumes (sequentially) from there.
+        """
+        chunks = split_block_range(start_block, head, self.workers * BACKFILL_CHUNKS_PER_WORKER)
+        print(f"\n🧱 Backfilling blocks {start_block}-{head} in {len(chunks)} chunks with {self.workers} workers...")
+        
+        inserted = 0
+        finished: Dict[int, Tuple[int, List[Dict]]] = {}
+        next_start = start_block
+        
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill")
+        try:
+            futures = {pool.submit(self._fetch_chunk, a, b): (a, b) for a, b in chunks}
+            for future in as_completed(futures):
+                chunk_start, chunk_end = futures[future]
+                finished[chunk_start] = (chunk_end, future.result())
+                
+                # Merge every chunk that now continues the stored prefix
+                while next_start in finished:
+                    chunk_end, rows = finished.pop(next_start)
+                    inserted += self.store.insert_transfers(self.contract, rows, synced_to=chunk_end)
+                    next_start = chunk_end + 1
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        
+        print(f"  Stored {inserted} transfers (synced to block {head})")
+        return inserted
+
+
+def split_block_range(start_block: int, end_block: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [start_block, end_block] into at most `parts` contiguous ranges."""
+    size = max(1, -(-(end_block - start_block + 1) // parts))
+    return [(a, min(a + size - 1, end_block)) for a in range(start_block, end_block + 1, size)]
+
+
+def next_window_size(window_blocks: int, rows: int) -> int:
+    """Rescale a window towards TARGET_WINDOW_ROWS, by at most 4x up or 2x down."""
+    scale = TARGET_WINDOW_ROWS / max(rows, 1)
+    return max(1, int(window_blocks * min(max(scale, 0.5), 4.0)))
+
+
+def with_log_indexes(rows: List[Dict]) -> Iterator[Dict]:
+    """
+    Normalize tokentx rows for the store.
+    
+    tokentx rows carry no log index on every explorer, so missing ones are
+    numbered by position within their transaction; a window always contains
+    whole blocks, so the numbering is stable across runs.
+    """
+    ordinals: Dict[str, int] = defaultdict(int)
+    for tx in rows:
+        tx_hash = tx.get("hash", "")
+        yield normalize_transfer(tx, ordinals[tx_hash])
+        ordinals[tx_hash] += 1
+
+
+class RpcTokenSource:
+    """
+    Holder data read straight from an EVM node instead of BaseScan.
+    
+    Transfer logs are synced into the same TransferStore via batched
+    eth_getLogs, and balances for every address seen come from batched
+    Multicall3 balanceOf calls (see evm_rpc.py), so no per-address API calls
+    or explorer rate limits are involved.
+    """
+    
+    def __init__(self, rpc_url: str, contract: str = COOKIE_TOKEN_ADDRESS, confirmations: int = CONFIRMATIONS):
+        self.rpc = EvmRpcClient(rpc_url)
+        self.contract = contract.lower()
+        self.confirmations = confirmations
+    
+    def sync_transfers(self, store: TransferStore) -> int:
+        last = store.last_synced_block(self.contract)
+        start_block = last + 1 if last is not None else 0
+        head = self.rpc.block_number() - self.confirmations
+        
+        if start_block > head:
+            print(f"  Transfer store already synced to block {head}")
+            return 0
+        print(f"\n🧱 Syncing Transfer logs for blocks {start_block}-{head} from RPC...")
+        
+        inserted = 0
+        for synced_to, logs in self.rpc.iter_transfer_logs(self.contract, start_block, head):
+            inserted += store.insert_transfers(self.contract, logs, synced_to=synced_to)
+        
+        print(f"  Stored {inserted} new transfers (synced to block {head})")
+        return inserted
+    
+    def get_holders(self, store: TransferStore) -> List[Dict]:
+        """Every address seen in the transfer log with its current balance."""
+        self.sync_transfers(store)
+        
+        addresses = [a for a in store.unique_addresses(self.contract) if a != ZERO_ADDRESS]
+        via = "Multicall3" if self.rpc.has_multicall() else "batched eth_call"
+        print(f"\n💰 Fetching balances for {len(addresses)} addresses via {via}...")
+        balances = self.rpc.balances_of(self.contract, addresses)
+        
+        if len(balances) < len(addresses):
+            print(f"  ⚠ {len(addresses) - len(balances)} balanceOf calls failed and were skipped")
+        
+        holders = [{
+            "onchain_address": address,
+            "balance_raw": balance,
+            "balance": balance / (10 ** 18),  # Assuming 18 decimals
+            "source": "rpc"
+        } for address, balance in balances.items() if balance > 0]
+        
+        holders.sort(key=lambda x: x["balance_raw"], reverse=True)
+        return holders
+
+
+class BalanceLedger:
+    """Token balances built by applying transfers in block order."""
+    
+    def __init__(self):
+        self.balances: Dict[str, int] = defaultdict(int)
+        self.transfers = 0
+        self.last_block = 0
+    
+    def apply(self, sender: str, recipient: str, value: int, block: int = 0):
+        sender, recipient = sender.lower(), recipient.lower()
+        # Mints come from and burns go to the zero address, which holds nothing
+        if sender and sender != ZERO_ADDRESS:
+            self.balances[sender] -= value
+        if recipient and recipient != ZERO_ADDRESS:
+            self.balances[recipient] += value
+        self.transfers += 1
+        self.last_block = max(self.last_block, block)
+    
+    @property
+    def negative(self) -> int:
+        return sum(1 for balance in self.balances.values() if balance < 0)
+    
+    def positive_balances(self) -> Iterator[Tuple[str, int]]:
+        return ((address, balance) for address, balance in self.balances.items() if balance > 0)
+
+
+def export_to_excel(data: list, filename: str = "cookie_token_holders.xlsx"):
+    """Export to formatted Excel."""
+    if not data:
+        print("No data to export!")
+        return
+    
+    columns = [
+        ExcelColumn(key, width=45, number_format="#,##0.0000" if key == "balance" else None)
+        for key in data[0]
+    ]
+    count = export_rows(filename, data, "COOKIE Token Holders", columns)
+    print(f"\n✅ Exported {count} holders to {filename}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape COOKIE token holders from BaseScan")
+    add_output_arguments(parser, "cookie_token_holders.xlsx")
+    parser.add_argument("--transfers-output", help="Export the stored transfer log (.parquet, .arrow, .csv, .jsonl, .xlsx)")
+    parser.add_argument("--ledger", action="store_true", help="Replay the transfer log instead of per-address balance calls")
+    parser.add_argument("--spot-checks", type=int, default=5, help="Ledger balances to verify against tokenbalance")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="SQLite transfer store (synced incrementally)")
+    parser.add_argument("--rpc-url", default=os.getenv("BASE_RPC_URL"), help="Read holders from an EVM JSON-RPC node")
+    parser.add_argument("--token", default=COOKIE_TOKEN_ADDRESS, help="Token contract for --rpc-url (e.g. one deployed on anvil)")
+    parser.add_argument("--confirmations", type=int, default=CONFIRMATIONS, help="Blocks left unsynced at the chain head")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="Parallel workers for the first full-history sync")
+    add_store_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("COOKIE Token Holder Scraper (Base Chain)")
     print("=" * 60)
@@ -247,34 +619,60 @@ def main():
     print()
     
     scraper = CookieTokenScraper()
+    store = TransferStore(args.store)
     
-    # Get token info
-    token_info = scraper.get_token_info()
-    if token_info:
-        print(f"  Token Name: {token_info.get('tokenName', 'N/A')}")
-        print(f"  Symbol: {token_info.get('symbol', 'N/A')}")
-        print(f"  Decimals: {token_info.get('divisor', 'N/A')}")
-    
-    # Try direct holder list first
-    holders = scraper.get_top_holders_via_api()
-    
-    if not holders:
-        print("\n⚠️ Direct holder list not available without API key")
-        print("   Extracting addresses from transfer history instead...")
+    if args.rpc_url:
+        source = RpcTokenSource(args.rpc_url, args.token, args.confirmations)
+        try:
+            holders = source.get_holders(store)
+        except RequestFailed as e:
+            print(f"  ⚠ RPC source failed: {e}")
+            holders = []
+    else:
+        # Get token info
+        token_info = scraper.get_token_info()
+        if token_info:
+            print(f"  Token Name: {token_info.get('tokenName', 'N/A')}")
+            print(f"  Symbol: {token_info.get('symbol', 'N/A')}")
+            print(f"  Decimals: {token_info.get('divisor', 'N/A')}")
         
-        # Get unique addresses from transfers
-        addresses = scraper.extract_unique_addresses_from_transfers(max_pages=10)
-        print(f"\n📊 Found {len(addresses)} unique addresses in transfers")
+        # Try direct holder list first
+        holders = scraper.get_top_holders_via_api()
         
-        # Get balances (limited due to rate limiting)
-        holders = scraper.get_holder_data(addresses, max_addresses=200)
-    else:
-        # Format API response
-        holders = [{
-            "onchain_address": h.get("TokenHolderAddress", ""),
-            "balance": float(h.get("TokenHolderQuantity", 0)) / (10 ** 18),
-            "source": "basescan.org"
-        } for h in holders]
+        if not holders and args.ledger:
+            print("\n⚠️ Direct holder list not available without API key")
+            try:
+                holders = scraper.get_holders_from_transfers(store, workers=args.workers)
+            except RequestFailed as e:
+                print(f"  ⚠ Transfer log incomplete, balances would be wrong: {e}")
+                holders = []
+            print(f"\n📊 Ledger holds {len(holders)} addresses with a positive balance")
+            
+            mismatches = scraper.spot_check_balances(holders, args.spot_checks)
+            if mismatches:
+                print(f"  ⚠ {mismatches} spot checks disagree with tokenbalance")
+        elif not holders:
+            print("\n⚠️ Direct holder list not available without API key")
+            print("   Extracting addresses from transfer history instead...")
+            
+            # Get unique addresses from transfers
+            if args.transfers_output:
+                with open_sink(args.transfers_output) as sink:
+                    addresses = scraper.extract_unique_addresses_from_transfers(store, sink=sink, workers=args.workers)
+                print(f"  Exported {sink.rows_written} transfers to {args.transfers_output}")
+            else:
+                addresses = scraper.extract_unique_addresses_from_transfers(store, workers=args.workers)
+            print(f"\n📊 Found {len(addresses)} unique addresses in transfers")
+            
+            # Get balances (limited due to rate limiting)
+            holders = scraper.get_holder_data(addresses, max_addresses=200)
+        else:
+            # Format API response
+            holders = [{
+                "onchain_address": h.get("TokenHolderAddress", ""),
+                "balance": float(h.get("TokenHolderQuantity", 0)) / (10 ** 18),
+                "source": "basescan.org"
+            } for h in holders]
     
     # Export
     print("\n" + "=" * 60)
@@ -282,7 +680,8 @@ def main():
     print("=" * 60)
     
     if holders:
-        export_to_excel(holders, "cookie_token_holders.xlsx")
+        save_to_entity_store(args, "holders", holders, token=args.token if args.rpc_url else COOKIE_TOKEN_ADDRESS)
+        export_results(holders, args.output, args.format, excel=export_to_excel)
         
         print(f"\n📈 Summary:")
         print(f"   Total holders found: {len(holders)}")
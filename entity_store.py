@@ -0,0 +1,330 @@
+"""
+Persistent SQLite store for everything the scrapers collect, across runs.
+
+Every run upserts its rows into one of four tables instead of only writing a
+standalone spreadsheet:
+- accounts             - Cookie.fun creators / influencers
+- agents               - Cookie.fun AI agents (API and browser scrapers)
+- leaderboard_entries  - Cookie.fun and Galxe leaderboard positions, per board
+- holders              - token holder balances, per token
+
+Each table is indexed by address and (except holders) by username, so looking
+an entity up across runs and sources is an index probe rather than loading
+several spreadsheets into pandas. Addresses are stored lowercase and handles
+lowercase without the leading "@", so lookups match however a source spelled
+them.
+
+Rows keep `first_seen` (set on insert) and `last_seen` (the timestamp of the
+last run that returned them). By default an upsert never blanks a value a row
+already has: a field missing (or None) in a later run keeps its previous
+value. upsert(..., overwrite=True) writes every column as given instead, so a
+source can clear a field it no longer reports. The full source row is kept as
+JSON in `data`.
+
+Set ENTITY_STORE_PATH to move the store.
+
+Usage:
+    with EntityStore() as store:
+        store.upsert("agents", rows)
+        store.upsert("holders", holders, token=COOKIE_TOKEN_ADDRESS)
+        store.find_by_address("0xabc...")
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_ENTITY_STORE_PATH = os.getenv("ENTITY_STORE_PATH", "cookie_entities.sqlite")
+
+# Keys per lookup when checking which rows of a batch already exist
+EXISTING_KEYS_CHUNK = 400
+
+# Per table: the key columns and the value columns, each value column with the
+# row keys it is read from (first non-empty one wins)
+ACCOUNT_COLUMNS = {
+    "user_id": ("user_id",),
+    "username": ("username",),
+    "display_name": ("display_name",),
+    "category": ("category",),
+    "followers": ("followers",),
+}
+
+TABLES: Dict[str, Dict[str, Any]] = {
+    "accounts": {
+        "keys": ("source", "account_key"),
+        "columns": {
+            **ACCOUNT_COLUMNS,
+            "handle": (),
+            "address": ("onchain_address", "address"),
+            "snaps_points": ("snaps_points", "points"),
+            "engagement_score": ("engagement_score",),
+            "rank": ("rank",),
+        },
+    },
+    "agents": {
+        "keys": ("source", "account_key"),
+        "columns": {
+            **ACCOUNT_COLUMNS,
+            "handle": (),
+            "address": ("onchain_address", "address"),
+            "mindshare_score": ("mindshare_score",),
+            "market_cap": ("market_cap",),
+            "volume_24h": ("volume_24h",),
+        },
+    },
+    "leaderboard_entries": {
+        "keys": ("source", "board", "account_key"),
+        "columns": {
+            "user_id": ("user_id",),
+            "username": ("username",),
+            "handle": (),
+            "address": ("onchain_address", "address"),
+            "rank": ("rank",),
+            "points": ("snaps_points", "points"),
+        },
+    },
+    "holders": {
+        "keys": ("token", "address"),
+        "columns": {
+            "balance_raw": ("balance_raw",),
+            "balance": ("balance",),
+            "is_contract": ("is_contract",),
+            "contract_name": ("contract_name",),
+            "tags": ("tags",),
+            "ens_domain": ("ens_domain",),
+            "source": ("source",),
+        },
+    },
+}
+
+# Tables that have a handle column, i.e. can be looked up by username
+HANDLE_TABLES = [name for name, spec in TABLES.items() if "handle" in spec["columns"]]
+
+
+def normalize_address(address: Any) -> Optional[str]:
+    if not isinstance(address, str) or not address.strip():
+        return None
+    return address.strip().lower()
+
+
+def normalize_handle(username: Any) -> Optional[str]:
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return username.strip().lstrip("@").lower() or None
+
+
+def _column_value(value: Any) -> Any:
+    """Empty values become NULL so they never overwrite a stored value."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int) and abs(value) >= 2 ** 63:
+        return str(value)  # raw token balances overflow SQLite integers
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def account_key(row: Dict) -> Optional[str]:
+    """Stable per-source key for an account-like row: user id, else handle, else address."""
+    user_id = row.get("user_id")
+    if user_id not in (None, ""):
+        return f"id:{user_id}"
+    handle = normalize_handle(row.get("username"))
+    if handle:
+        return f"handle:{handle}"
+    address = normalize_address(row.get("onchain_address") or row.get("address"))
+    if address:
+        return f"address:{address}"
+    return None
+
+
+class EntityStore:
+    """Upserts scraper rows into indexed tables with first/last seen timestamps."""
+
+    def __init__(self, path: str = DEFAULT_ENTITY_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # One timestamp per run, so "seen in the latest run" is an equality test
+        self.run_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for name, spec in TABLES.items():
+            columns = [f"{key} TEXT NOT NULL" for key in spec["keys"]]
+            columns += list(spec["columns"])
+            columns += ["data TEXT", "first_seen TEXT NOT NULL", "last_seen TEXT NOT NULL"]
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} ({', '.join(columns)}, PRIMARY KEY ({', '.join(spec['keys'])}))"
+            )
+            if "handle" in spec["columns"]:
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS {name}_handle ON {name} (handle)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {name}_address ON {name} (address)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {name}_last_seen ON {name} (last_seen)")
+        self._db.commit()
+
+    def _record(self, table: str, row: Dict) -> Optional[Dict]:
+        spec = TABLES[table]
+        record = {}
+        for column, aliases in spec["columns"].items():
+            values = (_column_value(row.get(alias)) for alias in aliases)
+            record[column] = next((value for value in values if value is not None), None)
+        if "handle" in record:
+            record["handle"] = normalize_handle(row.get("username"))
+        if "address" in record:
+            record["address"] = normalize_address(record["address"])
+
+        if table == "holders":
+            if record["balance_raw"] is not None:
+                record["balance_raw"] = str(record["balance_raw"])  # exact decimal string, like the transfer store
+            record["token"] = normalize_address(row.get("token"))
+            record["address"] = normalize_address(row.get("onchain_address") or row.get("address"))
+        else:
+            record["source"] = row.get("source") or "unknown"
+            record["account_key"] = account_key(row)
+            if table == "leaderboard_entries":
+                record["board"] = row.get("board") or row.get("space") or record["source"]
+
+        if any(record.get(key) is None for key in spec["keys"]):
+            return None  # nothing to identify the row by
+        record["data"] = json.dumps(row, default=str)
+        return record
+
+    def _existing_keys(self, table: str, keys: List[str], candidates: List[Tuple]) -> set:
+        """The candidate key tuples already stored in table (primary key probes, not a scan)."""
+        found = set()
+        row = f"({', '.join('?' for _ in keys)})"
+        for start in range(0, len(candidates), EXISTING_KEYS_CHUNK):
+            chunk = candidates[start:start + EXISTING_KEYS_CHUNK]
+            found.update(tuple(r) for r in self._db.execute(
+                f"SELECT {', '.join(keys)} FROM {table} WHERE ({', '.join(keys)}) IN "
+                f"(VALUES {', '.join(row for _ in chunk)})",
+                [value for key in chunk for value in key],
+            ))
+        return found
+
+    def upsert(self, table: str, rows: Iterable[Dict], overwrite: bool = False, **defaults) -> Tuple[int, int]:
+        """
+        Insert or update rows in table; returns (new, updated).
+
+        defaults fill fields the rows don't carry themselves (e.g. token= for
+        holders, board= for leaderboard entries). Rows with nothing to key
+        them by (no user id, username or address) are skipped. An existing
+        row keeps the values of columns that come in as None, unless
+        overwrite=True, which stores the columns exactly as given.
+        """
+        if table not in TABLES:
+            raise ValueError(f"Unknown entity table '{table}' (use one of: {', '.join(TABLES)})")
+        spec = TABLES[table]
+        records = [r for r in (self._record(table, {**defaults, **row}) for row in rows) if r is not None]
+        if not records:
+            return 0, 0
+
+        keys = list(spec["keys"])
+        columns = keys + list(spec["columns"]) + ["data"]
+        if overwrite:
+            updates = [f"{c} = excluded.{c}" for c in spec["columns"]]
+        else:
+            updates = [f"{c} = COALESCE(excluded.{c}, {c})" for c in spec["columns"]]
+        updates += ["data = excluded.data", "last_seen = excluded.last_seen"]
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}, first_seen, last_seen) "
+            f"VALUES ({', '.join('?' for _ in columns)}, ?, ?) "
+            f"ON CONFLICT({', '.join(spec['keys'])}) DO UPDATE SET {', '.join(updates)}"
+        )
+        batch_keys = list(dict.fromkeys(tuple(r[k] for k in keys) for r in records))
+        with self._lock:
+            new = len(batch_keys) - len(self._existing_keys(table, keys, batch_keys))
+            self._db.executemany(sql, ([r[c] for c in columns] + [self.run_at, self.run_at] for r in records))
+            self._db.commit()
+        return new, len(records) - new
+
+    def save(self, table: str, rows: List[Dict], **defaults):
+        """upsert() and print a one-line summary, for the scrapers' main()."""
+        new, updated = self.upsert(table, rows, **defaults)
+        print(f"  💾 {table}: {new} new, {updated} updated in {self.path}")
+
+    def _query(self, sql: str, params: tuple) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def find_by_address(self, address: str) -> Dict[str, List[Dict]]:
+        """Every stored row for an address, by table."""
+        address = normalize_address(address)
+        found = {}
+        for table in TABLES:
+            rows = self._query(f"SELECT * FROM {table} WHERE address = ?", (address,))
+            if rows:
+                found[table] = rows
+        return found
+
+    def find_by_username(self, username: str) -> Dict[str, List[Dict]]:
+        """Every stored row for a username / @handle, by table."""
+        handle = normalize_handle(username)
+        found = {}
+        for table in HANDLE_TABLES:
+            rows = self._query(f"SELECT * FROM {table} WHERE handle = ?", (handle,))
+            if rows:
+                found[table] = rows
+        return found
+
+    def iter_rows(self, table: str, batch_size: int = 5000) -> Iterator[List[Dict]]:
+        """Yield every row of table, batch_size rows at a time."""
+        last = 0
+        while True:
+            rows = self._query(
+                f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, batch_size)
+            )
+            if not rows:
+                return
+            last = rows[-1].pop("_rowid")
+            for row in rows:
+                row.pop("_rowid", None)
+            yield rows
+
+    def last_seen_rows(self, table: str, since: Optional[str] = None) -> List[Dict]:
+        """Rows of table seen at or after `since` (an ISO timestamp); defaults to the latest run."""
+        if since is None:
+            with self._lock:
+                since = self._db.execute(f"SELECT MAX(last_seen) FROM {table}").fetchone()[0]
+            if since is None:
+                return []
+        return self._query(f"SELECT * FROM {table} WHERE last_seen >= ?", (since,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_store_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--entity-store", default=DEFAULT_ENTITY_STORE_PATH,
+                        help="SQLite store that every run's rows are upserted into")
+    parser.add_argument("--no-entity-store", action="store_true", help="Don't record this run in the entity store")
+
+
+def open_entity_store(args: argparse.Namespace) -> Optional[EntityStore]:
+    """The store selected by add_store_arguments(), or None with --no-entity-store."""
+    return None if args.no_entity_store else EntityStore(args.entity_store)
+
+
+def save_to_entity_store(args: argparse.Namespace, table: str, rows: List[Dict], **defaults):
+    """Upsert one table's rows into the store selected on the command line, if any."""
+    store = open_entity_store(args)
+    if store:
+        with store:
+            store.save(table, rows, **defaults)
@@ -0,0 +1,269 @@
+"""
+Minimal EVM JSON-RPC client for ERC-20 holder data.
+
+Reads balances and Transfer logs straight from a node (a hosted Base RPC, or a
+local anvil for testing) instead of going through an explorer API:
+- requests are sent as JSON-RPC batches, one HTTP round trip per batch
+- balanceOf calls are aggregated through Multicall3, so a single eth_call
+  returns hundreds of balances; nodes without Multicall3 (a fresh anvil) fall
+  back to batched plain eth_calls
+- eth_getLogs is walked in block windows that shrink when the node rejects a
+  range as too large (or as returning too many logs); other errors propagate
+
+ABI encoding is done by hand for the three calls we need, so there is no
+web3 dependency.
+
+Usage:
+    rpc = EvmRpcClient("http://127.0.0.1:8545")
+    balances = rpc.balances_of(token, addresses)
+    for logs in rpc.iter_transfer_logs(token, 0, rpc.block_number()):
+        ...
+"""
+
+import itertools
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from scraper_http import HttpClient, RequestFailed
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+BALANCE_OF_SELECTOR = "70a08231"   # balanceOf(address)
+AGGREGATE3_SELECTOR = "82ad56cb"   # aggregate3((address,bool,bytes)[])
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+RPC_BATCH_SIZE = 50            # JSON-RPC requests per HTTP batch
+MULTICALL_CHUNK = 500          # balanceOf calls per aggregate3
+LOG_WINDOW_BLOCKS = 10000      # initial eth_getLogs block range
+
+# eth_getLogs errors that mean "ask for fewer blocks": -32005 is the common
+# "limit exceeded" code; otherwise providers only say so in the message
+LOG_RANGE_ERROR_CODES = {-32005}
+LOG_RANGE_ERROR_MARKERS = (
+    "too many", "returned more than", "block range", "range too", "range is too", "too large", "too wide",
+    "limit exceeded", "size exceeded", "query timeout",
+)
+
+
+class RpcError(RequestFailed):
+    """The node returned a JSON-RPC error object."""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def is_log_range_error(error: RpcError) -> bool:
+    """Did the node reject an eth_getLogs call for covering too many blocks / logs?"""
+    message = str(error).lower()
+    return error.code in LOG_RANGE_ERROR_CODES or any(marker in message for marker in LOG_RANGE_ERROR_MARKERS)
+
+
+def _word(hex_value: str) -> str:
+    return hex_value.rjust(64, "0")
+
+
+def _address_word(address: str) -> str:
+    return _word(address.lower().removeprefix("0x"))
+
+
+def encode_balance_of(address: str) -> str:
+    return BALANCE_OF_SELECTOR + _address_word(address)
+
+
+def encode_aggregate3(target: str, calldatas: Sequence[str]) -> str:
+    """aggregate3 calldata for calls to one target, each with allowFailure=true."""
+    heads, tails = [], []
+    offset = 32 * len(calldatas)
+    for data in calldatas:
+        padded = data + "0" * (-len(data) % 64)
+        element = (
+            _address_word(target)
+            + _word("1")                       # allowFailure
+            + _word(format(96, "x"))           # offset of callData within the tuple
+            + _word(format(len(data) // 2, "x"))
+            + padded
+        )
+        heads.append(_word(format(offset, "x")))
+        tails.append(element)
+        offset += len(element) // 2
+    return (
+        "0x" + AGGREGATE3_SELECTOR
+        + _word(format(32, "x"))
+        + _word(format(len(calldatas), "x"))
+        + "".join(heads)
+        + "".join(tails)
+    )
+
+
+def decode_aggregate3(result: str) -> List[Tuple[bool, str]]:
+    """Decode aggregate3's (bool success, bytes returnData)[] return value."""
+    data = bytes.fromhex(result.removeprefix("0x"))
+
+    def word(pos: int) -> int:
+        return int.from_bytes(data[pos:pos + 32], "big")
+
+    array_start = word(0)
+    count = word(array_start)
+    items_start = array_start + 32
+    decoded = []
+    for i in range(count):
+        element = items_start + word(items_start + 32 * i)
+        success = bool(word(element))
+        bytes_start = element + word(element + 32)
+        length = word(bytes_start)
+        decoded.append((success, data[bytes_start + 32:bytes_start + 32 + length].hex()))
+    return decoded
+
+
+def is_erc20_transfer(log: Dict) -> bool:
+    """
+    Is log an ERC-20 Transfer(from, to, value): the event topic plus two
+    indexed addresses? ERC-721 Transfers share the topic but index the token
+    id as a fourth topic.
+    """
+    topics = log.get("topics") or []
+    return len(topics) == 3 and topics[0].lower() == TRANSFER_TOPIC and not log.get("removed")
+
+
+def decode_transfer_log(log: Dict) -> Dict:
+    """Map a Transfer log (see is_erc20_transfer) onto the transfer store's columns."""
+    topics = log["topics"]
+    return {
+        "block_number": int(log["blockNumber"], 16),
+        "log_index": int(log["logIndex"], 16),
+        "tx_hash": log["transactionHash"],
+        "tx_index": int(log.get("transactionIndex") or "0x0", 16),
+        "from_addr": "0x" + topics[1][-40:].lower(),
+        "to_addr": "0x" + topics[2][-40:].lower(),
+        "value": str(int(log["data"], 16) if log["data"] not in ("0x", "") else 0),
+        "timestamp": 0,
+    }
+
+
+class EvmRpcClient:
+    """Batched JSON-RPC over the shared (rate limited, retried) HTTP client."""
+
+    def __init__(self, url: str, http: Optional[HttpClient] = None, batch_size: int = RPC_BATCH_SIZE):
+        self.url = url
+        self.http = http or HttpClient(use_cache=False)
+        self.batch_size = batch_size
+        self._ids = itertools.count(1)
+        self._multicall: Optional[bool] = None
+
+    def call(self, method: str, params: list) -> Any:
+        return self.batch([(method, params)])[0]
+
+    def batch(self, calls: Sequence[Tuple[str, list]], return_errors: bool = False) -> List[Any]:
+        """
+        Send calls in JSON-RPC batches; results come back in call order.
+
+        A call the node answers with an error raises RpcError, or with
+        return_errors comes back as its RpcError in the call's place.
+        """
+        results = []
+        for start in range(0, len(calls), self.batch_size):
+            chunk = calls[start:start + self.batch_size]
+            requests = [
+                {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+                for method, params in chunk
+            ]
+            response = self.http.post_json(self.url, requests if len(requests) > 1 else requests[0])
+            if isinstance(response, dict):
+                response = [response]
+            by_id = {item.get("id"): item for item in response}
+            for request in requests:
+                item = by_id.get(request["id"])
+                if item is None:
+                    failure = RpcError(f"{request['method']}: no response from node")
+                elif "error" in item:
+                    error = item["error"] if isinstance(item["error"], dict) else {"message": item["error"]}
+                    failure = RpcError(f"{request['method']}: {error.get('message', error)}", error.get("code"))
+                else:
+                    results.append(item["result"])
+                    continue
+                if not return_errors:
+                    raise failure
+                results.append(failure)
+        return results
+
+    def block_number(self) -> int:
+        return int(self.call("eth_blockNumber", []), 16)
+
+    def has_multicall(self) -> bool:
+        if self._multicall is None:
+            self._multicall = self.call("eth_getCode", [MULTICALL3_ADDRESS, "latest"]) not in ("0x", "0x0", None)
+        return self._multicall
+
+    def balances_of(self, token: str, addresses: Sequence[str], block: str = "latest") -> Dict[str, int]:
+        """
+        ERC-20 balances for many addresses.
+
+        With Multicall3 each eth_call covers MULTICALL_CHUNK addresses and the
+        eth_calls themselves are batched, so 10,000 balances take one round
+        trip. Addresses whose call failed are left out.
+        """
+        if not addresses:
+            return {}
+        if not self.has_multicall():
+            raw = self.batch([
+                ("eth_call", [{"to": token, "data": "0x" + encode_balance_of(a)}, block]) for a in addresses
+            ], return_errors=True)
+            return {
+                a.lower(): int(r, 16) if r not in ("0x", "") else 0
+                for a, r in zip(addresses, raw) if not isinstance(r, RpcError)
+            }
+
+        chunks = [addresses[i:i + MULTICALL_CHUNK] for i in range(0, len(addresses), MULTICALL_CHUNK)]
+        raw = self.batch([
+            ("eth_call", [
+                {"to": MULTICALL3_ADDRESS, "data": encode_aggregate3(token, [encode_balance_of(a) for a in chunk])},
+                block,
+            ])
+            for chunk in chunks
+        ])
+        balances = {}
+        for chunk, result in zip(chunks, raw):
+            for address, (success, data) in zip(chunk, decode_aggregate3(result)):
+                if success and data:
+                    balances[address.lower()] = int(data, 16)
+        return balances
+
+    def iter_transfer_logs(
+        self, token: str, from_block: int, to_block: int, window_blocks: int = LOG_WINDOW_BLOCKS
+    ) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Yield (last block covered, decoded Transfer logs) from from_block to to_block.
+
+        Several windows go out in one batch; if the node rejects any of them
+        for range or result limits, the window is halved and the batch retried.
+        Any other RPC error is raised. Logs that aren't ERC-20 Transfers are
+        skipped.
+        """
+        while from_block <= to_block:
+            windows = []
+            start = from_block
+            while start <= to_block and len(windows) < self.batch_size:
+                end = min(start + window_blocks - 1, to_block)
+                windows.append((start, end))
+                start = end + 1
+            try:
+                results = self.batch([
+                    ("eth_getLogs", [{
+                        "address": token,
+                        "topics": [TRANSFER_TOPIC],
+                        "fromBlock": hex(a),
+                        "toBlock": hex(b),
+                    }])
+                    for a, b in windows
+                ])
+            except RpcError as e:
+                if window_blocks == 1 or not is_log_range_error(e):
+                    raise
+                window_blocks = max(1, window_blocks // 2)
+                print(f"  Node rejected log range ({e}), shrinking to {window_blocks} blocks")
+                continue
+
+            logs = [decode_transfer_log(log) for result in results for log in result if is_erc20_transfer(log)]
+            logs.sort(key=lambda tx: (tx["block_number"], tx["log_index"]))
+            yield windows[-1][1], logs
+            from_block = windows[-1][1] + 1
@@ -0,0 +1,237 @@
+"""
+Streaming Excel export shared by all scrapers.
+
+Uses openpyxl's write-only mode: rows are serialized to the sheet's XML as
+they are appended, so memory stays flat and throughput is several times that
+of building a normal Workbook cell by cell. Styles are resolved once per
+column up front; each styled column reuses one template cell whose value is
+swapped per row.
+
+Column widths can't be measured after the fact in write-only mode, so they are
+either given per column or estimated from the header and the first rows.
+
+Usage:
+    from excel_export import ExcelColumn, export_rows
+
+    export_rows("holders.xlsx", rows, sheet_title="Holders", columns=[
+        ExcelColumn("onchain_address", "Wallet Address", width=45),
+        ExcelColumn("balance", "COOKIE Balance", number_format="#,##0.0000"),
+    ])
+"""
+
+import itertools
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+HEADER_FILL = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
+HEADER_FONT = Font(color="FFFFFF", bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal="center")
+
+# Rows buffered to estimate column widths that weren't given explicitly
+WIDTH_SAMPLE_ROWS = 1000
+MAX_AUTO_WIDTH = 50
+
+
+class ExcelColumn:
+    """One output column: row key, header title, width, number format and value conversion."""
+
+    def __init__(
+        self,
+        key: str,
+        title: Optional[str] = None,
+        width: Optional[float] = None,
+        number_format: Optional[str] = None,
+        convert: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.key = key
+        self.title = title or key.replace("_", " ").title()
+        self.width = width
+        self.number_format = number_format
+        self.convert = convert
+
+
+class Styled:
+    """A free-form cell value with a font, for StreamingExcelWriter.write_cells."""
+
+    __slots__ = ("value", "font")
+
+    def __init__(self, value: Any, font: Font):
+        self.value = value
+        self.font = font
+
+
+def excel_value(value: Any) -> Any:
+    """Coerce a row value into something a cell can hold."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # Empty cells aren't written at all, which is the cheapest cell there is
+        return ILLEGAL_CHARACTERS_RE.sub("", value) if value else None
+    if hasattr(value, "item") and not isinstance(value, dict):
+        value = value.item()  # numpy scalars
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (int, float, bool, datetime, date)):
+        return value
+    if isinstance(value, (list, dict, tuple)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _estimate_width(column: ExcelColumn, sample: List[Dict], default_width: Optional[float]) -> float:
+    if column.width is not None:
+        return column.width
+    if default_width is not None:
+        return default_width
+    longest = max((len(str(row.get(column.key, "") or "")) for row in sample), default=0)
+    return min(max(longest, len(column.title)) + 2, MAX_AUTO_WIDTH)
+
+
+class ExcelSheet:
+    """A write-only sheet that takes one row dict at a time."""
+
+    def __init__(
+        self,
+        sheet,
+        columns: Sequence[Union[str, ExcelColumn]],
+        sample: Sequence[Dict] = (),
+        default_width: Optional[float] = None,
+    ):
+        self.sheet = sheet
+        self.columns = [c if isinstance(c, ExcelColumn) else ExcelColumn(c) for c in columns]
+        self.rows_written = 0
+
+        for idx, column in enumerate(self.columns, 1):
+            sheet.column_dimensions[get_column_letter(idx)].width = _estimate_width(column, sample, default_width)
+        sheet.freeze_panes = "A2"
+
+        header = []
+        for column in self.columns:
+            cell = WriteOnlyCell(sheet, value=column.title)
+            cell.fill = HEADER_FILL
+            cell.font = HEADER_FONT
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        sheet.append(header)
+
+        # One styled template cell per formatted column, reused for every row
+        self._templates: List[Optional[WriteOnlyCell]] = []
+        for column in self.columns:
+            template = None
+            if column.number_format:
+                template = WriteOnlyCell(sheet)
+                template.number_format = column.number_format
+            self._templates.append(template)
+        self._fields = list(zip([c.key for c in self.columns], [c.convert for c in self.columns], self._templates))
+
+    def append(self, row: Dict):
+        values = []
+        for key, convert, template in self._fields:
+            value = row.get(key)
+            value = excel_value(convert(value) if convert else value)
+            if template is not None and value is not None:
+                template.value = value
+                value = template
+            values.append(value)
+        self.sheet.append(values)
+        self.rows_written += 1
+
+
+class StreamingExcelWriter:
+    """Write-only workbook; sheets are written in the order they are added."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.workbook = Workbook(write_only=True)
+
+    def add_sheet(
+        self,
+        title: str,
+        columns: Sequence[Union[str, ExcelColumn]],
+        sample: Sequence[Dict] = (),
+        default_width: Optional[float] = None,
+    ) -> "ExcelSheet":
+        """Start a sheet with a styled header row; rows are then added with append()."""
+        return ExcelSheet(self.workbook.create_sheet(title), columns, sample, default_width)
+
+    def write_rows(
+        self,
+        title: str,
+        rows: Iterable[Dict],
+        columns: Optional[Sequence[Union[str, ExcelColumn]]] = None,
+        default_width: Optional[float] = None,
+    ) -> int:
+        """
+        Add a sheet with a styled header row and one row per dict; returns rows written.
+
+        Without columns, the keys of the first row are used. default_width
+        applies to every column without an explicit width; otherwise widths
+        are estimated from the first WIDTH_SAMPLE_ROWS rows.
+        """
+        rows = iter(rows)
+        sample = list(itertools.islice(rows, WIDTH_SAMPLE_ROWS))
+        if columns is None:
+            columns = list(sample[0]) if sample else []
+        sheet = self.add_sheet(title, columns, sample, default_width)
+        for row in itertools.chain(sample, rows):
+            sheet.append(row)
+        return sheet.rows_written
+
+    def write_cells(self, title: str, rows: Iterable[Sequence[Any]], widths: Optional[Sequence[float]] = None):
+        """Add a free-form sheet (e.g. a summary); values may be wrapped in Styled."""
+        sheet = self.workbook.create_sheet(title)
+        for idx, width in enumerate(widths or [], 1):
+            sheet.column_dimensions[get_column_letter(idx)].width = width
+        for row in rows:
+            values = []
+            for value in row:
+                if isinstance(value, Styled):
+                    cell = WriteOnlyCell(sheet, value=excel_value(value.value))
+                    cell.font = value.font
+                    value = cell
+                else:
+                    value = excel_value(value)
+                values.append(value)
+            sheet.append(values)
+
+    def close(self):
+        self.workbook.save(self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+
+
+def export_rows(
+    filename: str,
+    rows: Iterable[Dict],
+    sheet_title: str = "Sheet1",
+    columns: Optional[Sequence[Union[str, ExcelColumn]]] = None,
+    default_width: Optional[float] = None,
+) -> int:
+    """Stream rows into a single-sheet workbook; returns rows written."""
+    with StreamingExcelWriter(filename) as writer:
+        return writer.write_rows(sheet_title, rows, columns, default_width)
+
+
+def unique_by(rows: Iterable[Dict], key: str) -> Iterator[Dict]:
+    """Drop rows whose `key` value was already seen (first one wins); rows without it (or empty) are kept."""
+    seen = set()
+    for row in rows:
+        value = row.get(key)
+        if value not in (None, ""):
+            if value in seen:
+                continue
+            seen.add(value)
+        yield row
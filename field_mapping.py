@@ -0,0 +1,237 @@
+"""
+Declarative field mapping for Cookie.fun API payloads, shared by all scrapers.
+
+Each output field lists the payload keys it may come from, in order of
+preference, and the type it is coerced to. Nested values are addressed with
+paths such as "contracts[0].contractAddress". The first non-empty value wins,
+not merely the first key present.
+
+A field list is prepared once (compile_fields): alias paths are parsed and
+each field's converter is picked by kind. A batch is then normalized column by
+column - each alias is looked up only for the records the earlier aliases left
+empty, and each column is converted in one pass - so fallbacks only cost
+anything for the records that need them, and every scraper gets the same
+coercion. Numbers that don't parse fall back to the field's
+default, and so do int values outside [0, 2**63 - 1], which would overflow
+uint64 or SQLite INTEGER.
+
+normalize_columns() returns NumPy columns, normalize_frame() a DataFrame and
+normalize_records() row dicts for the exporters.
+
+The API client, the Playwright, Selenium and DrissionPage scrapers all map
+agents through AGENT_FIELDS, so a new alias only has to be added here.
+
+Usage:
+    from field_mapping import AGENT_FIELDS, normalize_records
+
+    rows = normalize_records(items, AGENT_FIELDS, source="cookie.fun/agents")
+"""
+
+import math
+import re
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+_PATH_STEP = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+class Field:
+    """One output field: payload aliases in order of preference, coercion and default."""
+
+    KINDS = ("str", "float", "int")
+
+    def __init__(self, name: str, aliases: Sequence[str], kind: str = "str", default: Any = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown field kind '{kind}' (use one of: {', '.join(self.KINDS)})")
+        self.name = name
+        self.aliases = list(aliases)
+        self.kind = kind
+        self.default = default if default is not None else ("" if kind == "str" else 0)
+
+
+AGENT_FIELDS = [
+    Field("username", ["twitterUsername", "twitter", "username"]),
+    Field("user_id", ["agentId", "id", "userId"]),
+    Field("display_name", ["name", "displayName"]),
+    Field("onchain_address", ["contracts[0].contractAddress", "walletAddress", "address", "contractAddress"]),
+    Field("mindshare_score", ["mindshare", "score"], "float"),
+    Field("followers", ["followersCount", "followers"], "int"),
+    Field("market_cap", ["marketCap"], "float"),
+    Field("volume_24h", ["volume24Hours", "volume24h"], "float"),
+    Field("price_usd", ["priceUsd", "price"], "float"),
+    Field("chain", ["chain"]),
+    Field("category", ["category"], default="agent"),
+]
+
+CREATOR_FIELDS = [
+    Field("username", ["twitterHandle", "username"]),
+    Field("user_id", ["userId", "id"]),
+    Field("display_name", ["displayName", "name"]),
+    Field("onchain_address", ["walletAddress", "address"]),
+    Field("snaps_points", ["snapsPoints", "points"], "float"),
+    Field("engagement_score", ["engagementScore"], "float"),
+    Field("followers", ["followers", "followersCount"], "int"),
+    Field("rank", ["rank"], "int"),
+]
+
+LEADERBOARD_FIELDS = [
+    Field("username", ["username", "twitterHandle"]),
+    Field("user_id", ["userId", "id"]),
+    Field("display_name", ["displayName"]),
+    Field("onchain_address", ["walletAddress"]),
+    Field("snaps_points", ["points"], "float"),
+    Field("rank", ["rank"], "int"),
+]
+
+
+# Int fields (counts, ranks) must fit both uint64 and SQLite's signed 64-bit INTEGER
+INT_MIN = 0
+INT_MAX = 2 ** 63 - 1
+
+
+def _parse_path(path: str) -> list:
+    return [name or int(index) for name, index in _PATH_STEP.findall(path)]
+
+
+def _walk(value: Any, steps: list) -> Any:
+    """value[step][step]... through dict keys and list indexes; None where the path breaks."""
+    for step in steps:
+        if isinstance(step, int):
+            value = value[step] if isinstance(value, list) and -len(value) <= step < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(step)
+        else:
+            return None
+    return value
+
+
+def _to_float(value: Any, default: float) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if number != number else number
+
+
+def _to_int(value: Any, default: int) -> int:
+    if type(value) is not int:
+        number = _to_float(value, None)
+        if number is None or number in (math.inf, -math.inf):
+            return default
+        value = int(number)
+    return value if INT_MIN <= value <= INT_MAX else default
+
+
+def _convert_str(values: List[Any], default: str) -> List[str]:
+    return [v if type(v) is str else default if v is None else str(v) for v in values]
+
+
+def _convert_int(values: List[Any], default: int) -> List[int]:
+    return [
+        v if type(v) is int and INT_MIN <= v <= INT_MAX else default if v is None else _to_int(v, default)
+        for v in values
+    ]
+
+
+def _convert_float(values: List[Any], default: float) -> List[float]:
+    default = float(default)
+    return [v if type(v) is float else default if v is None else _to_float(v, default) for v in values]
+
+
+# Per kind: coalesced column (None where every alias was empty) -> typed column
+CONVERTERS = {"str": _convert_str, "int": _convert_int, "float": _convert_float}
+
+
+class FieldMapping:
+    """A field list with its alias paths parsed and its converters picked once, not per record."""
+
+    def __init__(self, fields: Sequence[Field]):
+        self.fields = list(fields)
+        self._plan = []
+        for field in self.fields:
+            sources = []
+            for alias in field.aliases:
+                key, *steps = _parse_path(alias)
+                sources.append((key, steps))
+            self._plan.append((field.name, sources, CONVERTERS[field.kind], field.default))
+
+    def columns(self, records: List[Dict]) -> Dict[str, List]:
+        """
+        One typed list per field. Each alias is looked up column-wise, and
+        only for the records that every earlier alias left empty (None, ""
+        or NaN).
+        """
+        columns = {}
+        for name, sources, convert, default in self._plan:
+            values = [None] * len(records)
+            pending = range(len(records))
+            for key, steps in sources:
+                if steps:
+                    found = [_walk(records[i].get(key), steps) for i in pending]
+                else:
+                    found = [records[i].get(key) for i in pending]
+                missing = []
+                for i, value in zip(pending, found):
+                    if value is None or value == "" or value != value:
+                        missing.append(i)
+                    else:
+                        values[i] = value
+                pending = missing
+                if not pending:
+                    break
+            columns[name] = convert(values, default)
+        return columns
+
+
+_compiled: Dict[Tuple[Field, ...], FieldMapping] = {}
+
+
+def compile_fields(fields: Sequence[Field]) -> FieldMapping:
+    """The FieldMapping for fields, prepared on first use and reused after that."""
+    key = tuple(fields)
+    mapping = _compiled.get(key)
+    if mapping is None:
+        mapping = _compiled[key] = FieldMapping(fields)
+    return mapping
+
+
+def normalize_columns(records: Iterable[Dict], fields: Sequence[Field], **constants) -> Dict[str, np.ndarray]:
+    """
+    Map a batch of payload records onto fields, one NumPy column per field
+    (int64 / float64 / object). Non-dict records are skipped. constants add
+    fixed columns (e.g. source=).
+    """
+    records = [record for record in records if isinstance(record, dict)]
+    dtypes = {"int": np.int64, "float": np.float64}
+    columns = {}
+    for field, (name, values) in zip(fields, compile_fields(fields).columns(records).items()):
+        if field.kind in dtypes:
+            columns[name] = np.array(values, dtype=dtypes[field.kind])
+        else:
+            columns[name] = np.empty(len(values), dtype=object)
+            columns[name][:] = values
+    for name, value in constants.items():
+        columns[name] = np.full(len(records), value, dtype=object)
+    return columns
+
+
+def normalize_frame(records: Iterable[Dict], fields: Sequence[Field], **constants) -> pd.DataFrame:
+    """normalize_columns() as a DataFrame."""
+    return pd.DataFrame(normalize_columns(records, fields, **constants))
+
+
+def normalize_records(records: Iterable[Dict], fields: Sequence[Field], **constants) -> List[Dict]:
+    """Map payload records onto fields as row dicts, for the exporters and the entity store."""
+    records = [record for record in records if isinstance(record, dict)]
+    columns = compile_fields(fields).columns(records)
+    for name, value in constants.items():
+        columns[name] = [value] * len(records)
+    return list(map(dict, map(zip, repeat(list(columns)), zip(*columns.values()))))
+
+
+def has_identity(rows: Iterable[Dict]) -> List[Dict]:
+    """Rows with a username, user id or address, i.e. worth keeping."""
+    return [row for row in rows if row.get("username") or row.get("user_id") or row.get("onchain_address")]
@@ -1,17 +1,32 @@
 #!/usr/bin/env python3
-"""Quick Galxe Leaderboard Scraper - NO API KEY NEEDED"""
-import requests
+"""Quick Galxe Leaderboard Scraper - NO API KEY NEEDED
+
+Usage:
+    python galxe_scraper.py [--output galxe_users.parquet | --format csv]
+"""
+import argparse
 import json
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
 
+from entity_store import add_store_arguments, save_to_entity_store
+from excel_export import export_rows, unique_by
+from scraper_http import HttpClient, RequestFailed
+from scraper_stream import add_output_arguments, export_results
+
+parser = argparse.ArgumentParser(description="Scrape Galxe loyalty point leaderboards")
+add_output_arguments(parser, "galxe_users.xlsx")
+add_store_arguments(parser)
+args = parser.parse_args()
+
+http = HttpClient()
 url = 'https://graphigo.prd.galaxy.eco/query'
 
 # Get popular spaces
 spaces_query = '{ spaces(first: 50) { list { id name alias } } }'
-resp = requests.post(url, json={'query': spaces_query}, timeout=30)
-result = resp.json()
+try:
+    result = http.post_json(url, {'query': spaces_query})
+except RequestFailed as e:
+    print(f"Request Error: {e}")
+    exit(1)
 if 'errors' in result:
     print(f"API Error: {result['errors']}")
     exit(1)
@@ -41,8 +56,7 @@ for space in spaces[:20]:  # Top 20 spaces
     '''
     
     try:
-        lb_resp = requests.post(url, json={'query': lb_query}, timeout=30)
-        data = lb_resp.json()
+        data = http.post_json(url, {'query': lb_query})
         
         if 'data' in data and data['data']['space']:
             ranks = data['data']['space'].get('loyaltyPointsRanks', {}).get('list', [])
@@ -55,34 +69,19 @@ for space in spaces[:20]:  # Top 20 spaces
                     'source': 'galxe.com'
                 })
             print(f"  Got {len(ranks)} users")
-    except:
-        pass
+    except RequestFailed as e:
+        print(f"  ⚠ Skipped after retries: {e}")
+    except (KeyError, TypeError) as e:
+        print(f"  Unexpected response shape: {e}")
 
 print(f"\nTotal users: {len(all_users)}")
 
-# Export
-df = pd.DataFrame(all_users)
-df = df.drop_duplicates(subset=['onchain_address'], keep='first')
-
-wb = Workbook()
-ws = wb.active
-ws.title = "Galxe Users"
-
-header_fill = PatternFill(start_color="1a73e8", end_color="1a73e8", fill_type="solid")
-header_font = Font(color="FFFFFF", bold=True)
-
-for col_idx, column in enumerate(df.columns, 1):
-    cell = ws.cell(row=1, column=col_idx, value=column.replace("_", " ").title())
-    cell.fill = header_fill
-    cell.font = header_font
+# Every space's ranking is kept in the store, one board per space
+save_to_entity_store(args, "leaderboard_entries", all_users)
 
-for row_idx, row in enumerate(df.values, 2):
-    for col_idx, value in enumerate(row, 1):
-        ws.cell(row=row_idx, column=col_idx, value=str(value))
-
-for col in ws.columns:
-    ws.column_dimensions[col[0].column_letter].width = 30
+# Export
+def export_to_excel(rows, filename):
+    count = export_rows(filename, rows, "Galxe Users", default_width=30)
+    print(f"✅ Exported {count} unique users to {filename}")
 
-ws.freeze_panes = "A2"
-wb.save("galxe_users.xlsx")
-print(f"✅ Exported {len(df)} unique users to galxe_users.xlsx")
+export_results(list(unique_by(all_users, 'onchain_address')), args.output, args.format, excel=export_to_excel)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Holder concentration analytics over a HolderTable snapshot.
+
+Everything is computed with NumPy from one sort of the balances and a few
+bincounts - no per-holder Python - so it takes well under a second for a
+million holders:
+- Gini coefficient and Herfindahl-Hirschman index (HHI) of balances
+- Nakamoto coefficient: the fewest holders that together hold over 50%
+- top-N share curve (top 1, 10, 100 ... holders) and top-percent curve
+  (top 0.1%, 1%, 10% ... of holders)
+- histogram of holders and balance per power-of-ten balance bucket
+- breakdown into wallets, contracts and exchanges, and by Blockscout tag
+
+Exchanges are holders whose tags or contract name mention a known exchange;
+tags are matched once per distinct string in the table's pool, not per holder.
+
+The result is a small JSON-serializable dict; write_summary() saves it as the
+artifact dashboards read instead of re-loading full snapshots.
+
+Usage:
+    summary = concentration(HolderTable.load("snapshots/cookie_holders.npz"))
+    write_summary(summary, "cookie_holder_summary.json")
+
+    python holder_analytics.py snapshots/cookie_holders.npz [--output cookie_holder_summary.json]
+"""
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from holder_table import HolderTable, StringPool, address_hex
+
+TOP_N = (1, 10, 50, 100, 1000, 10000)
+TOP_PERCENT = (0.1, 1, 5, 10, 25, 50)
+TOP_HOLDERS = 10
+
+# Lowercase substrings of a tag or contract name that mark an exchange wallet
+EXCHANGE_MARKERS = (
+    "exchange", "cex", "binance", "coinbase", "kraken", "okx", "bybit", "kucoin",
+    "gate.io", "mexc", "bitget", "htx", "huobi", "crypto.com", "upbit", "bitfinex",
+)
+
+CATEGORIES = ("wallet", "contract", "exchange")
+
+
+def split_tags(tags: str) -> List[str]:
+    return [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+
+def exchange_codes(pool: StringPool) -> np.ndarray:
+    """Per pool code: does that string mark an exchange?"""
+    return np.array([any(m in s.lower() for m in EXCHANGE_MARKERS) for s in pool.strings], dtype=bool)
+
+
+def _share(part: float, total: float) -> float:
+    return part / total if total else 0.0
+
+
+def concentration(
+    table: HolderTable,
+    decimals: int = 18,
+    top_n: Sequence[int] = TOP_N,
+    top_percent: Sequence[float] = TOP_PERCENT,
+) -> Dict:
+    """Concentration summary of a holder snapshot (see the module docstring)."""
+    balances = table.balances(decimals)
+    n = len(balances)
+    order = np.argsort(balances, kind="stable")[::-1]
+    desc = balances[order]
+    cum = np.cumsum(desc)
+    total = float(cum[-1]) if n else 0.0
+    positive = int(np.count_nonzero(desc > 0))
+
+    summary = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "holders": n,
+        "holders_with_balance": positive,
+        "total_balance": total,
+        "gini": 0.0,
+        "hhi": 0.0,
+        "nakamoto_coefficient": 0,
+    }
+    if total:
+        # Gini over descending balances: sum((n + 1 - 2j) * x_j) / (n * sum(x)), j = 1..n
+        ranks = n + 1 - 2 * np.arange(1, n + 1, dtype=np.float64)
+        summary["gini"] = float(ranks @ desc / (n * total))
+        summary["hhi"] = float(np.square(desc / total).sum())
+        summary["nakamoto_coefficient"] = int(min(np.searchsorted(cum, total / 2, side="right") + 1, n))
+
+    summary["top_n"] = [
+        {"top": k, "share": _share(float(cum[min(k, n) - 1]), total)} for k in top_n if n
+    ]
+    summary["top_percent"] = []
+    for percent in top_percent:
+        k = min(max(1, math.ceil(n * percent / 100)), n) if n else 0
+        share = _share(float(cum[k - 1]), total) if k else 0.0
+        summary["top_percent"].append({"percent": percent, "holders": k, "share": share})
+
+    summary["histogram"] = []
+    if positive:
+        held = desc[:positive]
+        decades = np.floor(np.log10(held)).astype(np.int64)
+        low = int(decades.min())
+        bucket = decades - low
+        counts = np.bincount(bucket)
+        amounts = np.bincount(bucket, weights=held)
+        for i, (count, amount) in enumerate(zip(counts, amounts)):
+            summary["histogram"].append({
+                "min": 10.0 ** (low + i),
+                "max": 10.0 ** (low + i + 1),
+                "holders": int(count),
+                "balance": float(amount),
+                "share": _share(float(amount), total),
+            })
+
+    # 0 wallet, 1 contract, 2 exchange (an exchange's contracts count as the exchange)
+    exchange = exchange_codes(table.pool)
+    is_exchange = exchange[table.codes["tags"]] | exchange[table.codes["contract_name"]]
+    category = np.where(is_exchange, 2, np.where(table.flags["is_contract"], 1, 0))
+    counts = np.bincount(category, minlength=len(CATEGORIES))
+    amounts = np.bincount(category, weights=balances, minlength=len(CATEGORIES))
+    summary["breakdown"] = {
+        name: {"holders": int(counts[i]), "balance": float(amounts[i]), "share": _share(float(amounts[i]), total)}
+        for i, name in enumerate(CATEGORIES)
+    }
+
+    # Per distinct tags string first, then spread over its individual tags
+    tag_counts = np.bincount(table.codes["tags"], minlength=len(table.pool))
+    tag_amounts = np.bincount(table.codes["tags"], weights=balances, minlength=len(table.pool))
+    tags: Dict[str, List[float]] = {}
+    for code in np.flatnonzero(tag_counts):
+        for tag in split_tags(table.pool.strings[code]):
+            entry = tags.setdefault(tag, [0, 0.0])
+            entry[0] += int(tag_counts[code])
+            entry[1] += float(tag_amounts[code])
+    summary["tags"] = [
+        {"tag": tag, "holders": count, "balance": amount, "share": _share(amount, total)}
+        for tag, (count, amount) in sorted(tags.items(), key=lambda item: item[1][1], reverse=True)
+    ]
+
+    summary["top_holders"] = [
+        {
+            "onchain_address": address_hex(table.addresses[i]),
+            "balance": float(balances[i]),
+            "share": _share(float(balances[i]), total),
+            "category": CATEGORIES[category[i]],
+            "tags": table.pool.strings[table.codes["tags"][i]],
+        }
+        for i in order[:TOP_HOLDERS]
+    ]
+    return summary
+
+
+def summary_rows(summary: Dict, symbol: str = "COOKIE") -> List[List]:
+    """The summary as label / value rows for an Excel summary sheet."""
+    rows = [
+        ["Holders with balance:", summary["holders_with_balance"]],
+        ["Gini coefficient:", round(summary["gini"], 4)],
+        ["Nakamoto coefficient:", summary["nakamoto_coefficient"]],
+        ["HHI:", round(summary["hhi"], 6)],
+    ]
+    for entry in summary["top_n"]:
+        if entry["top"] < summary["holders"]:
+            rows.append([f"Top {entry['top']} share:", f"{entry['share']:.2%}"])
+    for name, entry in summary["breakdown"].items():
+        rows.append([f"{name.capitalize()}s:", entry["holders"], f"{entry['balance']:,.2f} {symbol}",
+                     f"{entry['share']:.2%}"])
+    return rows
+
+
+def write_summary(summary: Dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Holder concentration analytics over a snapshot")
+    parser.add_argument("snapshot", help="HolderTable snapshot (.npz), e.g. from cookie_blockscout_scraper.py --snapshot")
+    parser.add_argument("--output", default="cookie_holder_summary.json", help="Summary artifact to write")
+    parser.add_argument("--decimals", type=int, default=18, help="Token decimals")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Holder Concentration Analytics")
+    print("=" * 60)
+
+    if not os.path.exists(args.snapshot):
+        print(f"❌ Snapshot not found: {args.snapshot}")
+        return
+
+    summary = concentration(HolderTable.load(args.snapshot), args.decimals)
+    write_summary(summary, args.output)
+
+    print(f"📊 {summary['holders']} holders, {summary['total_balance']:,.2f} tokens")
+    print(f"   Gini: {summary['gini']:.4f}")
+    print(f"   Nakamoto coefficient: {summary['nakamoto_coefficient']}")
+    for entry in summary["top_n"]:
+        print(f"   Top {entry['top']}: {entry['share']:.2%}")
+    print(f"\n✅ Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Compact columnar table of token holders.
+
+A holder row from the Blockscout scraper is a dict of nine strings, floats and
+bools - several hundred bytes per holder before pandas copies it all again.
+HolderTable keeps the same data in flat NumPy arrays:
+- addresses as fixed-width 20-byte strings (S20), not 42-character hex
+- raw balances as four little-endian uint64 limbs per holder, so any uint256
+  amount is stored exactly; floats are only derived on demand for display
+- tags, contract names, ENS domains and sources as uint32 codes into one
+  interned string pool (almost all holders share the empty string)
+- is_contract / is_verified as bool arrays
+
+That is under 70 bytes per holder, so snapshots of tokens with millions of
+holders fit comfortably in memory, and a snapshot saved with save() is a
+compact .npz that loads without pickle.
+
+Usage:
+    table = HolderTable.from_pages(scraper.iter_holder_pages())
+    for row in table.iter_rows(table.by_balance()):
+        ...
+    table.save("snapshots/cookie_holders.npz")
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+LIMBS = 4                       # 4 x 64 bits = uint256
+LIMB_BITS = 64
+LIMB_MASK = (1 << LIMB_BITS) - 1
+MAX_BALANCE = (1 << (LIMBS * LIMB_BITS)) - 1
+
+ADDRESS_BYTES = 20
+
+# Holders converted from lists to arrays at a time while building
+CHUNK_ROWS = 65536
+
+# Interned string columns and the row keys they come from
+STRING_COLUMNS = ["contract_name", "tags", "ens_domain", "source"]
+FLAG_COLUMNS = ["is_contract", "is_verified"]
+
+
+def address_bytes(address: str) -> bytes:
+    """0x-prefixed hex address -> 20 raw bytes."""
+    raw = bytes.fromhex(address[2:] if address[:2].lower() == "0x" else address)
+    if len(raw) != ADDRESS_BYTES:
+        raise ValueError(f"Not a 20-byte address: {address}")
+    return raw
+
+
+def address_hex(raw: bytes) -> str:
+    # numpy strips trailing NUL bytes from S20 items, so pad them back
+    return "0x" + raw.ljust(ADDRESS_BYTES, b"\0").hex()
+
+
+def to_limbs(value: int) -> List[int]:
+    if not 0 <= value <= MAX_BALANCE:
+        raise ValueError(f"Balance out of uint256 range: {value}")
+    return [(value >> (LIMB_BITS * i)) & LIMB_MASK for i in range(LIMBS)]
+
+
+def from_limbs(limbs: Sequence[int]) -> int:
+    value = 0
+    for i, limb in enumerate(limbs):
+        value |= int(limb) << (LIMB_BITS * i)
+    return value
+
+
+class StringPool:
+    """Interns strings to dense uint32 codes; code 0 is always the empty string."""
+
+    def __init__(self, strings: Sequence[str] = ("",)):
+        self.strings: List[str] = list(strings)
+        self._codes: Dict[str, int] = {s: i for i, s in enumerate(self.strings)}
+
+    def code(self, value) -> int:
+        value = value or ""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class _ColumnBuffer:
+    """Plain-list columns for up to CHUNK_ROWS holders on their way into arrays."""
+
+    def __init__(self):
+        self.addresses: List[bytes] = []
+        self.limbs: List[int] = []
+        self.flags = {name: [] for name in FLAG_COLUMNS}
+        self.codes = {name: [] for name in STRING_COLUMNS}
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def append(self, row: Dict, pool: StringPool):
+        self.addresses.append(address_bytes(row["onchain_address"]))
+        self.limbs.extend(to_limbs(int(row.get("balance_raw") or 0)))
+        for name, values in self.flags.items():
+            values.append(bool(row.get(name)))
+        for name, values in self.codes.items():
+            values.append(pool.code(row.get(name)))
+
+    def to_arrays(self):
+        return (
+            np.array(self.addresses, dtype=f"S{ADDRESS_BYTES}"),
+            np.array(self.limbs, dtype=np.uint64).reshape(-1, LIMBS),
+            {name: np.array(values, dtype=bool) for name, values in self.flags.items()},
+            {name: np.array(values, dtype=np.uint32) for name, values in self.codes.items()},
+        )
+
+
+class HolderTable:
+    """Holder snapshot as parallel arrays; row i of every array is one holder."""
+
+    def __init__(
+        self,
+        addresses: np.ndarray,
+        limbs: np.ndarray,
+        flags: Dict[str, np.ndarray],
+        codes: Dict[str, np.ndarray],
+        pool: StringPool,
+    ):
+        self.addresses = addresses      # (n,) S20
+        self.limbs = limbs              # (n, LIMBS) uint64, least significant limb first
+        self.flags = flags              # name -> (n,) bool
+        self.codes = codes              # name -> (n,) uint32 into pool
+        self.pool = pool
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[List[Dict]]) -> "HolderTable":
+        """Build from pages of holder dicts without keeping them."""
+        builder = HolderTableBuilder()
+        for rows in pages:
+            builder.add(rows)
+        return builder.build()
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> "HolderTable":
+        return cls.from_pages([rows])
+
+    @classmethod
+    def empty(cls) -> "HolderTable":
+        return cls(
+            np.empty(0, dtype=f"S{ADDRESS_BYTES}"),
+            np.empty((0, LIMBS), dtype=np.uint64),
+            {name: np.empty(0, dtype=bool) for name in FLAG_COLUMNS},
+            {name: np.empty(0, dtype=np.uint32) for name in STRING_COLUMNS},
+            StringPool(),
+        )
+
+    def __len__(self):
+        return len(self.addresses)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays and the string pool."""
+        arrays = [self.addresses, self.limbs, *self.flags.values(), *self.codes.values()]
+        return sum(a.nbytes for a in arrays) + sum(len(s.encode()) for s in self.pool.strings)
+
+    def balance_raw(self, i: int) -> int:
+        return from_limbs(self.limbs[i])
+
+    def balances(self, decimals: int = 18) -> np.ndarray:
+        """Balances as float64 token amounts, for display and statistics only."""
+        weights = np.array([2.0 ** (LIMB_BITS * i) for i in range(LIMBS)])
+        return (self.limbs.astype(np.float64) @ weights) / (10.0 ** decimals)
+
+    def by_balance(self) -> np.ndarray:
+        """Row indexes by exact raw balance, largest first."""
+        # lexsort uses its last key as the primary one: most significant limb
+        order = np.lexsort([self.limbs[:, i] for i in range(LIMBS)])
+        return order[::-1]
+
+    def strings(self, name: str) -> np.ndarray:
+        """An interned column decoded back to an object array of str."""
+        return np.array(self.pool.strings, dtype=object)[self.codes[name]]
+
+    def row(self, i: int, decimals: int = 18) -> Dict:
+        """Holder i in the scrapers' dict format."""
+        raw = self.balance_raw(i)
+        return {
+            "onchain_address": address_hex(self.addresses[i]),
+            "balance": raw / (10 ** decimals),
+            "balance_raw": str(raw),
+            **{name: bool(self.flags[name][i]) for name in FLAG_COLUMNS},
+            **{name: self.pool.strings[self.codes[name][i]] for name in STRING_COLUMNS},
+        }
+
+    def iter_rows(self, order: Optional[np.ndarray] = None, decimals: int = 18) -> Iterator[Dict]:
+        """Rows as dicts (for exporters and the entity store), generated one at a time."""
+        for i in (range(len(self)) if order is None else order):
+            yield self.row(int(i), decimals)
+
+    def save(self, path: str):
+        # Through a file object, so numpy doesn't append ".npz" to other names
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                addresses=self.addresses,
+                limbs=self.limbs,
+                pool=np.array(self.pool.strings, dtype=np.str_),
+                **{f"flag_{name}": values for name, values in self.flags.items()},
+                **{f"code_{name}": values for name, values in self.codes.items()},
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "HolderTable":
+        with np.load(path) as data:
+            return cls(
+                data["addresses"],
+                data["limbs"],
+                {name: data[f"flag_{name}"] for name in FLAG_COLUMNS},
+                {name: data[f"code_{name}"] for name in STRING_COLUMNS},
+                StringPool([str(s) for s in data["pool"]]),
+            )
+
+
+class HolderTableBuilder:
+    """
+    Accumulates holder pages into a HolderTable, e.g. alongside a sink.
+
+    Pages are buffered as plain column lists and converted to arrays every
+    CHUNK_ROWS rows, so at most one chunk exists in both forms at once.
+    """
+
+    def __init__(self):
+        self.pool = StringPool()
+        self._chunks = []
+        self._buffer = _ColumnBuffer()
+
+    def add(self, rows: Iterable[Dict]):
+        for row in rows:
+            self._buffer.append(row, self.pool)
+        if len(self._buffer) >= CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if len(self._buffer):
+            self._chunks.append(self._buffer.to_arrays())
+            self._buffer = _ColumnBuffer()
+
+    def build(self) -> HolderTable:
+        self._flush()
+        chunks, self._chunks = self._chunks, []
+        if not chunks:
+            return HolderTable.empty()
+        return HolderTable(
+            np.concatenate([chunk[0] for chunk in chunks]),
+            np.concatenate([chunk[1] for chunk in chunks]),
+            {name: np.concatenate([chunk[2][name] for chunk in chunks]) for name in FLAG_COLUMNS},
+            {name: np.concatenate([chunk[3][name] for chunk in chunks]) for name in STRING_COLUMNS},
+            self.pool,
+        )
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Cross-source identity resolution: address <-> handle <-> user id.
+
+Records from every scraper (Cookie.fun agents and creators, Galxe leaderboard
+addresses, COOKIE holders) are grouped into entities: two records belong to
+the same entity when they share an onchain address, a username / @handle, or
+a user id on the same platform - directly or through a chain of other
+records. Grouping is a union-find over the records, with one hash lookup per
+identifier, so it runs in near-linear time and scales to millions of rows.
+
+Identifiers are normalized before matching: 0x addresses and handles are
+compared case-insensitively, handles without the leading "@". User ids are
+namespaced by platform (the part of `source` before the first "/"), so
+Cookie.fun and Galxe ids never collide. Records without any identifier stay
+entities of their own instead of being dropped.
+
+Usage:
+    resolver = IdentityResolver()
+    resolver.add_all(records)
+    merged = list(resolver.entities())
+
+    python identity_resolver.py [--entity-store cookie_entities.sqlite] [--output entities.parquet]
+"""
+
+import argparse
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from entity_store import DEFAULT_ENTITY_STORE_PATH, TABLES, EntityStore, normalize_handle
+from excel_export import export_rows
+from scraper_stream import add_output_arguments, export_results
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Record fields listed first in merged rows; any other fields follow
+MERGED_FIELDS = ["entity_id", "username", "display_name", "user_id", "onchain_address",
+                 "usernames", "addresses", "user_ids", "source", "sources", "records"]
+
+
+IDENTIFIER_FIELDS = {"address": "addresses", "handle": "usernames", "user_id": "user_ids"}
+
+
+def address_key(address) -> Optional[str]:
+    """EVM addresses compare case-insensitively; anything else (e.g. Solana) is kept as is."""
+    if not isinstance(address, str) or not address.strip():
+        return None
+    address = address.strip()
+    if address[:2].lower() == "0x":
+        address = address.lower()
+        if address == ZERO_ADDRESS:
+            return None
+    return address
+
+
+def platform(source) -> str:
+    return str(source or "").split("/", 1)[0].strip().lower()
+
+
+def identity_keys(record: Dict) -> List[Tuple[str, str]]:
+    """The identifiers a record can be matched on."""
+    keys = []
+    address = address_key(record.get("onchain_address") or record.get("address"))
+    if address:
+        keys.append(("address", address))
+    handle = normalize_handle(record.get("username"))
+    if handle:
+        keys.append(("handle", handle))
+    user_id = record.get("user_id")
+    if user_id not in (None, ""):
+        keys.append(("user_id", f"{platform(record.get('source'))}:{user_id}"))
+    return keys
+
+
+class IdentityResolver:
+    """Union-find over records; identifiers are hash-indexed to the first record carrying them."""
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self._parent: List[int] = []
+        self._size: List[int] = []
+        self._keys: List[List[Tuple[str, str]]] = []
+        self._index: Dict[Tuple[str, str], int] = {}
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]  # path halving
+            i = parent[i]
+        return i
+
+    def _union(self, a: int, b: int):
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+
+    def add(self, record: Dict) -> int:
+        i = len(self.records)
+        self.records.append(record)
+        self._parent.append(i)
+        self._size.append(1)
+        keys = identity_keys(record)
+        self._keys.append(keys)
+        for key in keys:
+            first = self._index.setdefault(key, i)
+            if first != i:
+                self._union(first, i)
+        return i
+
+    def add_all(self, records: Iterable[Dict]) -> int:
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+        return count
+
+    def entity_of(self, address: Optional[str] = None, username: Optional[str] = None) -> Optional[int]:
+        """Entity id (the root record index) for an address or username, if any record has it."""
+        key = ("address", address_key(address)) if address else ("handle", normalize_handle(username))
+        first = self._index.get(key)
+        return None if first is None else self._find(first)
+
+    def entity_count(self) -> int:
+        return sum(1 for i in range(len(self.records)) if self._parent[i] == i)
+
+    def entities(self) -> Iterator[Dict]:
+        """
+        One merged row per entity, in order of each entity's first record.
+
+        Scalar fields take the first non-empty value across the entity's
+        records; every distinct username, address, user id and source is
+        listed as well.
+        """
+        merged: Dict[int, Dict] = {}
+        identifiers: Dict[int, Dict[str, Dict[str, None]]] = {}
+        for i, record in enumerate(self.records):
+            root = self._find(i)
+            row = merged.get(root)
+            if row is None:
+                # The entity's first record: take it as is, later ones only fill gaps
+                row = merged[root] = {"entity_id": root, **record}
+                ids = identifiers[root] = {"usernames": {}, "addresses": {}, "user_ids": {}, "sources": {}}
+            else:
+                ids = identifiers[root]
+                for field, value in record.items():
+                    if value not in (None, "") and row.get(field) in (None, ""):
+                        row[field] = value
+            for kind, value in self._keys[i]:
+                ids[IDENTIFIER_FIELDS[kind]][value] = None
+            if record.get("source"):
+                ids["sources"][record["source"]] = None
+
+        for root, row in merged.items():
+            for field, values in identifiers[root].items():
+                row[field] = ", ".join(values)
+            row["records"] = self._size[root]
+            yield row
+
+
+def resolve(records: Iterable[Dict]) -> List[Dict]:
+    """Merge records into one row per entity."""
+    resolver = IdentityResolver()
+    resolver.add_all(records)
+    return list(resolver.entities())
+
+
+def iter_store_records(store: EntityStore) -> Iterator[Dict]:
+    """Every row in the entity store, as the record the scraper originally produced."""
+    for table in TABLES:
+        for rows in store.iter_rows(table):
+            for row in rows:
+                record = json.loads(row["data"]) if row.get("data") else {}
+                record.setdefault("source", row.get("source"))
+                yield record
+
+
+def export_to_excel(data: list, filename: str = "cookie_entities.xlsx"):
+    keys = list(dict.fromkeys(key for record in data for key in record))
+    columns = [c for c in MERGED_FIELDS if c in keys] + [c for c in keys if c not in MERGED_FIELDS]
+    count = export_rows(filename, data, "Entities", columns)
+    print(f"\n✅ Exported {count} entities to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge every scraper's records into cross-source entities")
+    parser.add_argument("--entity-store", default=DEFAULT_ENTITY_STORE_PATH, help="Entity store to read records from")
+    add_output_arguments(parser, "cookie_entities.xlsx")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Cross-source Identity Resolution")
+    print("=" * 60)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+
+    resolver = IdentityResolver()
+    with EntityStore(args.entity_store) as store:
+        count = resolver.add_all(iter_store_records(store))
+    print(f"📊 Read {count} records from {args.entity_store}")
+
+    entities = list(resolver.entities())
+    linked = sum(1 for entity in entities if entity["records"] > 1)
+    print(f"  ✓ {len(entities)} entities, {linked} linking more than one record")
+
+    if entities:
+        export_results(entities, args.output, args.format, excel=export_to_excel)
+    else:
+        print("\n❌ The entity store is empty. Run the scrapers first.")
+
+    print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    main()
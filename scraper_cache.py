@@ -0,0 +1,246 @@
+"""
+Persistent on-disk HTTP response cache for the scraper request layer.
+
+Responses to GET requests are stored in a SQLite file keyed by URL + params
+(plus a hash of the Authorization / API key header, so accounts never share
+entries), together with their `ETag` / `Last-Modified` validators:
+- within an endpoint's TTL the cached body is returned without a request
+- after the TTL the request is sent conditionally (If-None-Match /
+  If-Modified-Since); a 304 refreshes the entry and returns the cached body
+
+TTLs are matched per endpoint by URL substring (first match wins) and can be
+overridden with SCRAPER_CACHE_TTLS="pattern=seconds,...". A TTL of 0 always
+revalidates, which is still one cheap 304 for unchanged pages - so a TTL-0
+response without a validator can never be reused and is not stored at all.
+
+Entries older than SCRAPER_CACHE_MAX_AGE seconds (default a week) are evicted,
+then the oldest ones until the bodies fit in SCRAPER_CACHE_MAX_MB (default
+512), when the cache is opened and every EVICT_EVERY stores after that.
+
+Set SCRAPER_CACHE=0 to disable the cache, SCRAPER_CACHE_DIR to move it.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", ".scraper_cache")
+
+# (URL substring, TTL seconds). Leaderboards and holder lists change all the
+# time and are always revalidated; token metadata barely changes.
+DEFAULT_TTLS: List[Tuple[str, float]] = [
+    ("/holders", 0),
+    ("/transfers", 0),
+    ("base.blockscout.com/api/v2/tokens/", 3600),
+    ("action=tokeninfo", 3600),
+    ("api.cookie.fun/v2/leaderboard", 300),
+    ("api.cookie.fun/v2/", 600),
+]
+DEFAULT_TTL = 0.0
+
+# Query params left out of cache keys so API keys are never written to disk
+SECRET_PARAMS = {"apikey", "api_key"}
+
+# Request headers that identify the caller; hashed into the key, never stored
+AUTH_HEADERS = ("authorization", "x-api-key")
+
+MAX_AGE = float(os.getenv("SCRAPER_CACHE_MAX_AGE", 7 * 24 * 3600))
+MAX_BYTES = int(float(os.getenv("SCRAPER_CACHE_MAX_MB", 512)) * 1024 * 1024)
+EVICT_EVERY = 1000
+
+
+def parse_ttls(spec: str) -> List[Tuple[str, float]]:
+    """Parse "pattern=seconds,..." into TTL rules"""
+    rules = []
+    for part in spec.split(","):
+        if "=" in part:
+            pattern, seconds = part.rsplit("=", 1)
+            rules.append((pattern.strip(), float(seconds)))
+    return rules
+
+
+def auth_identity(*header_sets) -> Optional[str]:
+    """Hash of the auth headers among header_sets (later sets win), or None without any."""
+    found = {}
+    for headers in header_sets:
+        for name, value in (headers or {}).items():
+            if name.lower() in AUTH_HEADERS and value:
+                found[name.lower()] = str(value)
+    if not found:
+        return None
+    return hashlib.sha256(json.dumps(found, sort_keys=True).encode()).hexdigest()
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, body: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def json(self):
+        return json.loads(self.body)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """SQLite-backed response cache, safe to share between threads."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_rules: Optional[List[Tuple[str, float]]] = None,
+        max_age: float = MAX_AGE,
+        max_bytes: int = MAX_BYTES,
+    ):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl_rules = ttl_rules if ttl_rules is not None else DEFAULT_TTLS
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evicted": 0}
+        self._stores_since_evict = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+        if "size" not in columns:
+            # Caches from before eviction: add the size column and fill it in once
+            self._db.execute("ALTER TABLE responses ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("UPDATE responses SET size = LENGTH(CAST(body AS BLOB))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_fetched ON responses (fetched_at)")
+        self._db.commit()
+        self.evict()
+
+    @staticmethod
+    def full_url(url: str, params: Optional[dict] = None) -> str:
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+        return f"{url}?{urlencode(items)}" if items else url
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict] = None, identity: Optional[str] = None) -> str:
+        """identity: auth_identity() of the request, so each account gets its own entries."""
+        key = HttpCache.full_url(url, params)
+        if identity:
+            key += "\n" + identity
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def ttl_for(self, url: str, params: Optional[dict] = None) -> float:
+        full = self.full_url(url, params)
+        for pattern, ttl in self.ttl_rules:
+            if pattern in full:
+                return ttl
+        return DEFAULT_TTL
+
+    def get(self, url: str, params: Optional[dict] = None, identity: Optional[str] = None) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?",
+                (self.make_key(url, params, identity),),
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def is_fresh(self, entry: CachedResponse, url: str, params: Optional[dict] = None) -> bool:
+        return time.time() - entry.fetched_at < self.ttl_for(url, params)
+
+    def store(self, url: str, params: Optional[dict], body: str, headers, identity: Optional[str] = None) -> None:
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified and self.ttl_for(url, params) <= 0:
+            # Never fresh and nothing to revalidate with: the entry could only take up space
+            with self._lock:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (self.make_key(url, params, identity),))
+                self._db.commit()
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, url, body, etag, last_modified, fetched_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(url, params, identity),
+                    self.full_url(url, params),
+                    body,
+                    etag,
+                    last_modified,
+                    time.time(),
+                    len(body.encode()),
+                ),
+            )
+            self._db.commit()
+            self.stats["stores"] += 1
+            self._stores_since_evict += 1
+            evict = self._stores_since_evict >= EVICT_EVERY
+        if evict:
+            self.evict()
+
+    def touch(self, url: str, params: Optional[dict] = None, identity: Optional[str] = None) -> None:
+        """Mark an entry as just revalidated (after a 304)."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ? WHERE key = ?",
+                (time.time(), self.make_key(url, params, identity)),
+            )
+            self._db.commit()
+
+    def evict(self) -> int:
+        """Drop entries older than max_age, then the oldest until the bodies fit in max_bytes."""
+        with self._lock:
+            self._stores_since_evict = 0
+            removed = self._db.execute(
+                "DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.max_age,)
+            ).rowcount
+            removed += self._db.execute(
+                """DELETE FROM responses WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY fetched_at DESC, key) AS kept FROM responses
+                    ) WHERE kept > ?
+                )""",
+                (self.max_bytes,),
+            ).rowcount
+            self._db.commit()
+            self.stats["evicted"] += removed
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_default_cache: Optional[HttpCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """The shared cache, or None when disabled with SCRAPER_CACHE=0."""
+    global _default_cache
+    if os.getenv("SCRAPER_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            rules = parse_ttls(os.getenv("SCRAPER_CACHE_TTLS", "")) + DEFAULT_TTLS
+            _default_cache = HttpCache(os.path.join(CACHE_DIR, "http_cache.sqlite"), rules)
+    return _default_cache
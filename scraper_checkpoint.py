@@ -0,0 +1,125 @@
+"""
+Crawl checkpoints for resumable pagination.
+
+A checkpoint is two files:
+- `<name>.rows.jsonl` - every row collected so far, appended page by page
+- `<name>.state.json` - the pagination cursor, page number and row count,
+  replaced atomically after the page's rows are safely on disk
+
+If the process dies mid-page, the state still points at the previous page and
+any rows past its recorded count are ignored on resume, so no page is lost or
+duplicated. Writing is O(page) per page, not O(rows so far); on resume, load()
+only restores the cursor and iter_rows() reads the saved rows back a chunk at
+a time, so a large crawl is never held in memory at once.
+
+Usage:
+    checkpoint = CrawlCheckpoint("blockscout_holders_0xc004...")
+    if resume:
+        cursor, page = checkpoint.load()
+        for rows in checkpoint.iter_rows():
+            ...
+    else:
+        checkpoint.reset()
+    ...
+    checkpoint.append_page(page_rows, next_cursor, page)
+"""
+
+import json
+import os
+import time
+from typing import Any, Iterator, List, Tuple
+
+CHECKPOINT_DIR = os.getenv("SCRAPER_CHECKPOINT_DIR", ".scraper_checkpoints")
+
+
+class CrawlCheckpoint:
+    """Durable cursor + rows for one paginated crawl."""
+
+    def __init__(self, name: str, directory: str = CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.rows_path = os.path.join(directory, f"{name}.rows.jsonl")
+        self.state_path = os.path.join(directory, f"{name}.state.json")
+        self.state = {"cursor": None, "page": 0, "rows": 0, "done": False}
+
+    def exists(self) -> bool:
+        return os.path.exists(self.state_path)
+
+    def load(self) -> Tuple[Any, int]:
+        """
+        Return (cursor, last completed page) from the last checkpoint.
+
+        Rows are not read here; iterate them with iter_rows().
+        """
+        if not self.exists():
+            return None, 0
+        with open(self.state_path) as f:
+            self.state = json.load(f)
+
+        if not os.path.exists(self.rows_path):
+            open(self.rows_path, "w").close()
+        with open(self.rows_path, "rb+") as f:
+            # Skip the committed lines without parsing them, then drop
+            # anything written after the last committed page
+            count = 0
+            while count < self.state["rows"] and f.readline():
+                count += 1
+            self.state["rows"] = count
+            f.truncate(f.tell())
+
+        return self.state["cursor"], self.state["page"]
+
+    @property
+    def rows(self) -> int:
+        """Rows saved by the committed pages."""
+        return self.state["rows"]
+
+    def iter_rows(self, chunk_rows: int = 1000) -> Iterator[List[dict]]:
+        """The committed rows, chunk_rows at a time (call load() first)."""
+        if not os.path.exists(self.rows_path):
+            return
+        chunk = []
+        remaining = self.state["rows"]
+        with open(self.rows_path, "rb") as f:
+            for line in f:
+                if remaining == 0:
+                    break
+                chunk.append(json.loads(line))
+                remaining -= 1
+                if len(chunk) == chunk_rows:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    @property
+    def done(self) -> bool:
+        return self.state.get("done", False)
+
+    def reset(self):
+        """Start a fresh crawl, discarding any previous checkpoint."""
+        self.state = {"cursor": None, "page": 0, "rows": 0, "done": False}
+        open(self.rows_path, "w").close()
+        self._write_state()
+
+    def append_page(self, rows: List[dict], next_cursor: Any, page: int):
+        """Persist one page of rows, then advance the cursor."""
+        with open(self.rows_path, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.state.update(cursor=next_cursor, page=page, rows=self.state["rows"] + len(rows))
+        self._write_state()
+
+    def mark_done(self):
+        self.state["done"] = True
+        self._write_state()
+
+    def _write_state(self):
+        self.state["updated_at"] = time.time()
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
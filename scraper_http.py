@@ -0,0 +1,263 @@
+"""
+Common HTTP request layer for the scrapers.
+
+Wraps the shared rate limiter with classified retries:
+- timeouts, connection errors, 5xx and 429 are transient and retried with
+  exponential backoff and full jitter (429/503 also honour Retry-After)
+- other 4xx and invalid JSON are permanent and fail immediately
+
+When retries run out, a request raises instead of returning an empty result,
+so pagination loops can tell "the API failed" apart from "no more data".
+Every failed attempt is charged to a per-run error budget; once that is spent
+all further requests fail fast with ErrorBudgetExceeded instead of hammering a
+broken API.
+
+GET responses go through the on-disk cache in scraper_cache.py: fresh entries
+are served without a request, stale ones are revalidated conditionally.
+
+Usage:
+    from scraper_http import HttpClient, RequestFailed
+
+    http = HttpClient()
+    data = http.get_json(url, params={"page": 1})
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import aiohttp
+import requests
+
+from scraper_cache import HttpCache, auth_identity, get_http_cache
+from scraper_ratelimit import RateLimitedSession, RateLimiter, get_rate_limiter, parse_retry_after
+
+
+class RequestFailed(Exception):
+    """A request did not produce a usable response."""
+
+
+class PermanentRequestError(RequestFailed):
+    """Non-retryable failure (4xx other than 429, invalid JSON); status is the HTTP status, if any."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class TransientRequestError(RequestFailed):
+    """Retryable failure that persisted through every attempt."""
+
+
+class ErrorBudgetExceeded(RequestFailed):
+    """The run has used up its error budget."""
+
+
+class _RetryableBody(Exception):
+    """Raised internally when a 200 response body signals a transient error."""
+
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504, 520, 521, 522, 524}
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        return max(backoff, retry_after or 0.0)
+
+
+class ErrorBudget:
+    """Thread-safe count of failed attempts allowed in one run."""
+
+    def __init__(self, max_errors: int = 100):
+        self.max_errors = max_errors
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def charge(self, reason: str):
+        with self._lock:
+            self.errors += 1
+            if self.errors > self.max_errors:
+                raise ErrorBudgetExceeded(
+                    f"error budget of {self.max_errors} failed attempts exhausted (last: {reason})"
+                )
+
+    def check(self):
+        if self.errors > self.max_errors:
+            raise ErrorBudgetExceeded(f"error budget of {self.max_errors} failed attempts exhausted")
+
+
+_default_budget = ErrorBudget(int(os.getenv("SCRAPER_ERROR_BUDGET", "100")))
+
+
+def get_error_budget() -> ErrorBudget:
+    """The per-run (per-process) error budget shared by all scrapers."""
+    return _default_budget
+
+
+class HttpClient:
+    """Synchronous JSON client: rate limited, retried, budgeted."""
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        policy: Optional[RetryPolicy] = None,
+        budget: Optional[ErrorBudget] = None,
+        cache: Optional[HttpCache] = None,
+        use_cache: bool = True,
+    ):
+        self.session = session or RateLimitedSession()
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or get_error_budget()
+        self.cache = cache or (get_http_cache() if use_cache else None)
+
+    def request_json(
+        self,
+        method: str,
+        url: str,
+        retry_on_body: Optional[Callable[[Any], bool]] = None,
+        timeout: float = 30,
+        **kwargs,
+    ) -> Any:
+        """
+        Send a request and return the decoded JSON body.
+
+        retry_on_body(data) may flag a 200 response as transient, for APIs
+        that report rate limiting in the body (e.g. BaseScan's "NOTOK"); such a
+        reply backs off the host's rate limiter like a 429 instead of counting
+        as a success.
+        """
+        params = kwargs.get("params")
+        cache = self.cache if method == "GET" else None
+        identity = auth_identity(self.session.headers, kwargs.get("headers")) if cache else None
+        cached = cache.get(url, params, identity) if cache else None
+        if cached is not None:
+            if cache.is_fresh(cached, url, params):
+                cache.stats["fresh_hits"] += 1
+                return cached.json()
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.conditional_headers()}
+
+        last_error = ""
+        for attempt in range(1, self.policy.max_attempts + 1):
+            self.budget.check()
+            retry_after = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code == 304 and cached is not None:
+                    cache.touch(url, params, identity)
+                    cache.stats["revalidated"] += 1
+                    return cached.json()
+                if response.status_code in RETRYABLE_STATUS:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise TransientRequestError(f"HTTP {response.status_code}")
+                if response.status_code >= 400:
+                    raise PermanentRequestError(f"HTTP {response.status_code} for {url}", response.status_code)
+                try:
+                    data = response.json()
+                except (json.JSONDecodeError, ValueError):
+                    raise PermanentRequestError(f"Invalid JSON response from {url}")
+                if retry_on_body and retry_on_body(data):
+                    limiter = getattr(self.session, "limiter", None)
+                    if limiter:
+                        limiter.record_body_throttled(url)
+                    raise _RetryableBody(str(data)[:200])
+                if cache:
+                    cache.stats["misses"] += 1
+                    cache.store(url, params, response.text, response.headers, identity)
+                return data
+            except PermanentRequestError:
+                self.budget.charge(url)
+                raise
+            except (TransientRequestError, _RetryableBody, requests.Timeout, requests.ConnectionError) as e:
+                last_error = f"{type(e).__name__}: {e}"
+                self.budget.charge(last_error)
+            if attempt < self.policy.max_attempts:
+                time.sleep(self.policy.delay(attempt, retry_after))
+
+        raise TransientRequestError(f"{url} failed after {self.policy.max_attempts} attempts ({last_error})")
+
+    def get_json(self, url: str, params: Optional[dict] = None, **kwargs) -> Any:
+        return self.request_json("GET", url, params=params, **kwargs)
+
+    def post_json(self, url: str, json_body: Any = None, **kwargs) -> Any:
+        return self.request_json("POST", url, json=json_body, **kwargs)
+
+
+async def request_json_async(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    policy: Optional[RetryPolicy] = None,
+    budget: Optional[ErrorBudget] = None,
+    limiter: Optional[RateLimiter] = None,
+    retry_on_body: Optional[Callable[[Any], bool]] = None,
+    cache: Optional[HttpCache] = None,
+    **kwargs,
+) -> Any:
+    """aiohttp counterpart of HttpClient.request_json, with the same classification and caching."""
+    policy = policy or RetryPolicy()
+    budget = budget or get_error_budget()
+    limiter = limiter or get_rate_limiter()
+
+    params = kwargs.get("params")
+    cache = cache if method == "GET" else None
+    identity = auth_identity(session.headers, kwargs.get("headers")) if cache else None
+    cached = cache.get(url, params, identity) if cache else None
+    if cached is not None:
+        if cache.is_fresh(cached, url, params):
+            cache.stats["fresh_hits"] += 1
+            return cached.json()
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.conditional_headers()}
+
+    last_error = ""
+    for attempt in range(1, policy.max_attempts + 1):
+        budget.check()
+        retry_after = None
+        try:
+            await limiter.wait_async(url)
+            async with session.request(method, url, **kwargs) as response:
+                limiter.record_response(url, response.status, response.headers)
+                if response.status == 304 and cached is not None:
+                    cache.touch(url, params, identity)
+                    cache.stats["revalidated"] += 1
+                    return cached.json()
+                if response.status in RETRYABLE_STATUS:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise TransientRequestError(f"HTTP {response.status}")
+                if response.status >= 400:
+                    raise PermanentRequestError(f"HTTP {response.status} for {url}", response.status)
+                body = await response.text()
+                try:
+                    data = json.loads(body)
+                except (json.JSONDecodeError, ValueError):
+                    raise PermanentRequestError(f"Invalid JSON response from {url}")
+                if retry_on_body and retry_on_body(data):
+                    limiter.record_body_throttled(url)
+                    raise _RetryableBody(str(data)[:200])
+                if cache:
+                    cache.stats["misses"] += 1
+                    cache.store(url, params, body, response.headers, identity)
+            return data
+        except PermanentRequestError:
+            budget.charge(url)
+            raise
+        except (TransientRequestError, _RetryableBody, aiohttp.ClientConnectionError,
+                aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            last_error = f"{type(e).__name__}: {e}"
+            budget.charge(last_error)
+        if attempt < policy.max_attempts:
+            await asyncio.sleep(policy.delay(attempt, retry_after))
+
+    raise TransientRequestError(f"{url} failed after {policy.max_attempts} attempts ({last_error})")
@@ -0,0 +1,180 @@
+"""
+Shared adaptive rate limiter for all scrapers.
+
+One token bucket per host, shared by every scraper, thread and coroutine in
+the process. Buckets adapt to the API's real limit (AIMD):
+- every successful response nudges the rate up, towards the host's max rate
+- a 429 halves the rate and, if the server sent `Retry-After`, pauses the
+  host until then
+
+Usage:
+    from scraper_ratelimit import RateLimitedSession, get_rate_limiter
+
+    session = RateLimitedSession()          # drop-in requests.Session
+    session.get(url)                        # waits for a token, adapts to 429s
+
+    limiter = get_rate_limiter()            # for aiohttp / custom clients
+    await limiter.wait_async(url)
+    limiter.record_response(url, status, headers)
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+
+# Starting rate and ceiling (requests/second) per host. Starting rates match
+# the sleeps the scrapers used before; the ceilings are the documented or
+# observed limits the buckets may probe up to.
+HOST_RATES: Dict[str, Tuple[float, float]] = {
+    "api.cookie.fun": (2.0, 10.0),
+    "base.blockscout.com": (3.0, 10.0),
+    "api.basescan.org": (4.0, 5.0),         # free tier: 5 calls/s
+    "graphigo.prd.galaxy.eco": (2.0, 10.0),
+    # Local EVM nodes (anvil) used by the JSON-RPC source
+    "127.0.0.1": (50.0, 200.0),
+    "localhost": (50.0, 200.0),
+}
+DEFAULT_RATE = (2.0, 10.0)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket with additive-increase / multiplicative-decrease."""
+
+    def __init__(self, rate: float, max_rate: float, burst: Optional[float] = None, min_rate: float = 0.1):
+        self.rate = rate
+        self.max_rate = max(max_rate, rate)
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.increase = rate * 0.05
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after: Optional[float] = None, undo_success: bool = False):
+        """Halve the rate; undo_success first takes back an on_success() already counted for this reply."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            if undo_success:
+                self.rate = max(self.min_rate, self.rate - self.increase)
+            throttled_rate = self.rate
+            self.rate = max(self.min_rate, throttled_rate / 2)
+            # Never probe back up to the rate that just got throttled
+            self.max_rate = max(self.rate, min(self.max_rate, throttled_rate * 0.9))
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class RateLimiter:
+    """Registry of per-host token buckets."""
+
+    def __init__(self, host_rates: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.host_rates = dict(HOST_RATES if host_rates is None else host_rates)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or url
+        with self._lock:
+            if host not in self._buckets:
+                rate, max_rate = self.host_rates.get(host, DEFAULT_RATE)
+                self._buckets[host] = TokenBucket(rate, max_rate)
+            return self._buckets[host]
+
+    def wait(self, url: str):
+        """Block the calling thread until a request to url may be sent."""
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str):
+        """Suspend the calling coroutine until a request to url may be sent."""
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_response(self, url: str, status: int, headers=None):
+        """Adapt the host's rate to a response status (and Retry-After header)."""
+        bucket = self.bucket(url)
+        if status == 429 or (status == 503 and headers and headers.get("Retry-After")):
+            bucket.on_throttled(parse_retry_after(headers.get("Retry-After") if headers else None))
+        elif status < 400:
+            bucket.on_success()
+
+    def record_body_throttled(self, url: str):
+        """
+        A response recorded as a success turned out to be throttled by its
+        body (e.g. BaseScan's "NOTOK" with HTTP 200): take the increase back
+        and back off.
+        """
+        self.bucket(url).on_throttled(undo_success=True)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            host: {"rate": round(b.rate, 2), "max_rate": round(b.max_rate, 2), "throttled": b.throttled}
+            for host, b in self._buckets.items()
+        }
+
+
+_default_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The process-wide limiter shared by all scrapers."""
+    return _default_limiter
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session that waits for the shared per-host limiter on every request."""
+
+    def __init__(self, limiter: Optional[RateLimiter] = None):
+        super().__init__()
+        self.limiter = limiter or get_rate_limiter()
+
+    def request(self, method, url, *args, **kwargs):
+        self.limiter.wait(url)
+        response = super().request(method, url, *args, **kwargs)
+        self.limiter.record_response(url, response.status_code, response.headers)
+        return response
@@ -0,0 +1,455 @@
+"""
+Streaming page pipeline for the scrapers: fetch page -> parse -> append to sink.
+
+Instead of collecting every row in a list of dicts and converting to a
+DataFrame at the end, pages are written to a sink as they arrive, so memory
+stays flat no matter how many rows a crawl returns. `prefetch()` runs the page
+generator in a background thread, so the next page is being fetched while the
+current one is parsed and written.
+
+Sinks are picked by file extension, or explicitly with a format name:
+- csv      (.csv)             - header from every column seen in any page
+- jsonl    (.jsonl, .ndjson)  - one JSON object per line
+- parquet  (.parquet)         - one row group per page (needs pyarrow)
+- arrow    (.arrow, .feather) - Arrow IPC file, memory-mappable (needs pyarrow)
+- xlsx     (.xlsx)            - streaming write-only workbook (excel_export.py)
+
+No sink drops a column because the first rows didn't have it: CSV and Excel
+columns and Parquet / Arrow schemas are widened as later pages bring new
+columns (or, for Parquet / Arrow, wider types).
+
+Every scraper's main() takes --output / --format via add_output_arguments().
+
+Usage:
+    from scraper_stream import open_sink, prefetch
+
+    with open_sink("holders.parquet") as sink:
+        for rows in prefetch(scraper.iter_holder_pages()):
+            sink.write(rows)
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import pickle
+import queue
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from excel_export import StreamingExcelWriter
+
+
+class RowSink:
+    """Append-only destination for pages of row dicts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows_written = 0
+
+    def write(self, rows: List[Dict]):
+        if rows:
+            self._write(rows)
+            self.rows_written += len(rows)
+
+    def _write(self, rows: List[Dict]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _add_columns(columns: Dict[str, None], rows: List[Dict]) -> bool:
+    """Add the keys of rows that columns doesn't have yet, in first-seen order; True if any were new."""
+    count = len(columns)
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns[key] = None
+    return len(columns) > count
+
+
+class CsvSink(RowSink):
+    """
+    CSV with one header over every column seen so far. A page with new
+    columns rewrites the rows already written under the widened header (their
+    new cells empty) - rare, since the columns settle after the first pages.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._columns: Dict[str, None] = {}
+        self._writer: Optional[csv.DictWriter] = None
+
+    def _start(self):
+        self._writer = csv.DictWriter(self._file, fieldnames=list(self._columns))
+        self._writer.writeheader()
+
+    def _rewrite(self):
+        self._file.close()
+        previous = self.path + ".partial"
+        os.replace(self.path, previous)
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._start()
+        width = len(self._columns)
+        writer = csv.writer(self._file)
+        with open(previous, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # the old header
+            for record in reader:
+                writer.writerow(record + [""] * (width - len(record)))
+        os.remove(previous)
+
+    def _write(self, rows: List[Dict]):
+        widened = _add_columns(self._columns, rows)
+        if self._writer is None:
+            self._start()
+        elif widened:
+            self._rewrite()
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink(RowSink):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write(self, rows: List[Dict]):
+        self._file.writelines(json.dumps(row, default=str) + "\n" for row in rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _import_pyarrow(fmt: str):
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(f"{fmt} output needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+class _ArrowSink(RowSink):
+    """
+    Converts each page to a record batch under one schema for the whole file.
+
+    The schema starts as the `schema` given (if any) and is widened as pages
+    arrive: a column that was all-None gets its first real type, ints become
+    floats once a float shows up, new columns are added, and columns with no
+    common type (numbers on one page, text on another) become text. The
+    writer can't change its schema, so a widening rewrites the pages written
+    so far under the new one - rare, since it stops once every column has
+    been seen with a value. With no rows at all, close() still writes an
+    empty file with the schema.
+    """
+
+    def __init__(self, path: str, schema=None):
+        super().__init__(path)
+        self._pa = _import_pyarrow(self.format_name)
+        self._schema = schema
+        self._writer = None
+
+    def _open_writer(self, schema):
+        raise NotImplementedError
+
+    def _read_batches(self, path: str) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def _merge_schemas(self, schema, page_schema):
+        pa = self._pa
+        merged = {field.name: field for field in schema}
+        for field in page_schema:
+            current = merged.get(field.name)
+            if current is None:
+                merged[field.name] = field
+                continue
+            try:
+                unified = pa.unify_schemas([pa.schema([current]), pa.schema([field])], promote_options="permissive")
+                merged[field.name] = unified.field(0)
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                merged[field.name] = pa.field(field.name, pa.string())
+        return pa.schema(list(merged.values()))
+
+    def _conform(self, table):
+        """table with the sink's columns, in order, cast to their (wider) types."""
+        pa = self._pa
+        columns = [
+            table.column(field.name).cast(field.type) if field.name in table.column_names
+            else pa.nulls(len(table), field.type)
+            for field in self._schema
+        ]
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def _rewrite(self, schema):
+        """Reopen the file under a wider schema, carrying over what was written so far."""
+        self._writer.close()
+        previous = self.path + ".partial"
+        os.replace(self.path, previous)
+        self._schema = schema
+        self._writer = self._open_writer(schema)
+        for batch in self._read_batches(previous):
+            self._writer.write_table(self._conform(self._pa.Table.from_batches([batch])))
+        os.remove(previous)
+
+    def _write(self, rows: List[Dict]):
+        # Values the columnar types can't hold (nested lists/dicts) become JSON text
+        rows = [{k: json.dumps(v, default=str) if isinstance(v, (list, dict)) else v
+                 for k, v in row.items()} for row in rows]
+        # from_pylist would take the columns from the first row only
+        columns: Dict[str, None] = {}
+        _add_columns(columns, rows)
+        table = self._pa.Table.from_pydict({key: [row.get(key) for row in rows] for key in columns})
+        schema = table.schema if self._schema is None else self._merge_schemas(self._schema, table.schema)
+        if self._writer is None:
+            self._schema = schema
+            self._writer = self._open_writer(schema)
+        elif not schema.equals(self._schema):
+            self._rewrite(schema)
+        self._writer.write_table(self._conform(table))
+
+    def close(self):
+        if self._writer is None:
+            self._writer = self._open_writer(self._schema if self._schema is not None else self._pa.schema([]))
+        self._writer.close()
+
+
+class ParquetSink(_ArrowSink):
+    """Writes each page as a Parquet row group."""
+
+    format_name = "Parquet"
+
+    def _open_writer(self, schema):
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(self.path, schema)
+
+    def _read_batches(self, path: str) -> Iterator[Any]:
+        import pyarrow.parquet
+        yield from pyarrow.parquet.ParquetFile(path).iter_batches()
+
+
+class ArrowIpcSink(_ArrowSink):
+    """Arrow IPC file format, which notebooks can memory-map with pyarrow / pandas."""
+
+    format_name = "Arrow IPC"
+
+    def _open_writer(self, schema):
+        import pyarrow.ipc
+        return pyarrow.ipc.new_file(self.path, schema)
+
+    def _read_batches(self, path: str) -> Iterator[Any]:
+        import pyarrow.ipc
+        with self._pa.memory_map(path) as source:
+            reader = pyarrow.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
+class ExcelSink(RowSink):
+    """
+    Streaming workbook with one sheet over every column seen in any page.
+
+    A write-only sheet's header can't change once written, so pages are
+    spooled to a temporary file (one page in memory at a time) and the
+    sheet is written on close, with widths estimated from the first page.
+    """
+
+    def __init__(self, path: str, sheet_title: str = "Results"):
+        super().__init__(path)
+        self._writer = StreamingExcelWriter(path)
+        self._sheet_title = sheet_title
+        self._columns: Dict[str, None] = {}
+        self._spool = tempfile.TemporaryFile()
+
+    def _write(self, rows: List[Dict]):
+        _add_columns(self._columns, rows)
+        pickle.dump(rows, self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _pages(self) -> Iterator[List[Dict]]:
+        self._spool.seek(0)
+        while True:
+            try:
+                yield pickle.load(self._spool)
+            except EOFError:
+                return
+
+    def close(self):
+        try:
+            pages = self._pages()
+            first = next(pages, None)
+            if first is not None:
+                sheet = self._writer.add_sheet(self._sheet_title, list(self._columns), first)
+                for rows in itertools.chain([first], pages):
+                    for row in rows:
+                        sheet.append(row)
+            self._writer.close()
+        finally:
+            self._spool.close()
+
+
+FORMATS = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+    "arrow": ArrowIpcSink,
+    "xlsx": ExcelSink,
+}
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".xlsx": "xlsx",
+}
+
+
+def output_format(path: str, fmt: Optional[str] = None) -> str:
+    """The format name for path: fmt if given, else from the file extension."""
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported output format '{fmt}' (use one of: {', '.join(FORMATS)})")
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f"Unsupported output extension '{ext}' (use one of: {', '.join(EXTENSIONS)})")
+    return EXTENSIONS[ext]
+
+
+def output_path(path: str, fmt: Optional[str] = None) -> str:
+    """path, with its extension switched to match fmt when the two disagree."""
+    if not fmt or EXTENSIONS.get(os.path.splitext(path)[1].lower()) == fmt:
+        return path
+    return os.path.splitext(path)[0] + "." + fmt
+
+
+def open_sink(path: str, fmt: Optional[str] = None, **options) -> RowSink:
+    """
+    Open a sink for path, chosen by fmt or by its file extension.
+
+    options go to the sink class, e.g. schema= (a pyarrow.Schema) to declare
+    the columns of a Parquet / Arrow file up front.
+    """
+    return FORMATS[output_format(path, fmt)](path, **options)
+
+
+def write_rows(path: str, rows: Iterable[Dict], fmt: Optional[str] = None, page_rows: int = 10000) -> int:
+    """Write an iterable of rows through a sink, page_rows at a time; returns rows written."""
+    rows = iter(rows)
+    with open_sink(path, fmt) as sink:
+        while True:
+            page = list(itertools.islice(rows, page_rows))
+            if not page:
+                break
+            sink.write(page)
+    return sink.rows_written
+
+
+def read_rows(path: str, fmt: Optional[str] = None) -> List[Dict]:
+    """Read back a file written by a sink (the first sheet, for Excel) as a list of rows."""
+    fmt = output_format(path, fmt)
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if fmt in ("parquet", "arrow"):
+        pa = _import_pyarrow(fmt)
+        if fmt == "parquet":
+            import pyarrow.parquet
+            return pyarrow.parquet.read_table(path).to_pylist()
+        import pyarrow.ipc
+        with pa.memory_map(path) as source:
+            return pyarrow.ipc.open_file(source).read_all().to_pylist()
+    import pandas as pd
+    # keep_default_na=False: empty cells stay "" as the scrapers wrote them, not NaN
+    if fmt == "csv":
+        frame = pd.read_csv(path, keep_default_na=False)
+    else:
+        frame = pd.read_excel(path, keep_default_na=False)
+        # Sheets have title-cased headers ("Onchain Address"); map them back to field names
+        frame.columns = [str(c).strip().lower().replace(" ", "_") for c in frame.columns]
+    return frame.astype(object).to_dict("records")
+
+
+def add_output_arguments(parser: argparse.ArgumentParser, default_output: str):
+    parser.add_argument("--output", default=default_output,
+                        help=f"Output file; format from the extension ({', '.join(EXTENSIONS)})")
+    parser.add_argument("--format", choices=list(FORMATS), help="Output format, overriding the --output extension")
+
+
+def export_results(
+    rows: List[Dict], path: str, fmt: Optional[str] = None, excel: Optional[Callable[[List[Dict], str], Any]] = None
+) -> str:
+    """
+    Write a scraper's results in the requested format; returns the path written.
+
+    Excel output goes through the scraper's own styled exporter when one is
+    given; every other format goes through a sink.
+    """
+    path = output_path(path, fmt)
+    if output_format(path, fmt) == "xlsx" and excel is not None:
+        excel(rows, path)
+        return path
+    count = write_rows(path, rows, fmt)
+    print(f"\n✅ Exported {count} records to {path}")
+    return path
+
+
+_DONE = object()
+
+
+def prefetch(pages: Iterable[Any], depth: int = 1) -> Iterator[Any]:
+    """
+    Iterate pages from a background thread, keeping up to `depth` pages ready.
+
+    Exceptions raised by the page generator are re-raised in the consumer.
+    """
+    ready: "queue.Queue" = queue.Queue(maxsize=max(depth, 1))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        put((_DONE, None))
+
+    worker = threading.Thread(target=produce, name="page-prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            page, error = ready.get()
+            if page is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield page
+    finally:
+        stop.set()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Snapshot diffing: only the holder / leaderboard rows that changed between runs.
+
+Instead of re-importing a full holder list or leaderboard every run,
+downstream consumers can read a delta feed with one row per change:
+- new      - in the current snapshot only
+- removed  - in the previous snapshot only
+- changed  - in both, with at least one differing field
+
+Holder snapshots (HolderTable .npz files) are compared with a sorted merge on
+the raw 20-byte addresses: both address arrays are sorted once, matched with
+np.intersect1d, and balances, flags and interned strings are compared as whole
+arrays. Python only touches the rows that changed, so the cost is two sorts
+plus the size of the churn. Balance deltas are exact (from the uint256 limbs)
+in balance_raw_delta, and as floats in balance_delta.
+
+Leaderboard rows (any file written by a sink: .csv, .jsonl, .parquet, .arrow,
+.xlsx) are compared with a hash join on the entity store's account key - user
+id, else handle, else address - prefixed by the board / Galxe space, so the
+same account on two boards is two rows. Score fields get a <field>_delta column;
+resolver bookkeeping (entity_id, records) never counts as a change.
+
+Usage:
+    python snapshot_diff.py previous.npz current.npz --output holder_deltas.jsonl
+    python snapshot_diff.py galxe_prev.parquet galxe_users.parquet --output galxe_deltas.jsonl
+"""
+
+import argparse
+import math
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from entity_store import account_key, normalize_address
+from holder_table import FLAG_COLUMNS, STRING_COLUMNS, HolderTable
+from scraper_stream import read_rows, write_rows
+
+# Numeric leaderboard / agent fields that get a <field>_delta column
+SCORE_FIELDS = [
+    "rank", "points", "snaps_points", "mindshare_score", "engagement_score",
+    "followers", "market_cap", "volume_24h", "price_usd", "balance",
+]
+
+CHANGES = ("new", "removed", "changed")
+
+# Fields that differ between runs without the account changing: the identity
+# resolver's entity id (a union-find root) and how many records it merged
+UNSTABLE_FIELDS = ("entity_id", "records")
+
+
+def _unique_sorted(addresses: np.ndarray):
+    # np.unique sorts, and keeps the first row of an address listed twice
+    # (Blockscout pages can shift while a crawl is running)
+    return np.unique(addresses, return_index=True)
+
+
+def _code_map(previous: HolderTable, current: HolderTable) -> np.ndarray:
+    """Current pool code -> previous pool code (-1 if the string is new), to compare codes directly."""
+    codes = previous.pool._codes
+    return np.array([codes.get(s, -1) for s in current.pool.strings], dtype=np.int64)
+
+
+def _holder_delta(
+    change: str, table: HolderTable, i: int, previous_raw: int, current_raw: int, decimals: int
+) -> Dict:
+    row = table.row(i, decimals)
+    delta = current_raw - previous_raw
+    return {
+        "change": change,
+        "onchain_address": row["onchain_address"],
+        "balance": current_raw / (10 ** decimals),
+        "previous_balance": previous_raw / (10 ** decimals),
+        "balance_delta": delta / (10 ** decimals),
+        "balance_raw": str(current_raw),
+        "previous_balance_raw": str(previous_raw),
+        "balance_raw_delta": str(delta),
+        **{name: row[name] for name in FLAG_COLUMNS + STRING_COLUMNS},
+    }
+
+
+def diff_holders(previous: HolderTable, current: HolderTable, decimals: int = 18) -> Iterator[Dict]:
+    """
+    Delta rows between two holder snapshots: new, then changed, then removed.
+
+    New holders have a previous balance of 0, removed ones a current balance
+    of 0; their other fields are taken from the snapshot they appear in.
+    """
+    prev_sorted, prev_rows = _unique_sorted(previous.addresses)
+    cur_sorted, cur_rows = _unique_sorted(current.addresses)
+    _, prev_pos, cur_pos = np.intersect1d(prev_sorted, cur_sorted, assume_unique=True, return_indices=True)
+
+    cur_matched = np.zeros(len(cur_sorted), dtype=bool)
+    cur_matched[cur_pos] = True
+    prev_matched = np.zeros(len(prev_sorted), dtype=bool)
+    prev_matched[prev_pos] = True
+    pi, ci = prev_rows[prev_pos], cur_rows[cur_pos]
+
+    changed = (previous.limbs[pi] != current.limbs[ci]).any(axis=1)
+    for name in FLAG_COLUMNS:
+        changed |= previous.flags[name][pi] != current.flags[name][ci]
+    code_map = _code_map(previous, current)
+    for name in STRING_COLUMNS:
+        changed |= previous.codes[name][pi] != code_map[current.codes[name][ci]]
+
+    for i in np.sort(cur_rows[~cur_matched]):
+        yield _holder_delta("new", current, int(i), 0, current.balance_raw(int(i)), decimals)
+    for p, c in zip(pi[changed], ci[changed]):
+        yield _holder_delta(
+            "changed", current, int(c), previous.balance_raw(int(p)), current.balance_raw(int(c)), decimals
+        )
+    for i in np.sort(prev_rows[~prev_matched]):
+        yield _holder_delta("removed", previous, int(i), previous.balance_raw(int(i)), 0, decimals)
+
+
+def row_key(row: Dict) -> Optional[str]:
+    """Join key for a leaderboard / account row: board (or Galxe space) plus the account key."""
+    key = account_key(row)
+    if key is None:
+        return None
+    board = row.get("board") or row.get("space")
+    return f"{board}|{key}" if board else key
+
+
+def address_row_key(row: Dict) -> Optional[str]:
+    return normalize_address(row.get("onchain_address") or row.get("address"))
+
+
+KEYS: Dict[str, Callable[[Dict], Optional[str]]] = {"account": row_key, "address": address_row_key}
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or value in (None, ""):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _same(a, b) -> bool:
+    # Files round-trip numbers as text or floats; 10 == "10" == 10.0 is not a change
+    if a == b:
+        return True
+    na, nb = _number(a), _number(b)
+    if na is not None and nb is not None:
+        return na == nb
+    return a in (None, "") and b in (None, "")
+
+
+def diff_rows(
+    previous: Iterable[Dict],
+    current: Iterable[Dict],
+    key: Callable[[Dict], Optional[str]] = row_key,
+    score_fields: Optional[List[str]] = None,
+    ignore_fields: Iterable[str] = UNSTABLE_FIELDS,
+) -> Iterator[Dict]:
+    """
+    Delta rows between two lists of leaderboard / account rows.
+
+    The previous rows are hash-indexed by key and the current rows are
+    streamed through the index, holding on to the changed ones only. Rows
+    without a key can't be matched and are ignored. Every delta row has the
+    same columns: change, key, every field seen in either snapshot (None
+    where the row has no such field) and <field>_delta for each score field
+    in either snapshot (None where either side has no number). Fields in
+    ignore_fields are carried along but never make a row "changed".
+    """
+    columns: Dict[str, None] = {}
+    index: Dict[str, Dict] = {}
+    for row in previous:
+        k = key(row)
+        if k is not None:
+            index.setdefault(k, row)
+            columns.update(dict.fromkeys(row))
+
+    ignore = set(ignore_fields)
+    changes = []
+    seen = set()
+    for row in current:
+        k = key(row)
+        if k is None or k in seen:
+            continue
+        seen.add(k)
+        columns.update(dict.fromkeys(row))
+        before = index.get(k)
+        if before is None:
+            changes.append(("new", k, row, None))
+        elif any(not _same(before.get(f), row.get(f)) for f in (before.keys() | row.keys()) - ignore):
+            changes.append(("changed", k, row, before))
+    changes += [("removed", k, row, row) for k, row in index.items() if k not in seen]
+
+    if score_fields is None:
+        score_fields = [f for f in SCORE_FIELDS if f in columns]
+    zeros = dict.fromkeys(score_fields, 0)
+    for change, k, row, before in changes:
+        after = zeros if change == "removed" else row
+        deltas = {}
+        for field in score_fields:
+            a, b = _number((before or zeros).get(field)), _number(after.get(field))
+            deltas[f"{field}_delta"] = None if a is None or b is None else b - a
+        yield {"change": change, "key": k, **{c: row.get(c) for c in columns}, **deltas}
+
+
+def diff_files(previous: str, current: str, output: str, fmt: Optional[str] = None,
+               key: str = "account", decimals: int = 18) -> Dict[str, int]:
+    """Diff two snapshot files and write the delta feed; returns the count per change."""
+    if previous.endswith(".npz") and current.endswith(".npz"):
+        deltas = diff_holders(HolderTable.load(previous), HolderTable.load(current), decimals)
+    else:
+        deltas = diff_rows(read_rows(previous), read_rows(current), KEYS[key])
+    counts = dict.fromkeys(CHANGES, 0)
+
+    def counted(rows: Iterator[Dict]) -> Iterator[Dict]:
+        for row in rows:
+            counts[row["change"]] += 1
+            yield row
+
+    write_rows(output, counted(deltas), fmt)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write only the rows that changed between two snapshots")
+    parser.add_argument("previous", help="Previous snapshot (.npz holder table, or a scraper output file)")
+    parser.add_argument("current", help="Current snapshot, in the same kind of file")
+    parser.add_argument("--output", default="snapshot_deltas.jsonl", help="Delta feed to write")
+    parser.add_argument("--format", help="Delta feed format, overriding the --output extension")
+    parser.add_argument("--key", choices=list(KEYS), default="account",
+                        help="Match leaderboard rows by account (user id / handle / address, per board) or by address")
+    parser.add_argument("--decimals", type=int, default=18, help="Token decimals for holder balances")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Snapshot Diff")
+    print("=" * 60)
+    print(f"Previous: {args.previous}")
+    print(f"Current:  {args.current}")
+    print()
+
+    for path in (args.previous, args.current):
+        if not os.path.exists(path):
+            print(f"❌ Snapshot not found: {path}")
+            return
+
+    counts = diff_files(args.previous, args.current, args.output, args.format, args.key, args.decimals)
+    print(f"✅ {sum(counts.values())} changes written to {args.output}")
+    for change, count in counts.items():
+        print(f"   {change.capitalize()}: {count}")
+    print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Per-dataset size and cost statistics for the memory service.
+
+Latency and volume counters (items added, cognify duration, search latency)
+are tracked in-process by the endpoints in main.py. Item counts and on-disk
+size are read from Cognee's relational store when available. Node and edge
+counts are opt-in (COGNEE_STATS_TRACK_GRAPH=true): they are attributed to a
+dataset from the growth of the graph store across a cognify() run, and only
+from runs that no other cognify() overlapped, since the graph-wide growth of
+concurrent runs can't be split between their datasets.
+
+Counters are per process; with several uvicorn workers each reports its own.
+"""
+
+import itertools
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Counting graph growth loads the graph store's full node/edge lists before and
+# after every cognify, so it is off unless asked for (small graphs, debugging).
+TRACK_GRAPH_SIZE = os.getenv("COGNEE_STATS_TRACK_GRAPH", "false").lower() in ("1", "true", "yes", "on")
+
+# Fields of the in-process counters that /memory/stats/top can sort by
+SORTABLE_FIELDS = (
+    "items_added",
+    "node_count",
+    "edge_count",
+    "last_cognify_ms",
+    "avg_cognify_ms",
+    "search_count",
+    "avg_search_ms",
+    "max_search_ms",
+)
+
+_stats: Dict[str, dict] = {}
+
+# In-flight cognify runs: run id -> whether another run overlapped it
+_cognify_runs: Dict[int, bool] = {}
+_next_run = itertools.count()
+
+
+def _new_entry() -> dict:
+    return {
+        "items_added": 0,
+        "node_count": None,
+        "edge_count": None,
+        "cognify_count": 0,
+        "total_cognify_ms": 0.0,
+        "last_cognify_ms": None,
+        "last_cognify_at": None,
+        "search_count": 0,
+        "total_search_ms": 0.0,
+        "max_search_ms": 0.0,
+    }
+
+
+def _entry(dataset: str) -> dict:
+    if dataset not in _stats:
+        _stats[dataset] = _new_entry()
+    return _stats[dataset]
+
+
+def record_add(dataset: str, items: int = 1):
+    _entry(dataset)["items_added"] += items
+
+
+def record_cognify(dataset: str, duration_ms: float, graph_delta: Optional[Tuple[int, int]] = None):
+    entry = _entry(dataset)
+    entry["cognify_count"] += 1
+    entry["total_cognify_ms"] += duration_ms
+    entry["last_cognify_ms"] = round(duration_ms, 1)
+    entry["last_cognify_at"] = time.time()
+    if graph_delta is not None:
+        nodes, edges = graph_delta
+        entry["node_count"] = (entry["node_count"] or 0) + max(nodes, 0)
+        entry["edge_count"] = (entry["edge_count"] or 0) + max(edges, 0)
+
+
+def begin_cognify() -> int:
+    """Register a cognify run; pass the returned id to end_cognify()"""
+    run = next(_next_run)
+    for other in _cognify_runs:
+        _cognify_runs[other] = True
+    _cognify_runs[run] = bool(_cognify_runs)
+    return run
+
+
+def end_cognify(run: int) -> bool:
+    """Unregister a cognify run; True if no other run overlapped it"""
+    return not _cognify_runs.pop(run, True)
+
+
+def record_search(dataset: str, duration_ms: float):
+    entry = _entry(dataset)
+    entry["search_count"] += 1
+    entry["total_search_ms"] += duration_ms
+    entry["max_search_ms"] = round(max(entry["max_search_ms"], duration_ms), 1)
+
+
+async def graph_totals() -> Optional[Tuple[int, int]]:
+    """
+    Total (nodes, edges) in the graph store, or None if not tracked/available.
+    Loads the whole graph, so only runs with COGNEE_STATS_TRACK_GRAPH on.
+    """
+    if not TRACK_GRAPH_SIZE:
+        return None
+    try:
+        from cognee.infrastructure.databases.graph import get_graph_engine
+        graph_engine = await get_graph_engine()
+        nodes, edges = await graph_engine.get_graph_data()
+        return len(nodes), len(edges)
+    except Exception:
+        return None
+
+
+async def dataset_storage(dataset: str) -> dict:
+    """
+    Item count and on-disk size of a dataset's raw data, read from Cognee's
+    relational store. Values are None if the dataset or the store is unavailable.
+    """
+    storage = {"item_count": None, "disk_bytes": None}
+    try:
+        from cognee.modules.users.methods import get_default_user
+        from cognee.modules.data.methods import get_datasets_by_name, get_dataset_data
+
+        user = await get_default_user()
+        datasets = await get_datasets_by_name([dataset], user.id)
+        if not datasets:
+            return storage
+        data_items = await get_dataset_data(datasets[0].id)
+    except Exception:
+        return storage
+
+    disk_bytes = 0
+    for item in data_items:
+        location = getattr(item, "raw_data_location", None) or ""
+        path = location[len("file://"):] if location.startswith("file://") else location
+        if path and os.path.isfile(path):
+            disk_bytes += os.path.getsize(path)
+
+    storage["item_count"] = len(data_items)
+    storage["disk_bytes"] = disk_bytes
+    return storage
+
+
+def summarize(dataset: str) -> dict:
+    """In-process counters for a dataset, with averages derived"""
+    entry = dict(_stats.get(dataset) or _new_entry())
+    total_cognify_ms = entry.pop("total_cognify_ms")
+    total_search_ms = entry.pop("total_search_ms")
+    entry["dataset"] = dataset
+    entry["avg_cognify_ms"] = round(total_cognify_ms / entry["cognify_count"], 1) if entry["cognify_count"] else None
+    entry["avg_search_ms"] = round(total_search_ms / entry["search_count"], 1) if entry["search_count"] else None
+    return entry
+
+
+async def collect_dataset_stats(dataset: str) -> dict:
+    """In-process counters merged with store-backed item count and disk size"""
+    stats = summarize(dataset)
+    stats.update(await dataset_storage(dataset))
+    if stats["item_count"] is None:
+        stats["item_count"] = stats["items_added"]
+    return stats
+
+
+def top_datasets(n: int, sort_by: str) -> List[dict]:
+    """The n tracked datasets with the highest value of sort_by"""
+    summaries = [summarize(dataset) for dataset in list(_stats)]
+    summaries.sort(key=lambda s: s.get(sort_by) or 0, reverse=True)
+    return summaries[:n]
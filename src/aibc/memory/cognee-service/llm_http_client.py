@@ -0,0 +1,127 @@
+"""
+Shared, pooled HTTP client for the custom LLM provider.
+
+When LLM_PROVIDER=custom, Cognee talks to LLM_ENDPOINT through litellm. By
+default litellm may open a fresh connection per call, paying a TCP (and TLS)
+handshake on every cognify/search. This module builds one long-lived
+httpx.AsyncClient with keep-alive, optional HTTP/2 and bounded pool size, and
+installs it as litellm's async session so every call reuses it.
+
+Connection reuse is tracked through httpcore trace events, so /metrics/llm-http
+shows how many requests actually opened a new connection.
+"""
+
+import os
+import importlib.util
+from typing import Optional
+
+import httpx
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# Pool settings
+MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 without it
+HTTP2_REQUESTED = _env_bool("LLM_HTTP_HTTP2", True)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Timeouts (seconds)
+CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_HTTP_READ_TIMEOUT", "120"))
+POOL_TIMEOUT = float(os.getenv("LLM_HTTP_POOL_TIMEOUT", "10"))
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+http_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "tls_handshakes": 0,
+    "http2_requests": 0,
+    "errors": 0,
+}
+
+
+async def _trace(event_name: str, info: dict):
+    """httpcore trace callback - counts connection setups vs. requests sent"""
+    if event_name == "connection.connect_tcp.complete":
+        http_stats["new_connections"] += 1
+    elif event_name == "connection.start_tls.complete":
+        http_stats["tls_handshakes"] += 1
+    elif event_name.endswith("send_request_headers.started"):
+        http_stats["requests"] += 1
+        if event_name.startswith("http2."):
+            http_stats["http2_requests"] += 1
+
+
+async def _attach_trace(request: httpx.Request):
+    request.extensions["trace"] = _trace
+
+
+async def _count_errors(response: httpx.Response):
+    if response.status_code >= 500:
+        http_stats["errors"] += 1
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_REQUESTED and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                READ_TIMEOUT,
+                connect=CONNECT_TIMEOUT,
+                pool=POOL_TIMEOUT,
+            ),
+            event_hooks={"request": [_attach_trace], "response": [_count_errors]},
+        )
+    return _client
+
+
+def install_llm_http_client() -> httpx.AsyncClient:
+    """
+    Install the shared client as litellm's async session.
+
+    litellm passes `aclient_session` to the OpenAI-compatible client it builds
+    for custom endpoints, so all cognify/search LLM calls share this pool.
+    """
+    import litellm
+
+    client = get_llm_http_client()
+    litellm.aclient_session = client
+    return client
+
+
+async def close_llm_http_client():
+    """Close the shared client (on shutdown)"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def get_llm_http_metrics() -> dict:
+    """Pool settings plus connection reuse counters"""
+    requests = http_stats["requests"]
+    reused = max(requests - http_stats["new_connections"], 0)
+    return {
+        "installed": _client is not None and not _client.is_closed,
+        "http2": HTTP2_REQUESTED and HTTP2_AVAILABLE,
+        "max_connections": MAX_CONNECTIONS,
+        "max_keepalive_connections": MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry": KEEPALIVE_EXPIRY,
+        **http_stats,
+        "reused_connections": reused,
+        "reuse_ratio": round(reused / requests, 3) if requests else 0.0,
+    }
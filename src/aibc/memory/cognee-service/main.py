@@ -6,17 +6,53 @@ to store and retrieve character memories using Cognee's knowledge graph.
 """
 
 import os
+import time
 import asyncio
-from typing import Optional, List
-from fastapi import FastAPI, HTTPException
+import json
+import importlib
+from typing import Optional, List, Dict, AsyncIterator
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-import cognee
+import dataset_stats
+from scheduler import PriorityClass, scheduler
+from llm_http_client import (
+    install_llm_http_client,
+    close_llm_http_client,
+    get_llm_http_metrics,
+)
+
+# Reference point for the startup breakdown (boot_ms / time_to_ready_ms)
+PROCESS_START = time.perf_counter()
 
 load_dotenv()
 
+# Warm-up configuration. Steps run in order before /health/ready reports ready:
+#   stores - open the relational, vector and graph stores
+#   embed  - embed a dummy string (warms the embedding provider client)
+#   search - run a dummy search (warms the retrieval path end to end)
+# Set COGNEE_WARMUP_STEPS="" to become ready as soon as Cognee is imported.
+WARMUP_STEPS = [
+    step.strip()
+    for step in os.getenv("COGNEE_WARMUP_STEPS", "stores,embed,search").split(",")
+    if step.strip()
+]
+WARMUP_QUERY = os.getenv("COGNEE_WARMUP_QUERY", "warm-up probe")
+WARMUP_DATASET = os.getenv("COGNEE_WARMUP_DATASET", "warmup_probe")
+WARMUP_TIMEOUT = float(os.getenv("COGNEE_WARMUP_TIMEOUT", "120"))
+
+# Cognee search types queried concurrently by /memory/search/stream, fastest
+# first. Results from each type are streamed as soon as that search returns.
+# Empty = a single search with Cognee's default type.
+STREAM_SEARCH_TYPES = [
+    name.strip()
+    for name in os.getenv("COGNEE_STREAM_SEARCH_TYPES", "CHUNKS,GRAPH_COMPLETION").split(",")
+    if name.strip()
+]
+
 app = FastAPI(
     title="Cognee Memory Service",
     description="Graph RAG memory for AI characters",
@@ -44,6 +80,8 @@ class AddMemoryRequest(BaseModel):
     content: str
     role: str  # 'user' or 'assistant'
     metadata: Optional[dict] = None
+    # Batch imports should send "bulk_backfill" so they yield to live chat
+    priority: PriorityClass = PriorityClass.INTERACTIVE_INGEST
 
 
 class SearchMemoryRequest(BaseModel):
@@ -52,6 +90,7 @@ class SearchMemoryRequest(BaseModel):
     character_id: str
     query: str
     limit: Optional[int] = 5
+    priority: PriorityClass = PriorityClass.INTERACTIVE_SEARCH
 
 
 class MemoryResult(BaseModel):
@@ -72,6 +111,173 @@ class HealthResponse(BaseModel):
     version: str
 
 
+class ReadinessResponse(BaseModel):
+    """Readiness state plus a per-step startup-time breakdown (milliseconds)"""
+    ready: bool
+    boot_ms: Optional[float] = None
+    time_to_ready_ms: Optional[float] = None
+    steps: Dict[str, float]
+    errors: Dict[str, str]
+
+
+class DatasetStats(BaseModel):
+    """Size and cost statistics for one dataset"""
+    dataset: str
+    item_count: Optional[int] = None
+    items_added: int
+    node_count: Optional[int] = None
+    edge_count: Optional[int] = None
+    disk_bytes: Optional[int] = None
+    cognify_count: int
+    last_cognify_ms: Optional[float] = None
+    last_cognify_at: Optional[float] = None
+    avg_cognify_ms: Optional[float] = None
+    search_count: int
+    avg_search_ms: Optional[float] = None
+    max_search_ms: float
+
+
+class TopDatasetsResponse(BaseModel):
+    sort_by: str
+    datasets: List[DatasetStats]
+
+
+# =====================
+# Lazy Cognee Initialization
+# =====================
+
+# Cognee pulls in the LLM, embedding and database stacks on import, which takes
+# seconds. Importing it lazily lets the process answer liveness probes
+# immediately while warm-up runs in the background.
+_cognee = None
+
+startup_state = {
+    "ready": False,
+    "boot_ms": None,
+    "time_to_ready_ms": None,
+    "steps": {},
+    "errors": {},
+}
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def get_cognee():
+    """Import Cognee on first use and record how long the import took"""
+    global _cognee
+    if _cognee is None:
+        start = time.perf_counter()
+        _cognee = importlib.import_module("cognee")
+        startup_state["steps"]["import"] = _elapsed_ms(start)
+    return _cognee
+
+
+async def load_cognee():
+    """
+    get_cognee() for request handlers. A request that arrives before warm-up
+    has imported Cognee waits for the import in a worker thread instead of
+    blocking the event loop (and every other request) for seconds.
+    """
+    if _cognee is not None:
+        return _cognee
+    return await asyncio.to_thread(get_cognee)
+
+
+def configure_llm_provider():
+    """Reconcile Cognee's LLM config with the environment"""
+    from cognee.infrastructure.llm.config import get_llm_config
+    config = get_llm_config()
+    print(f"DEBUG: Current LLM Provider in Config: {config.llm_provider}")
+    print(f"DEBUG: Env LLM_PROVIDER: {os.getenv('LLM_PROVIDER')}")
+
+    # Force set if Env says custom but config says gemini (persistence issue)
+    if os.getenv("LLM_PROVIDER") == "custom" and config.llm_provider != "custom":
+        print("WARN: Config mismatch. Forcing custom provider.")
+        config.llm_provider = "custom"
+        config.llm_endpoint = os.getenv("LLM_ENDPOINT")
+        config.llm_model = os.getenv("LLM_MODEL")
+
+    # Share one pooled keep-alive client for all calls to the custom endpoint
+    if config.llm_provider == "custom":
+        install_llm_http_client()
+        print(f"🔌 Pooled HTTP client installed for {config.llm_endpoint}")
+
+    return config
+
+
+async def warm_stores():
+    """Open the relational, vector and graph stores"""
+    from cognee.infrastructure.databases.relational import get_relational_engine
+    from cognee.infrastructure.databases.vector import get_vector_engine
+    from cognee.infrastructure.databases.graph import get_graph_engine
+
+    relational_engine = get_relational_engine()
+    if hasattr(relational_engine, "create_database"):
+        await relational_engine.create_database()
+    get_vector_engine()
+    await get_graph_engine()
+
+
+async def warm_embed():
+    """Embed a dummy string so the embedding client and its connections exist"""
+    from cognee.infrastructure.databases.vector import get_vector_engine
+    await get_vector_engine().embedding_engine.embed_text([WARMUP_QUERY])
+
+
+async def warm_search():
+    """Run a dummy search through the same path /memory/search uses"""
+    await get_cognee().search(query_text=WARMUP_QUERY, datasets=[WARMUP_DATASET])
+
+
+WARMUP_ROUTINES = {
+    "stores": warm_stores,
+    "embed": warm_embed,
+    "search": warm_search,
+}
+
+
+async def run_warmup():
+    """
+    Import Cognee, apply provider config and run the configured warm-up steps.
+
+    Optional steps that fail are recorded but do not block readiness (e.g. the
+    dummy search on an empty dataset); failing to import or configure Cognee does.
+    """
+    try:
+        await asyncio.to_thread(get_cognee)
+
+        start = time.perf_counter()
+        config = configure_llm_provider()
+        startup_state["steps"]["config"] = _elapsed_ms(start)
+    except Exception as e:
+        startup_state["errors"]["init"] = str(e)
+        print(f"❌ Cognee initialization failed: {e}")
+        return
+
+    for step in WARMUP_STEPS:
+        routine = WARMUP_ROUTINES.get(step)
+        if routine is None:
+            startup_state["errors"][step] = "unknown warm-up step"
+            continue
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(routine(), timeout=WARMUP_TIMEOUT)
+        except Exception as e:
+            startup_state["errors"][step] = str(e) or type(e).__name__
+        startup_state["steps"][step] = _elapsed_ms(start)
+
+    startup_state["time_to_ready_ms"] = _elapsed_ms(PROCESS_START)
+    startup_state["ready"] = True
+
+    breakdown = ", ".join(f"{name}={ms:.0f}ms" for name, ms in startup_state["steps"].items())
+    print(f"✅ Cognee ready! Provider: {config.llm_provider}")
+    print(f"⏱️  Startup: {startup_state['time_to_ready_ms']:.0f}ms total ({breakdown})")
+    for step, error in startup_state["errors"].items():
+        print(f"WARN: warm-up step '{step}' failed: {error}")
+
+
 # =====================
 # Utility Functions
 # =====================
@@ -82,6 +288,29 @@ def get_dataset_name(user_id: str, character_id: str) -> str:
     return f"user_{user_id[:8]}_char_{character_id[:8]}"
 
 
+def to_memory_result(result, rank: int, metadata: Optional[dict] = None) -> MemoryResult:
+    """Normalize a raw Cognee search result"""
+    # Cognee returns different formats, normalize
+    content = str(result) if not hasattr(result, 'content') else result.content
+    score = 1.0 - (rank * 0.1)  # Approximate score based on ranking
+    return MemoryResult(content=content, score=score, metadata=metadata or {})
+
+
+def build_context_prompt(memory_results: List[MemoryResult]) -> str:
+    """Build the context block injected into the LLM prompt"""
+    if not memory_results:
+        return ""
+    context_lines = [
+        "\n[COGNEE MEMORY - KNOWLEDGE GRAPH CONTEXT]",
+        "The following information is retrieved from the structured knowledge graph:",
+        ""
+    ]
+    for mem in memory_results:
+        context_lines.append(f"• {mem.content}")
+    context_lines.append("\n[END COGNEE MEMORY]\n")
+    return "\n".join(context_lines)
+
+
 async def ensure_dataset(dataset_name: str):
     """Ensure the dataset exists"""
     # Cognee auto-creates datasets, but we can set it as active
@@ -98,6 +327,36 @@ async def health_check():
     return HealthResponse(status="ok", version="1.0.0")
 
 
+@app.get("/health/live", response_model=HealthResponse)
+async def liveness_probe():
+    """Liveness probe - the process is up, regardless of warm-up state"""
+    return HealthResponse(status="ok", version="1.0.0")
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness_probe():
+    """
+    Readiness probe - 200 once Cognee is imported and warm-up has finished,
+    503 before that. Both include the startup-time breakdown.
+    """
+    report = ReadinessResponse(**startup_state)
+    if not report.ready:
+        return JSONResponse(status_code=503, content=report.model_dump())
+    return report
+
+
+@app.get("/metrics/scheduler")
+async def scheduler_metrics():
+    """Shared call budget usage and queueing delay per priority class"""
+    return scheduler.metrics()
+
+
+@app.get("/metrics/llm-http")
+async def llm_http_metrics():
+    """Connection pool settings and reuse counters for the custom LLM endpoint"""
+    return get_llm_http_metrics()
+
+
 @app.post("/memory/add")
 async def add_memory(request: AddMemoryRequest):
     """
@@ -110,6 +369,7 @@ async def add_memory(request: AddMemoryRequest):
     """
     try:
         dataset = get_dataset_name(request.user_id, request.character_id)
+        cognee = await load_cognee()
         
         # Format content with metadata for better graph extraction
         formatted_content = f"""
@@ -120,10 +380,27 @@ Content: {request.content}
 """
         
         # Add to Cognee
-        await cognee.add(formatted_content, dataset_name=dataset)
+        async with scheduler.slot(request.priority):
+            await cognee.add(formatted_content, dataset_name=dataset)
+        dataset_stats.record_add(dataset)
         
         # Process into knowledge graph
-        await cognee.cognify(datasets=[dataset])
+        run = dataset_stats.begin_cognify()
+        try:
+            graph_before = await dataset_stats.graph_totals()
+            # Timed inside the slot: the scheduler reports queue wait separately
+            async with scheduler.slot(request.priority):
+                start = time.perf_counter()
+                await cognee.cognify(datasets=[dataset])
+                cognify_ms = (time.perf_counter() - start) * 1000
+            graph_after = await dataset_stats.graph_totals()
+        finally:
+            exclusive = dataset_stats.end_cognify(run)
+        # Graph growth is only this dataset's if no other cognify ran meanwhile
+        graph_delta = None
+        if exclusive and graph_before is not None and graph_after is not None:
+            graph_delta = (graph_after[0] - graph_before[0], graph_after[1] - graph_before[1])
+        dataset_stats.record_cognify(dataset, cognify_ms, graph_delta)
         
         return {"status": "success", "dataset": dataset}
         
@@ -141,39 +418,23 @@ async def search_memory(request: SearchMemoryRequest):
     """
     try:
         dataset = get_dataset_name(request.user_id, request.character_id)
+        cognee = await load_cognee()
         
         # Search the knowledge graph
-        results = await cognee.search(
-            query_text=request.query,
-            datasets=[dataset]
-        )
-        
-        # Format results
-        memory_results = []
-        for i, result in enumerate(results[:request.limit]):
-            # Cognee returns different formats, normalize
-            content = str(result) if not hasattr(result, 'content') else result.content
-            score = 1.0 - (i * 0.1)  # Approximate score based on ranking
-            
-            memory_results.append(MemoryResult(
-                content=content,
-                score=score,
-                metadata={}
-            ))
+        async with scheduler.slot(request.priority):
+            start = time.perf_counter()
+            results = await cognee.search(
+                query_text=request.query,
+                datasets=[dataset]
+            )
+            search_ms = (time.perf_counter() - start) * 1000
+        dataset_stats.record_search(dataset, search_ms)
         
-        # Build context prompt for LLM
-        if memory_results:
-            context_lines = [
-                "\n[COGNEE MEMORY - KNOWLEDGE GRAPH CONTEXT]",
-                "The following information is retrieved from the structured knowledge graph:",
-                ""
-            ]
-            for mem in memory_results:
-                context_lines.append(f"• {mem.content}")
-            context_lines.append("\n[END COGNEE MEMORY]\n")
-            context_prompt = "\n".join(context_lines)
-        else:
-            context_prompt = ""
+        memory_results = [
+            to_memory_result(result, rank)
+            for rank, result in enumerate(results[:request.limit])
+        ]
+        context_prompt = build_context_prompt(memory_results)
         
         return SearchMemoryResponse(
             results=memory_results,
@@ -185,6 +446,138 @@ async def search_memory(request: SearchMemoryRequest):
         return SearchMemoryResponse(results=[], context_prompt="")
 
 
+async def stream_search_events(request: SearchMemoryRequest) -> AsyncIterator[dict]:
+    """
+    Run the configured search types concurrently and yield an event per new
+    memory result as soon as its search returns, followed by a "done" event.
+
+    Every "result" event carries the context prompt built so far, so clients
+    can start composing the LLM prompt before the slower graph search is in.
+    """
+    dataset = get_dataset_name(request.user_id, request.character_id)
+    cognee_module = await load_cognee()
+    search_type_enum = getattr(cognee_module, "SearchType", None)
+
+    async def run_search(type_name: Optional[str]):
+        kwargs = {"query_text": request.query, "datasets": [dataset]}
+        if type_name and search_type_enum is not None:
+            kwargs["query_type"] = search_type_enum[type_name]
+        async with scheduler.slot(request.priority):
+            started.append(time.perf_counter())
+            return type_name, await cognee_module.search(**kwargs)
+
+    type_names = STREAM_SEARCH_TYPES if search_type_enum is not None else []
+    # Latency runs from the first search leaving the scheduler queue, not from enqueueing
+    started: List[float] = []
+    tasks = [asyncio.create_task(run_search(name)) for name in type_names or [None]]
+
+    limit = request.limit if request.limit is not None else float("inf")
+    memory_results: List[MemoryResult] = []
+    seen_contents = set()
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                type_name, results = await next_done
+            except Exception as e:
+                # One failing search type must not drop the others
+                yield {"type": "error", "detail": str(e)}
+                continue
+
+            for result in results:
+                if len(memory_results) >= limit:
+                    break
+                memory = to_memory_result(
+                    result, len(memory_results),
+                    metadata={"search_type": type_name} if type_name else None,
+                )
+                if memory.content in seen_contents:
+                    continue
+                seen_contents.add(memory.content)
+                memory_results.append(memory)
+                yield {
+                    "type": "result",
+                    "result": memory.model_dump(),
+                    "context_prompt": build_context_prompt(memory_results),
+                }
+            if len(memory_results) >= limit:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        if started:
+            dataset_stats.record_search(dataset, (time.perf_counter() - min(started)) * 1000)
+
+    yield {
+        "type": "done",
+        "count": len(memory_results),
+        "context_prompt": build_context_prompt(memory_results),
+    }
+
+
+def encode_stream_event(event: dict, stream_format: str) -> str:
+    """Serialize a stream event as an NDJSON line or an SSE message"""
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+@app.post("/memory/search/stream")
+async def search_memory_stream(
+    request: SearchMemoryRequest,
+    stream_format: str = Query("ndjson", alias="format"),
+):
+    """
+    Streaming variant of /memory/search.
+
+    ?format=ndjson (default) sends one JSON event per line; ?format=sse sends
+    Server-Sent Events. Events: "result" (one memory plus the growing context
+    prompt), "error" (a search type failed) and a final "done".
+    """
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    async def encode():
+        try:
+            async for event in stream_search_events(request):
+                yield encode_stream_event(event, stream_format)
+        except Exception as e:
+            # End the stream cleanly on error (don't block chat)
+            yield encode_stream_event({"type": "error", "detail": str(e)}, stream_format)
+            yield encode_stream_event({"type": "done", "count": 0, "context_prompt": ""}, stream_format)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        encode(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/memory/stats/top", response_model=TopDatasetsResponse)
+async def top_dataset_stats(n: int = Query(10, ge=1, le=1000), sort_by: str = "avg_search_ms"):
+    """
+    The N heaviest datasets seen by this process, ranked by sort_by
+    (e.g. avg_search_ms, node_count, last_cognify_ms, items_added).
+    """
+    if sort_by not in dataset_stats.SORTABLE_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort_by must be one of: {', '.join(dataset_stats.SORTABLE_FIELDS)}",
+        )
+    top = dataset_stats.top_datasets(n, sort_by)
+    datasets = []
+    for summary in top:
+        datasets.append(DatasetStats(**await dataset_stats.collect_dataset_stats(summary["dataset"])))
+    return TopDatasetsResponse(sort_by=sort_by, datasets=datasets)
+
+
+@app.get("/memory/stats/{user_id}/{character_id}", response_model=DatasetStats)
+async def memory_stats(user_id: str, character_id: str):
+    """Size and cost statistics for a user-character dataset"""
+    dataset = get_dataset_name(user_id, character_id)
+    return DatasetStats(**await dataset_stats.collect_dataset_stats(dataset))
+
+
 @app.post("/memory/prune")
 async def prune_memory(user_id: str, character_id: str):
     """
@@ -193,7 +586,9 @@ async def prune_memory(user_id: str, character_id: str):
     """
     try:
         dataset = get_dataset_name(user_id, character_id)
-        await cognee.prune.prune_data(datasets=[dataset])
+        cognee = await load_cognee()
+        async with scheduler.slot(PriorityClass.MAINTENANCE):
+            await cognee.prune.prune_data(datasets=[dataset])
         return {"status": "pruned", "dataset": dataset}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -201,23 +596,18 @@ async def prune_memory(user_id: str, character_id: str):
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize Cognee on startup"""
+    """Start lazy Cognee initialization and warm-up in the background"""
     print("🧠 Cognee Memory Service starting...")
-    
-    # Force reload config or check it
-    from cognee.infrastructure.llm.config import get_llm_config
-    config = get_llm_config()
-    print(f"DEBUG: Current LLM Provider in Config: {config.llm_provider}")
-    print(f"DEBUG: Env LLM_PROVIDER: {os.getenv('LLM_PROVIDER')}")
-    
-    # Force set if Env says custom but config says gemini (persistence issue)
-    if os.getenv("LLM_PROVIDER") == "custom" and config.llm_provider != "custom":
-        print("WARN: Config mismatch. Forcing custom provider.")
-        config.llm_provider = "custom"
-        config.llm_endpoint = os.getenv("LLM_ENDPOINT")
-        config.llm_model = os.getenv("LLM_MODEL")
+    startup_state["boot_ms"] = _elapsed_ms(PROCESS_START)
 
-    print(f"✅ Cognee ready! Provider: {config.llm_provider}")
+    # Keep a reference so the task is not garbage collected mid-run
+    app.state.warmup_task = asyncio.create_task(run_warmup())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled connections"""
+    await close_llm_http_client()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""
+Priority scheduling for calls into Cognee (and through it, the LLM/embedding
+providers).
+
+Every unit of work is tagged with a priority class and has to take a slot from
+one shared concurrency budget before it calls Cognee. Waiting work is
+dispatched by weighted fair queuing (self-clocked): each request gets a
+virtual finish tag of max(virtual_time, class_last_tag) + cost / weight, and
+the eligible request with the smallest tag goes next. A class with weight 8
+thus gets roughly 8x the slots of a weight-1 class under contention, while an
+idle class costs nothing.
+
+A few slots are reserved for interactive classes, so a bulk import can never
+occupy the whole budget and make live chat searches wait behind a cognify.
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Dict
+
+
+class PriorityClass(str, Enum):
+    INTERACTIVE_SEARCH = "interactive_search"
+    INTERACTIVE_INGEST = "interactive_ingest"
+    BULK_BACKFILL = "bulk_backfill"
+    MAINTENANCE = "maintenance"
+
+
+INTERACTIVE_CLASSES = {PriorityClass.INTERACTIVE_SEARCH, PriorityClass.INTERACTIVE_INGEST}
+
+DEFAULT_WEIGHTS = "interactive_search=8,interactive_ingest=4,bulk_backfill=1,maintenance=1"
+
+
+def parse_weights(spec: str) -> Dict[PriorityClass, float]:
+    """Parse "class=weight,..." into a weight per priority class"""
+    weights = {cls: 1.0 for cls in PriorityClass}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        weights[PriorityClass(name.strip())] = max(float(value), 0.001)
+    return weights
+
+
+class _Waiter:
+    __slots__ = ("tag", "future", "enqueued_at")
+
+    def __init__(self, tag: float, future: asyncio.Future):
+        self.tag = tag
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class WeightedFairScheduler:
+    """Weighted fair queue over a fixed number of concurrent Cognee calls"""
+
+    def __init__(self, capacity: int, weights: Dict[PriorityClass, float], interactive_reserved: int = 0):
+        self.capacity = max(capacity, 1)
+        self.weights = weights
+        # Never reserve the whole budget, background work must still progress
+        self.interactive_reserved = min(max(interactive_reserved, 0), self.capacity - 1)
+        self._virtual_time = 0.0
+        self._last_tag = {cls: 0.0 for cls in PriorityClass}
+        self._queues = {cls: deque() for cls in PriorityClass}
+        self._in_flight = {cls: 0 for cls in PriorityClass}
+        self._stats = {
+            cls: {"started": 0, "completed": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            for cls in PriorityClass
+        }
+
+    def _total_in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    def _background_limit(self) -> int:
+        return self.capacity - self.interactive_reserved
+
+    def _can_start(self, priority: PriorityClass) -> bool:
+        if self._total_in_flight() >= self.capacity:
+            return False
+        if priority in INTERACTIVE_CLASSES:
+            return True
+        background = sum(n for cls, n in self._in_flight.items() if cls not in INTERACTIVE_CLASSES)
+        return background < self._background_limit()
+
+    def _start(self, priority: PriorityClass, tag: float, wait_ms: float):
+        self._virtual_time = max(self._virtual_time, tag)
+        self._in_flight[priority] += 1
+        stats = self._stats[priority]
+        stats["started"] += 1
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+
+    def _dispatch(self):
+        """Hand free slots to the eligible waiters with the smallest tags"""
+        while True:
+            best = None
+            for cls, queue in self._queues.items():
+                while queue and queue[0].future.done():
+                    queue.popleft()  # cancelled while waiting
+                if queue and self._can_start(cls) and (best is None or queue[0].tag < best[1].tag):
+                    best = (cls, queue[0])
+            if best is None:
+                return
+            cls, waiter = best
+            self._queues[cls].popleft()
+            self._start(cls, waiter.tag, (time.perf_counter() - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(None)
+
+    async def acquire(self, priority: PriorityClass, cost: float = 1.0):
+        tag = max(self._virtual_time, self._last_tag[priority]) + cost / self.weights[priority]
+        self._last_tag[priority] = tag
+
+        waiter = _Waiter(tag, asyncio.get_running_loop().create_future())
+        self._queues[priority].append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # The slot may have been granted just before the cancellation landed
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(priority)
+            raise
+
+    def release(self, priority: PriorityClass):
+        self._in_flight[priority] -= 1
+        self._stats[priority]["completed"] += 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: PriorityClass, cost: float = 1.0):
+        """Hold one slot of the shared call budget for the duration of the block"""
+        await self.acquire(priority, cost)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def metrics(self) -> dict:
+        classes = {}
+        for cls in PriorityClass:
+            stats = self._stats[cls]
+            classes[cls.value] = {
+                "weight": self.weights[cls],
+                "in_flight": self._in_flight[cls],
+                "waiting": sum(1 for w in self._queues[cls] if not w.future.done()),
+                "started": stats["started"],
+                "completed": stats["completed"],
+                "avg_wait_ms": round(stats["total_wait_ms"] / stats["started"], 1) if stats["started"] else 0.0,
+                "max_wait_ms": round(stats["max_wait_ms"], 1),
+            }
+        return {
+            "capacity": self.capacity,
+            "interactive_reserved": self.interactive_reserved,
+            "in_flight": self._total_in_flight(),
+            "classes": classes,
+        }
+
+
+scheduler = WeightedFairScheduler(
+    capacity=int(os.getenv("COGNEE_MAX_CONCURRENT_CALLS", "8")),
+    weights=parse_weights(os.getenv("COGNEE_PRIORITY_WEIGHTS", DEFAULT_WEIGHTS)),
+    interactive_reserved=int(os.getenv("COGNEE_INTERACTIVE_RESERVED", "2")),
+)
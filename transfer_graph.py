@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Address-by-address transfer graph for wallet clustering and sybil detection.
+
+The token's transfer history (synced into the TransferStore by
+cookie_token_holders.py) becomes two SciPy CSR matrices over the same address
+index: counts[i, j] is the number of transfers from address i to address j,
+volumes[i, j] the amount sent, in tokens. Duplicate edges are summed while the
+matrices are built, so a history of millions of transfers is a handful of flat
+arrays instead of nested dicts, and every query below is sparse linear algebra:
+- connected components (scipy.sparse.csgraph, weakly connected: direction
+  doesn't matter for "these wallets have traded with each other")
+- PageRank over volume-weighted edges (power iteration on sparse mat-vecs)
+- top counterparties of an address, in both directions
+
+Mints and burns (the zero address) are left out by default, otherwise every
+minted wallet would be one component.
+
+Usage:
+    graph = TransferGraph.from_store(TransferStore(), COOKIE_TOKEN_ADDRESS)
+    labels = graph.components()
+    ranks = graph.pagerank()
+    graph.top_counterparties("0xabc...")
+
+    python transfer_graph.py [--store cookie_transfers.sqlite] [--entity-store cookie_entities.sqlite]
+                             [--address 0x...] [--output transfer_clusters.xlsx]
+"""
+
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from entity_store import DEFAULT_ENTITY_STORE_PATH, EntityStore, normalize_address
+from scraper_stream import add_output_arguments, export_results
+from transfer_store import DEFAULT_STORE_PATH, TransferStore
+
+COOKIE_TOKEN_ADDRESS = "0xc0041ef357b183448b235a8ea73ce4e4ec8c265f"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Transfers converted from lists to arrays at a time while building
+CHUNK_TRANSFERS = 1 << 20
+
+# Entity store tables whose addresses are checked for shared clusters
+WATCH_TABLES = ("holders", "leaderboard_entries")
+
+
+class TransferGraph:
+    """Transfer counts and volumes between addresses, as n x n CSR matrices."""
+
+    def __init__(self, addresses: List[str], counts: sparse.csr_matrix, volumes: sparse.csr_matrix):
+        self.addresses = addresses
+        self.index: Dict[str, int] = {address: i for i, address in enumerate(addresses)}
+        self.counts = counts
+        self.volumes = volumes
+        self._incoming: Optional[Dict[str, sparse.csr_matrix]] = None
+        self._labels: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_transfers(
+        cls, batches: Iterable[List[Dict]], decimals: int = 18, include_zero: bool = False
+    ) -> "TransferGraph":
+        """Build from batches of TransferStore rows (from_addr, to_addr, value)."""
+        index: Dict[str, int] = {}
+        scale = 10.0 ** decimals
+        sources, targets, amounts = [], [], []
+        src, dst, amount = [], [], []
+
+        def flush():
+            sources.append(np.array(src, dtype=np.int64))
+            targets.append(np.array(dst, dtype=np.int64))
+            amounts.append(np.array(amount, dtype=np.float64))
+            src.clear()
+            dst.clear()
+            amount.clear()
+
+        for batch in batches:
+            for tx in batch:
+                sender, recipient = tx["from_addr"], tx["to_addr"]
+                if not sender or not recipient:
+                    continue
+                if not include_zero and (sender == ZERO_ADDRESS or recipient == ZERO_ADDRESS):
+                    continue
+                src.append(index.setdefault(sender, len(index)))
+                dst.append(index.setdefault(recipient, len(index)))
+                amount.append(int(tx["value"] or 0) / scale)
+            if len(src) >= CHUNK_TRANSFERS:
+                flush()
+        flush()
+
+        n = len(index)
+        rows, cols, values = np.concatenate(sources), np.concatenate(targets), np.concatenate(amounts)
+        # COO -> CSR sums duplicate (from, to) pairs: one entry per edge
+        counts = sparse.coo_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(n, n)).tocsr()
+        volumes = sparse.coo_matrix((values, (rows, cols)), shape=(n, n)).tocsr()
+        return cls(list(index), counts, volumes)
+
+    @classmethod
+    def from_store(cls, store: TransferStore, token: str = COOKIE_TOKEN_ADDRESS, **kwargs) -> "TransferGraph":
+        return cls.from_transfers(store.iter_transfers(token), **kwargs)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    @property
+    def edge_count(self) -> int:
+        return self.counts.nnz
+
+    def index_of(self, address: str) -> Optional[int]:
+        return self.index.get(normalize_address(address))
+
+    def components(self) -> np.ndarray:
+        """Weakly connected component label per address (cached)."""
+        if self._labels is None:
+            _, self._labels = connected_components(self.counts, directed=True, connection="weak")
+        return self._labels
+
+    def component_sizes(self) -> np.ndarray:
+        """Size of each address's component, per address."""
+        labels = self.components()
+        return np.bincount(labels)[labels]
+
+    def component_of(self, address: str) -> List[str]:
+        """Every address in the same component as address."""
+        i = self.index_of(address)
+        if i is None:
+            return []
+        labels = self.components()
+        return [self.addresses[j] for j in np.flatnonzero(labels == labels[i])]
+
+    def pagerank(self, alpha: float = 0.85, tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+        """
+        PageRank over volume-weighted transfer edges.
+
+        Rank flows from sender to recipient in proportion to the volume sent;
+        addresses that never send spread their rank evenly (dangling nodes).
+        """
+        n = len(self)
+        if n == 0:
+            return np.zeros(0)
+        out_volume = np.asarray(self.volumes.sum(axis=1)).ravel()
+        dangling = out_volume == 0
+        inverse = np.divide(1.0, out_volume, out=np.zeros(n), where=~dangling)
+        # Transposed, row-normalized: ranks_next = alpha * transition @ ranks + teleport
+        transition = (sparse.diags(inverse) @ self.volumes).T.tocsr()
+        ranks = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            spread = alpha * ranks[dangling].sum() / n + (1 - alpha) / n
+            updated = alpha * (transition @ ranks) + spread
+            if np.abs(updated - ranks).sum() < tol:
+                return updated
+            ranks = updated
+        return ranks
+
+    def _incoming_rows(self) -> Dict[str, sparse.csr_matrix]:
+        # Transposes are built once, on the first counterparty query
+        if self._incoming is None:
+            self._incoming = {"counts": self.counts.T.tocsr(), "volumes": self.volumes.T.tocsr()}
+        return self._incoming
+
+    def top_counterparties(self, address: str, k: int = 10) -> List[Dict]:
+        """The k addresses address has moved the most volume with, in either direction."""
+        i = self.index_of(address)
+        if i is None:
+            return []
+        incoming = self._incoming_rows()
+
+        def row(matrix: sparse.csr_matrix) -> Dict[int, float]:
+            start, end = matrix.indptr[i], matrix.indptr[i + 1]
+            return dict(zip(matrix.indices[start:end].tolist(), matrix.data[start:end].tolist()))
+
+        sent, received = row(self.volumes), row(incoming["volumes"])
+        sent_count, received_count = row(self.counts), row(incoming["counts"])
+        total = {j: sent.get(j, 0.0) + received.get(j, 0.0) for j in sent.keys() | received.keys()}
+        top = sorted(total, key=total.get, reverse=True)[:k]
+        return [
+            {
+                "counterparty": self.addresses[j],
+                "volume": total[j],
+                "volume_sent": sent.get(j, 0.0),
+                "volume_received": received.get(j, 0.0),
+                "transfers_sent": int(sent_count.get(j, 0)),
+                "transfers_received": int(received_count.get(j, 0)),
+            }
+            for j in top
+        ]
+
+    def clusters(self, addresses: Iterable[str], min_size: int = 2) -> List[Dict]:
+        """
+        Watched addresses that share a component with other watched addresses.
+
+        One row per watched address, grouped by cluster (largest first); a
+        cluster of Galxe participants and holders that all traded with each
+        other is a sybil candidate.
+        """
+        labels = self.components()
+        sizes = np.bincount(labels)
+        watched = {}
+        for address in addresses:
+            i = self.index_of(address)
+            if i is not None:
+                watched.setdefault(i, None)
+        if not watched:
+            return []
+        members = np.fromiter(watched, dtype=np.int64, count=len(watched))
+        member_labels = labels[members]
+        watched_per_label = np.bincount(member_labels, minlength=len(sizes))
+        keep = watched_per_label[member_labels] >= min_size
+        members, member_labels = members[keep], member_labels[keep]
+        # Largest clusters first, then by label so each cluster's rows are together
+        order = np.lexsort([member_labels, -watched_per_label[member_labels]])
+        ranks = self.pagerank()
+        return [
+            {
+                "cluster": int(member_labels[o]),
+                "onchain_address": self.addresses[members[o]],
+                "watched_in_cluster": int(watched_per_label[member_labels[o]]),
+                "component_size": int(sizes[member_labels[o]]),
+                "pagerank": float(ranks[members[o]]),
+                "counterparties": int(self.counts.indptr[members[o] + 1] - self.counts.indptr[members[o]]),
+            }
+            for o in order
+        ]
+
+
+def watched_addresses(store: EntityStore, tables: Iterable[str] = WATCH_TABLES) -> List[str]:
+    """Addresses the entity store knows as holders or leaderboard (e.g. Galxe) entries."""
+    addresses = {}
+    for table in tables:
+        for rows in store.iter_rows(table):
+            for row in rows:
+                if row.get("address"):
+                    addresses.setdefault(row["address"], None)
+    return list(addresses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster wallets by their COOKIE transfer graph")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="SQLite transfer store to build the graph from")
+    parser.add_argument("--token", default=COOKIE_TOKEN_ADDRESS, help="Token whose transfers form the graph")
+    parser.add_argument("--entity-store", default=DEFAULT_ENTITY_STORE_PATH,
+                        help="Entity store whose holder / leaderboard addresses are checked for shared clusters")
+    parser.add_argument("--address", action="append", default=[], help="Print the top counterparties of an address")
+    parser.add_argument("--top", type=int, default=10, help="Addresses to list by PageRank")
+    add_output_arguments(parser, "transfer_clusters.xlsx")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("COOKIE Transfer Graph")
+    print("=" * 60)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+
+    store = TransferStore(args.store)
+    graph = TransferGraph.from_store(store, args.token)
+    store.close()
+    if not len(graph):
+        print("❌ No transfers stored. Run cookie_token_holders.py first.")
+        return
+
+    labels = graph.components()
+    sizes = np.bincount(labels)
+    print(f"📊 {len(graph)} addresses, {graph.edge_count} edges")
+    print(f"   Components: {len(sizes)} (largest: {sizes.max()} addresses)")
+
+    ranks = graph.pagerank()
+    print(f"\n🏆 Top {args.top} by PageRank:")
+    for i in np.argsort(ranks)[::-1][:args.top]:
+        print(f"   {graph.addresses[i]}  {ranks[i]:.6f}")
+
+    for address in args.address:
+        print(f"\n🔗 Top counterparties of {address}:")
+        for row in graph.top_counterparties(address):
+            print(f"   {row['counterparty']}  {row['volume']:,.2f} "
+                  f"({row['transfers_sent']} sent, {row['transfers_received']} received)")
+
+    if os.path.exists(args.entity_store):
+        with EntityStore(args.entity_store) as entities:
+            watched = watched_addresses(entities)
+        clusters = graph.clusters(watched)
+        print(f"\n🕸 {len(clusters)} of {len(watched)} known addresses share a cluster with another one")
+        if clusters:
+            export_results(clusters, args.output, args.format)
+    else:
+        print(f"\n⚠ No entity store at {args.entity_store}; skipping cluster report")
+
+    print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    main()
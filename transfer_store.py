@@ -0,0 +1,152 @@
+"""
+Local SQLite store for ERC-20 transfer logs.
+
+Holds the transfers of any number of tokens, indexed by block and by address,
+together with the last block each token has been synced to, so ingestion only
+ever fetches new blocks.
+
+Rows are keyed by (token, tx_hash, log_index); inserting a transfer that is
+already stored is a no-op, so re-fetching an overlapping window is harmless.
+Values are kept as decimal strings because uint256 amounts overflow SQLite
+integers.
+
+Usage:
+    store = TransferStore("cookie_transfers.sqlite")
+    store.insert_transfers(token, rows, synced_to=end_block)
+    for tx in store.iter_transfers(token):
+        ...
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_STORE_PATH = os.getenv("TRANSFER_STORE_PATH", "cookie_transfers.sqlite")
+
+COLUMNS = ["block_number", "log_index", "tx_hash", "tx_index", "from_addr", "to_addr", "value", "timestamp"]
+
+
+def normalize_transfer(tx: Dict, log_index: int) -> Dict:
+    """Map an explorer tokentx row onto the store's columns."""
+    return {
+        "block_number": int(tx.get("blockNumber", 0)),
+        "log_index": int(tx["logIndex"]) if tx.get("logIndex") not in (None, "") else log_index,
+        "tx_hash": tx.get("hash", ""),
+        "tx_index": int(tx.get("transactionIndex") or 0),
+        "from_addr": tx.get("from", "").lower(),
+        "to_addr": tx.get("to", "").lower(),
+        "value": str(tx.get("value", "0")),
+        "timestamp": int(tx.get("timeStamp") or 0),
+    }
+
+
+class TransferStore:
+    """Indexed transfer log plus per-token sync cursor."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS transfers (
+                token TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                tx_hash TEXT NOT NULL,
+                tx_index INTEGER NOT NULL,
+                from_addr TEXT NOT NULL,
+                to_addr TEXT NOT NULL,
+                value TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                PRIMARY KEY (token, tx_hash, log_index)
+            );
+            -- log_index is numbered per transaction, so the iteration order needs the tx too
+            DROP INDEX IF EXISTS transfers_block;
+            CREATE INDEX IF NOT EXISTS transfers_order ON transfers (token, block_number, tx_index, tx_hash, log_index);
+            CREATE INDEX IF NOT EXISTS transfers_from ON transfers (token, from_addr);
+            CREATE INDEX IF NOT EXISTS transfers_to ON transfers (token, to_addr);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                token TEXT PRIMARY KEY,
+                last_synced_block INTEGER NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    def last_synced_block(self, token: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT last_synced_block FROM sync_state WHERE token = ?", (token.lower(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def insert_transfers(self, token: str, rows: Iterable[Dict], synced_to: Optional[int] = None) -> int:
+        """
+        Insert normalized transfer rows; returns how many were new.
+
+        With synced_to, the token's sync cursor is advanced in the same
+        transaction, so a crash never records a block whose rows are missing.
+        """
+        token = token.lower()
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                f"INSERT OR IGNORE INTO transfers (token, {', '.join(COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in COLUMNS)})",
+                ([token] + [row[col] for col in COLUMNS] for row in rows),
+            )
+            inserted = self._db.total_changes - before
+            if synced_to is not None:
+                self._db.execute(
+                    "INSERT INTO sync_state (token, last_synced_block) VALUES (?, ?) "
+                    "ON CONFLICT(token) DO UPDATE SET last_synced_block = "
+                    "MAX(last_synced_block, excluded.last_synced_block)",
+                    (token, synced_to),
+                )
+            self._db.commit()
+        return inserted
+
+    def count(self, token: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM transfers WHERE token = ?", (token.lower(),)).fetchone()[0]
+
+    def iter_transfers(self, token: str, batch_size: int = 5000) -> Iterator[List[Dict]]:
+        """
+        Yield the token's transfers in chain order, batch_size rows at a time.
+
+        Pages on (block, tx index, tx hash, log index): log indexes repeat
+        across the transactions of a block, so the cursor needs every column
+        of a unique key or rows sharing a (block, log index) get skipped.
+        """
+        token = token.lower()
+        last = (-1, -1, "", -1)
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM transfers "
+                    "WHERE token = ? AND (block_number, tx_index, tx_hash, log_index) > (?, ?, ?, ?) "
+                    "ORDER BY block_number, tx_index, tx_hash, log_index LIMIT ?",
+                    (token, *last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            batch = [dict(zip(COLUMNS, row)) for row in rows]
+            yield batch
+            tail = batch[-1]
+            last = (tail["block_number"], tail["tx_index"], tail["tx_hash"], tail["log_index"])
+
+    def unique_addresses(self, token: str) -> List[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT from_addr FROM transfers WHERE token = ? UNION SELECT to_addr FROM transfers WHERE token = ?",
+                (token.lower(), token.lower()),
+            ).fetchall()
+        return [row[0] for row in rows if row[0]]
+
+    def close(self):
+        with self._lock:
+            self._db.close()